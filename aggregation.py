@@ -0,0 +1,150 @@
+# Cube d'agregation des trades : statistiques additives calculees une seule fois
+
+import pandas as pd
+import numpy as np
+from typing import List
+from metrics import long_flags, percentage
+from instrumentation import traced
+
+# Cles de regroupement derivables de la date de sortie et de la direction
+ROLLUP_KEYS = ['Date', 'Month_Period', 'Month_Name', 'Weekday', 'Direction']
+DIRECTIONS = ['long', 'short', 'other']
+
+
+class TradeCube:
+    '''
+    Statistiques de base par (jour de sortie, direction) : nombre de trades, somme,
+    somme des carres (centree) et nombre de trades gagnants.
+
+    Ces statistiques etant additives, toutes les vues (jour, mois, jour de la
+    semaine, mois x jour...) sont obtenues par simple re-agregation du cube,
+    sans repasser sur les trades.
+    '''
+
+    @traced()
+    def __init__(self, exit_trades: pd.DataFrame, pnl_column: str = 'Net P&L JPY',
+                 pct_column: str = 'Net P&L %', time_column: str = 'Date and time',
+                 type_column: str = 'Type'):
+        pnl = exit_trades[pnl_column].astype(float)
+        pct = exit_trades[pct_column].astype(float)
+
+        # Centrer avant d'elever au carre limite la perte de precision sur l'ecart-type
+        self.pnl_center = float(pnl.mean()) if len(pnl) else 0.0
+        self.pct_center = float(pct.mean()) if len(pct) else 0.0
+
+        direction = pd.Categorical(np.where(
+            long_flags(exit_trades[type_column]), 'long',
+            np.where(exit_trades[type_column].str.contains('short', case=False), 'short', 'other')
+        ), categories=DIRECTIONS)
+        work = pd.DataFrame({
+            'Date': exit_trades[time_column].dt.normalize().values,
+            'Direction': direction,
+            'pnl': pnl.values,
+            'pnl_sq': ((pnl - self.pnl_center) ** 2).values,
+            'pct': pct.values,
+            'pct_sq': ((pct - self.pct_center) ** 2).values,
+            'win': (pnl > 0).values
+        })
+
+        self.table = work.groupby(['Date', 'Direction'], sort=True, observed=True).agg(
+            Count=('pnl', 'count'),
+            Sum=('pnl', 'sum'),
+            SumSq=('pnl_sq', 'sum'),
+            Count_Pct=('pct', 'count'),
+            Sum_Pct=('pct', 'sum'),
+            SumSq_Pct=('pct_sq', 'sum'),
+            Wins=('win', 'sum')
+        ).reset_index()
+
+    @classmethod
+    def from_table(cls, table: pd.DataFrame, pnl_center: float, pct_center: float) -> 'TradeCube':
+        '''Reconstruit un cube a partir d'une table deja agregee (etat sauvegarde)'''
+        cube = cls.__new__(cls)
+        cube.table = table
+        cube.pnl_center = pnl_center
+        cube.pct_center = pct_center
+        return cube
+
+    @traced()
+    def merge(self, other: 'TradeCube') -> 'TradeCube':
+        '''
+        Cube combine self + other (mode incremental : seuls les nouveaux trades sont agreges)
+
+        Les sommes de carres de other sont recentrees sur les centres de self :
+        sum((x - c1)^2) = sum((x - c2)^2) + 2 d (S - n c2) + n d^2, avec d = c2 - c1
+        '''
+        added = other.table.copy()
+        for count, total, sum_sq, own, theirs in (
+            ('Count', 'Sum', 'SumSq', self.pnl_center, other.pnl_center),
+            ('Count_Pct', 'Sum_Pct', 'SumSq_Pct', self.pct_center, other.pct_center)
+        ):
+            delta = theirs - own
+            added[sum_sq] = (added[sum_sq] + 2 * delta * (added[total] - added[count] * theirs)
+                             + added[count] * delta ** 2)
+
+        table = pd.concat([self.table, added], ignore_index=True)
+        table = table.groupby(['Date', 'Direction'], sort=True, observed=True).sum().reset_index()
+        return TradeCube.from_table(table, self.pnl_center, self.pct_center)
+
+    def _key(self, name: str) -> pd.Series:
+        dates = self.table['Date']
+        if name == 'Date':
+            # datetime64 normalise (8 octets) plutot que des objets date Python
+            return dates
+        if name == 'Month_Period':
+            return dates.dt.to_period('M')
+        if name == 'Month_Name':
+            return dates.dt.month_name()
+        if name == 'Weekday':
+            return dates.dt.day_name()
+        if name == 'Direction':
+            return self.table['Direction']
+        raise KeyError(f'Cle de regroupement inconnue: {name} (disponibles: {ROLLUP_KEYS})')
+
+    @staticmethod
+    def _std(count, total, sum_sq_centered, center):
+        # Variance echantillon (ddof=1) a partir des sommes centrees
+        centered_sum = total - count * center
+        with np.errstate(divide='ignore', invalid='ignore'):
+            variance = (sum_sq_centered - centered_sum ** 2 / count) / (count - 1)
+        variance = np.where(count > 1, np.maximum(variance, 0), np.nan)
+        return np.sqrt(variance)
+
+    @traced()
+    def rollup(self, by: List[str]) -> pd.DataFrame:
+        '''
+        Re-agrege le cube selon les cles demandees
+
+        Returns:
+            pd.DataFrame: Une ligne par groupe avec Total/Avg/Std P&L (JPY et %),
+            Trade_Count, Win_Rate et Long_Percentage
+        '''
+        base = self.table[['Count', 'Sum', 'SumSq', 'Count_Pct', 'Sum_Pct', 'SumSq_Pct', 'Wins']].copy()
+        base['Long'] = np.where(self.table['Direction'] == 'long', self.table['Count'], 0)
+        for key in by:
+            base[key] = self._key(key).values
+
+        rolled = base.groupby(by, sort=True, observed=True).sum().reset_index()
+
+        count = rolled['Count'].to_numpy(dtype=float)
+        count_pct = rolled['Count_Pct'].to_numpy(dtype=float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            result = rolled[by].copy()
+            result['Total_PnL_JPY'] = rolled['Sum']
+            result['Avg_PnL_JPY'] = rolled['Sum'] / count
+            result['Std_PnL_JPY'] = self._std(count, rolled['Sum'].to_numpy(), rolled['SumSq'].to_numpy(), self.pnl_center)
+            result['Trade_Count'] = rolled['Count']
+            result['Total_PnL_Pct'] = rolled['Sum_Pct']
+            result['Avg_PnL_Pct'] = rolled['Sum_Pct'] / count_pct
+            result['Std_PnL_Pct'] = self._std(count_pct, rolled['Sum_Pct'].to_numpy(), rolled['SumSq_Pct'].to_numpy(), self.pct_center)
+            result['Win_Rate'] = percentage(rolled['Wins'], count)
+            result['Long_Percentage'] = percentage(rolled['Long'], count)
+        return result
+
+    def totals(self) -> pd.Series:
+        '''Statistiques globales (toutes dates et directions confondues)'''
+        return self.table[['Count', 'Sum', 'Wins']].sum()
+
+    def direction_counts(self) -> pd.Series:
+        '''Nombre de trades par direction (long / short / other)'''
+        return self.table.groupby('Direction', observed=True)['Count'].sum()
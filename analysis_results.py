@@ -0,0 +1,162 @@
+# Resultats d'analyse charges dans le dashboard : un objet par fichier, indexe par (actif, fichier)
+
+import os
+from dataclasses import dataclass
+import pandas as pd
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+@dataclass(frozen=True, slots=True)
+class AnalysisSummary:
+    '''Ligne de resume d'un fichier (listes et selecteurs, sans toucher aux DataFrames)'''
+    label: str
+    asset_name: str
+    file_name: str
+    trades: int
+    total_pnl: float
+    win_rate: float
+    max_drawdown_pct: Optional[float]
+
+
+@dataclass(frozen=True, slots=True)
+class AnalysisResult:
+    '''
+    Analyse complete et tableau de verite d'un fichier
+
+    Les dicts complete / truth sont ceux du cache des resultats : ils sont
+    partages (entre vues et entre sessions) et ne doivent pas etre modifies.
+    '''
+    key: Tuple[str, str]
+    label: str
+    complete: Dict[str, Any]
+    truth: Dict[str, Any]
+    memory: Optional[Dict[str, int]]
+    trace: Optional[Dict[str, Any]] = None
+    path: Optional[str] = None
+
+    @property
+    def asset_name(self) -> str:
+        return self.key[0]
+
+    @property
+    def file_name(self) -> str:
+        return self.key[1]
+
+    def summary(self) -> AnalysisSummary:
+        drawdown_info = self.complete.get('drawdown_info') or {}
+        return AnalysisSummary(
+            label=self.label,
+            asset_name=self.asset_name,
+            file_name=self.file_name,
+            trades=int(self.complete.get('total_trades', 0)),
+            total_pnl=float(self.complete.get('total_pnl', 0.0)),
+            win_rate=float(self.complete.get('win_rate_global', 0.0)),
+            max_drawdown_pct=drawdown_info.get('max_drawdown_percentage')
+        )
+
+
+def _labelled(analysis: Dict[str, Any], label: str) -> Dict[str, Any]:
+    # Copie superficielle (les DataFrames restent partages) si le libelle differe du nom d'actif
+    return analysis if analysis.get('asset_name') == label else {**analysis, 'asset_name': label}
+
+
+class AnalysisSet:
+    '''
+    Resultats d'une analyse, dans l'ordre de selection des fichiers
+
+    Chaque resultat est indexe par sa cle (actif, fichier) et par son libelle :
+    le nom de l'actif, complete du nom de fichier quand plusieurs fichiers
+    portent sur le meme actif (aucun resultat n'en masque un autre).
+    '''
+
+    __slots__ = ('_results', '_labels')
+
+    def __init__(self):
+        self._results: Dict[Tuple[str, str], AnalysisResult] = {}
+        self._labels: Dict[str, Tuple[str, str]] = {}
+
+    @classmethod
+    def from_results(cls, results: List[Dict[str, Any]]) -> 'AnalysisSet':
+        '''Construit l'ensemble a partir des resultats de parallel_analysis ({'file', 'complete', 'truth', 'memory', 'trace'})'''
+        analyses = cls()
+        counts: Dict[str, int] = {}
+        for result in results:
+            asset_name = result['complete']['asset_name']
+            counts[asset_name] = counts.get(asset_name, 0) + 1
+        for result in results:
+            file_name = os.path.basename(result['file'])
+            asset_name = result['complete']['asset_name']
+            label = asset_name if counts[asset_name] == 1 else f'{asset_name} ({file_name})'
+            analyses.add(file_name, result, label)
+        return analyses
+
+    def add(self, file_name: str, result: Dict[str, Any], label: Optional[str] = None) -> AnalysisResult:
+        '''Ajoute (ou remplace) le resultat d'un fichier'''
+        asset_name = result['complete']['asset_name']
+        key = (asset_name, file_name)
+        label = label or asset_name
+        if self._labels.get(label, key) != key:
+            label = f'{asset_name} ({file_name})'
+        previous = self._results.get(key)
+        if previous is not None:
+            del self._labels[previous.label]
+        analysis = AnalysisResult(
+            key=key,
+            label=label,
+            complete=_labelled(result['complete'], label),
+            truth=_labelled(result['truth'], label),
+            memory=result.get('memory'),
+            trace=result.get('trace'),
+            path=result.get('file')
+        )
+        self._results[key] = analysis
+        self._labels[label] = key
+        return analysis
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    def __iter__(self) -> Iterator[AnalysisResult]:
+        return iter(self._results.values())
+
+    def __getitem__(self, key: Tuple[str, str]) -> AnalysisResult:
+        return self._results[key]
+
+    def __contains__(self, key: Tuple[str, str]) -> bool:
+        return key in self._results
+
+    @property
+    def labels(self) -> List[str]:
+        return list(self._labels)
+
+    def by_label(self, label: str) -> AnalysisResult:
+        '''Resultat d'un libelle de selecteur (acces direct, sans parcours)'''
+        return self._results[self._labels[label]]
+
+    def complete_analyses(self, labels: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        '''Analyses completes (toutes ou celles des libelles donnes, dans leur ordre)'''
+        if labels is None:
+            return [analysis.complete for analysis in self]
+        return [self.by_label(label).complete for label in labels]
+
+    def truth_analyses(self) -> List[Dict[str, Any]]:
+        return [analysis.truth for analysis in self]
+
+    def memory_reports(self) -> Dict[str, Dict[str, int]]:
+        return {analysis.file_name: analysis.memory for analysis in self if analysis.memory}
+
+    def traces(self) -> Dict[str, Dict[str, Any]]:
+        '''Traces des etapes par libelle (fichiers analyses avec l'instrumentation active)'''
+        return {analysis.label: analysis.trace for analysis in self if analysis.trace}
+
+    def summary(self) -> pd.DataFrame:
+        '''Une ligne par fichier (actif, fichier, trades, P&L, win rate, drawdown max)'''
+        rows = [analysis.summary() for analysis in self]
+        return pd.DataFrame({
+            'Actif': [row.label for row in rows],
+            'Fichier': [row.file_name for row in rows],
+            'Trades': [row.trades for row in rows],
+            'P&L Total': [row.total_pnl for row in rows],
+            'Win Rate (%)': [row.win_rate for row in rows],
+            'Drawdown Max (%)': [row.max_drawdown_pct for row in rows]
+        })
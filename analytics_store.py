@@ -0,0 +1,335 @@
+# Base analytique (SQLite) : trades normalises et agregats de tous les exports
+#
+# Chaque export est identifie par son nom de fichier et le hash de son contenu ;
+# ses metadonnees (strategie, version, parametres, actif, date d'export) sont
+# extraites du nom. Une fois indexes, les exports se comparent par requete SQL
+# sans relire les fichiers XLSX.
+#
+#   python analytics_store.py [dossier] [--jobs N] [--sql "SELECT ..."]
+
+import argparse
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+import config
+from drawdown import drawdown_kernel
+from export_metadata import parse_export_name
+from parallel_analysis import iter_parallel
+from trades_cache import file_digest
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS exports (
+    export_id INTEGER PRIMARY KEY,
+    file_name TEXT NOT NULL UNIQUE,
+    digest TEXT NOT NULL,
+    strategy TEXT,
+    version TEXT,
+    params TEXT,
+    broker TEXT,
+    asset TEXT,
+    export_date TEXT,
+    variant TEXT,
+    trades INTEGER,
+    total_pnl REAL,
+    avg_pnl REAL,
+    win_rate REAL,
+    profit_factor REAL,
+    max_drawdown REAL,
+    max_drawdown_pct REAL,
+    first_exit TEXT,
+    last_exit TEXT,
+    ingested_at TEXT
+);
+CREATE TABLE IF NOT EXISTS trades (
+    export_id INTEGER NOT NULL,
+    trade_no INTEGER,
+    direction TEXT,
+    exit_time TEXT,
+    exit_date TEXT,
+    weekday INTEGER,
+    hour INTEGER,
+    pnl REAL,
+    pnl_pct REAL
+);
+CREATE TABLE IF NOT EXISTS daily (
+    export_id INTEGER NOT NULL,
+    date TEXT NOT NULL,
+    weekday INTEGER,
+    trades INTEGER,
+    wins INTEGER,
+    total_pnl REAL,
+    total_pnl_pct REAL,
+    PRIMARY KEY (export_id, date)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_exports_asset ON exports (asset);
+CREATE INDEX IF NOT EXISTS idx_exports_strategy ON exports (strategy, version, params);
+CREATE INDEX IF NOT EXISTS idx_exports_date ON exports (export_date);
+CREATE INDEX IF NOT EXISTS idx_trades_export ON trades (export_id);
+CREATE INDEX IF NOT EXISTS idx_trades_date ON trades (exit_date);
+CREATE INDEX IF NOT EXISTS idx_trades_weekday ON trades (weekday);
+CREATE INDEX IF NOT EXISTS idx_daily_date ON daily (date);
+CREATE INDEX IF NOT EXISTS idx_daily_weekday ON daily (weekday);
+'''
+
+# Migrations appliquees une fois par base (PRAGMA user_version)
+MIGRATIONS = [
+    # 1 : profit factor infini (et non NULL) pour les exports sans trade perdant
+    '''
+    UPDATE exports SET profit_factor = 9e999
+    WHERE profit_factor IS NULL AND export_id IN (
+        SELECT export_id FROM trades GROUP BY export_id HAVING MIN(pnl) >= 0 AND MAX(pnl) > 0
+    )
+    '''
+]
+
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+
+def load_export(file_path: str) -> Dict[str, Any]:
+    '''
+    Lit un export et prepare ses lignes pour la base (execute dans un processus du pool)
+
+    Returns:
+        Dict: ligne de la table exports ('export'), colonnes des trades ('trades')
+        et agregats quotidiens ('daily'), sous forme de tableaux NumPy
+    '''
+    from backtest_analysis import load_exit_trades
+
+    exit_trades = load_exit_trades(file_path).sort_values('Date and time', kind='stable')
+    times = exit_trades['Date and time'].to_numpy(dtype='datetime64[s]')
+    pnl = exit_trades['Net P&L JPY'].to_numpy(dtype=float)
+    pnl_pct = exit_trades['Net P&L %'].to_numpy(dtype=float)
+    days = times.astype('datetime64[D]')
+    # 1970-01-01 etait un jeudi : (jours + 3) % 7 donne 0 = lundi
+    weekday = (days.astype(np.int64) + 3) % 7
+
+    profile = drawdown_kernel(pnl, times)
+    gross_profit = pnl[pnl > 0].sum()
+    gross_loss = -pnl[pnl < 0].sum()
+    # Aucune perte : profit factor infini (classe en tete), NULL seulement sans gain ni perte
+    profit_factor = gross_profit / gross_loss if gross_loss > 0 else (np.inf if gross_profit > 0 else None)
+    export = dict(parse_export_name(file_path))
+    export.pop('export_hash')
+    export.update({
+        'file_name': os.path.basename(file_path),
+        'digest': file_digest(file_path),
+        'trades': len(pnl),
+        'total_pnl': float(pnl.sum()),
+        'avg_pnl': float(pnl.mean()) if len(pnl) else 0.0,
+        'win_rate': float((pnl > 0).mean() * 100) if len(pnl) else 0.0,
+        'profit_factor': float(profit_factor) if profit_factor is not None else None,
+        'max_drawdown': float(profile['max_drawdown']),
+        'max_drawdown_pct': float(profile['max_drawdown_pct']),
+        'first_exit': str(times[0]).replace('T', ' ') if len(times) else None,
+        'last_exit': str(times[-1]).replace('T', ' ') if len(times) else None
+    })
+
+    # Agregats quotidiens : les jours sont deja tries, un reduceat par colonne
+    unique_days, starts = np.unique(days, return_index=True)
+    daily = {
+        'date': np.datetime_as_string(unique_days),
+        'weekday': weekday[starts],
+        'trades': np.diff(np.append(starts, len(days))),
+        'wins': np.add.reduceat((pnl > 0).astype(np.int64), starts) if len(starts) else np.array([], dtype=np.int64),
+        'total_pnl': np.add.reduceat(pnl, starts) if len(starts) else np.array([]),
+        'total_pnl_pct': np.add.reduceat(pnl_pct, starts) if len(starts) else np.array([])
+    }
+
+    direction = exit_trades['Type'].astype(str).str.split().str[-1].str.lower().to_numpy()
+    trades = {
+        'trade_no': exit_trades['Trade #'].to_numpy(dtype=np.int64),
+        'direction': direction,
+        'exit_time': np.char.replace(np.datetime_as_string(times), 'T', ' '),
+        'exit_date': np.datetime_as_string(days),
+        'weekday': weekday,
+        'hour': (times - days).astype('timedelta64[h]').astype(np.int64),
+        'pnl': pnl,
+        'pnl_pct': pnl_pct
+    }
+    return {'export': export, 'trades': trades, 'daily': daily}
+
+
+def _rows(columns: Dict[str, np.ndarray]) -> Iterator[tuple]:
+    # tolist() convertit en types Python natifs (acceptes par sqlite3) en un seul passage
+    return zip(*(values.tolist() for values in columns.values()))
+
+
+class AnalyticsStore:
+    '''
+    Base SQLite des exports analyses
+
+    Une connexion est ouverte par operation : la base peut etre utilisee depuis
+    plusieurs threads (sessions Streamlit) et plusieurs processus (mode WAL).
+    '''
+
+    def __init__(self, db_path: str = config.ANALYTICS_DB):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        with self.connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(SCHEMA)
+            version = conn.execute('PRAGMA user_version').fetchone()[0]
+            for number, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+                conn.execute(migration)
+                conn.execute(f'PRAGMA user_version = {number}')
+
+    @contextmanager
+    def connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            conn.execute('PRAGMA synchronous=NORMAL')
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def is_current(self, file_path: str, digest: Optional[str] = None) -> bool:
+        '''Vrai si la base contient deja cette version du fichier (meme hash)'''
+        with self.connect() as conn:
+            row = conn.execute('SELECT digest FROM exports WHERE file_name = ?',
+                               (os.path.basename(file_path),)).fetchone()
+        return row is not None and row[0] == (digest or file_digest(file_path))
+
+    def write_export(self, record: Dict[str, Any]) -> int:
+        '''Remplace un export (et ses trades / agregats) en une seule transaction'''
+        export = dict(record['export'], ingested_at=datetime.now().isoformat(timespec='seconds'))
+        with self.connect() as conn:
+            row = conn.execute('SELECT export_id FROM exports WHERE file_name = ?', (export['file_name'],)).fetchone()
+            if row is not None:
+                for table in ('trades', 'daily', 'exports'):
+                    conn.execute(f'DELETE FROM {table} WHERE export_id = ?', row)
+            columns = ', '.join(export)
+            placeholders = ', '.join('?' * len(export))
+            export_id = conn.execute(f'INSERT INTO exports ({columns}) VALUES ({placeholders})',
+                                     tuple(export.values())).lastrowid
+            for table in ('trades', 'daily'):
+                values = record[table]
+                columns = ', '.join(['export_id'] + list(values))
+                placeholders = ', '.join('?' * (len(values) + 1))
+                conn.executemany(f'INSERT INTO {table} ({columns}) VALUES ({placeholders})',
+                                 ((export_id,) + row for row in _rows(values)))
+        return export_id
+
+    def ingest(self, files: Iterable[str], max_workers: Optional[int] = None,
+               force: bool = False) -> Dict[str, Any]:
+        '''
+        Indexe des fichiers XLSX : lecture en parallele, ecriture groupee par fichier
+
+        Les fichiers deja presents avec le meme contenu sont ignores (sauf force=True).
+
+        Returns:
+            Dict: 'ingested', 'skipped', 'rows', 'errors' ({fichier: message}) et 'elapsed'
+        '''
+        start = time.perf_counter()
+        files = list(files)
+        pending = files if force else [f for f in files if not self.is_current(f)]
+        summary = {'ingested': 0, 'skipped': len(files) - len(pending), 'rows': 0, 'errors': {}}
+        for file_path, record, error in iter_parallel(load_export, pending, max_workers):
+            if error is not None:
+                summary['errors'][os.path.basename(file_path)] = error
+                continue
+            try:
+                self.write_export(record)
+            except sqlite3.Error as e:
+                summary['errors'][os.path.basename(file_path)] = f'{type(e).__name__}: {e}'
+                continue
+            summary['ingested'] += 1
+            summary['rows'] += record['export']['trades']
+        summary['elapsed'] = time.perf_counter() - start
+        return summary
+
+    def query(self, sql: str, params: Sequence[Any] = ()) -> pd.DataFrame:
+        with self.connect() as conn:
+            return pd.read_sql_query(sql, conn, params=params)
+
+    def _filters(self, assets: Optional[List[str]], strategies: Optional[List[str]]):
+        clauses, params = [], []
+        for column, values in (('e.asset', assets), ('e.strategy', strategies)):
+            if values:
+                clauses.append(f'{column} IN ({", ".join("?" * len(values))})')
+                params.extend(values)
+        return (' WHERE ' + ' AND '.join(clauses)) if clauses else '', params
+
+    def exports(self, assets: Optional[List[str]] = None, strategies: Optional[List[str]] = None) -> pd.DataFrame:
+        '''Resume de chaque export (une ligne par fichier)'''
+        where, params = self._filters(assets, strategies)
+        return self.query(f'SELECT e.* FROM exports e{where} ORDER BY e.total_pnl DESC', params)
+
+    def weekday_summary(self, assets: Optional[List[str]] = None,
+                        strategies: Optional[List[str]] = None) -> pd.DataFrame:
+        '''P&L, trades et win rate par actif et jour de la semaine, tous exports confondus'''
+        where, params = self._filters(assets, strategies)
+        result = self.query(f'''
+            SELECT e.asset AS Asset, d.weekday AS Weekday_Index, SUM(d.trades) AS Trades,
+                   SUM(d.total_pnl) AS Total_PnL, 100.0 * SUM(d.wins) / SUM(d.trades) AS Win_Rate
+            FROM daily d JOIN exports e ON e.export_id = d.export_id{where}
+            GROUP BY e.asset, d.weekday
+            ORDER BY e.asset, d.weekday
+        ''', params)
+        result.insert(1, 'Weekday', result['Weekday_Index'].map(dict(enumerate(WEEKDAYS))))
+        return result
+
+    def daily_pnl(self, export_ids: Sequence[int]) -> pd.DataFrame:
+        '''P&L quotidien et cumule des exports demandes'''
+        if not export_ids:
+            return pd.DataFrame(columns=['export_id', 'date', 'total_pnl', 'cumulative_pnl'])
+        result = self.query(f'''
+            SELECT export_id, date, total_pnl,
+                   SUM(total_pnl) OVER (PARTITION BY export_id ORDER BY date) AS cumulative_pnl
+            FROM daily WHERE export_id IN ({", ".join("?" * len(export_ids))})
+            ORDER BY export_id, date
+        ''', list(export_ids))
+        result['date'] = pd.to_datetime(result['date'])
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        with self.connect() as conn:
+            exports, trades = conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(trades), 0) FROM exports').fetchone()
+        return {'exports': exports, 'trades': trades,
+                'bytes': os.path.getsize(self.db_path) if os.path.exists(self.db_path) else 0}
+
+    def remove(self, file_name: str) -> None:
+        with self.connect() as conn:
+            row = conn.execute('SELECT export_id FROM exports WHERE file_name = ?', (file_name,)).fetchone()
+            if row is not None:
+                for table in ('trades', 'daily', 'exports'):
+                    conn.execute(f'DELETE FROM {table} WHERE export_id = ?', row)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Base analytique SQLite des exports TradingView')
+    parser.add_argument('directory', nargs='?', default=config.BACKTEST_DIR, help='Dossier contenant les fichiers XLSX')
+    parser.add_argument('--db', default=config.ANALYTICS_DB, help='Fichier SQLite')
+    parser.add_argument('--jobs', type=int, default=config.MAX_WORKERS, help='Nombre de processus')
+    parser.add_argument('--force', action='store_true', help='Reindexer les fichiers deja presents')
+    parser.add_argument('--sql', help="Requete a executer apres l'indexation")
+    args = parser.parse_args()
+
+    store = AnalyticsStore(args.db)
+    if os.path.isdir(args.directory):
+        xlsx_files = [os.path.join(args.directory, f) for f in sorted(os.listdir(args.directory))
+                      if f.endswith('.xlsx') and not f.startswith('~$')]
+        summary = store.ingest(xlsx_files, args.jobs, args.force)
+        for file_name, error in summary['errors'].items():
+            print(f'ERREUR {file_name}: {error}')
+        print(f'{summary["ingested"]} fichiers indexes ({summary["rows"]} trades), {summary["skipped"]} inchanges, '
+              f'{len(summary["errors"])} erreurs en {summary["elapsed"]:.1f}s')
+    else:
+        print(f'Dossier non trouve - {args.directory} (aucune indexation)')
+
+    stats = store.stats()
+    print(f'Base {args.db}: {stats["exports"]} exports, {stats["trades"]} trades, {stats["bytes"] / 1024**2:.1f} Mo')
+    if args.sql:
+        print(store.query(args.sql).to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,224 @@
+# Fonctions d'analyse des backtests TradingView utilisées par le dashboard
+import pandas as pd
+import os
+import numpy as np
+from data_extractor import TradingViewDataExtractor
+from aggregation import TradeCube
+from drawdown import drawdown_kernel, batch_drawdown_summary
+from trade_frame import compact_trades
+from significance import weekday_pvalues
+from export_metadata import parse_export_name
+from instrumentation import traced
+import config
+
+# Colonnes de la feuille 'List of trades' utilisées par les analyses
+TRADE_COLUMNS = ['Trade #', 'Type', 'Date and time', 'Net P&L JPY', 'Net P&L %']
+
+# Fonction pour extraire le nom de l'actif du nom de fichier
+def extract_asset_name(filename):
+    """Extrait le nom de l'actif depuis le nom du fichier"""
+    # Nom d'export TradingView reconnu (..._COURTIER_ACTIF_date_hash)
+    metadata = parse_export_name(filename)
+    if metadata['export_date'] and metadata['asset']:
+        return metadata['asset']
+    
+    asset_name = "INCONNU"
+    if "_" in filename:
+        parts = filename.split("_")
+        for part in parts:
+            # Chercher le code actif (GBPJPY, EURUSD, etc.)
+            if len(part) == 6 and part.isupper() and any(c.isalpha() for c in part):
+                asset_name = part
+                break
+    return asset_name
+
+# Fonction pour calculer le drawdown
+@traced()
+def calculate_drawdown_analysis(trades_df):
+    """Calcule l'analyse détaillée du drawdown (tableaux compacts, sans copie des trades)"""
+    try:
+        times = trades_df['Date and time'].to_numpy()
+        order = np.argsort(times, kind='stable')
+        times = times[order]
+        pnl = trades_df['Net P&L JPY'].to_numpy(dtype=float)[order]
+        return build_drawdown_info(times, drawdown_kernel(pnl, times))
+    except Exception as e:
+        return None
+
+def build_drawdown_info(times, profile):
+    """Met en forme le résultat du noyau de drawdown pour le dashboard"""
+    # Courbes uniquement : le P&L par trade et le plus haut courant
+    # (Cumulative_PnL - Drawdown_Absolute) ne sont pas dupliqués
+    drawdown_data = pd.DataFrame({
+        'Date and time': times,
+        'Cumulative_PnL': profile['equity'],
+        'Drawdown_Absolute': profile['drawdown'],
+        'Drawdown_Percentage': profile['drawdown_pct']
+    })
+    
+    return {
+        'drawdown_data': drawdown_data,
+        'max_drawdown_absolute': profile['max_drawdown'],
+        'max_drawdown_percentage': profile['max_drawdown_pct'],
+        'current_drawdown': profile['current_drawdown'],
+        'current_drawdown_pct': profile['current_drawdown_pct'],
+        'longest_underwater_trades': profile['longest_underwater_trades'],
+        'longest_underwater_duration': profile['longest_underwater_duration'],
+        'max_drawdown_recovery_time': profile['max_drawdown_recovery_time'],
+        'drawdown_episodes': profile['episodes']
+    }
+
+# Classement de toutes les stratégies par drawdown (calcul groupé, sans pandas par fichier)
+@traced()
+def drawdown_ranking(complete_analyses):
+    """Résumé equity/drawdown de chaque analyse, trié du pire au meilleur drawdown max"""
+    names, pnl_series, times = [], [], []
+    for analysis in complete_analyses:
+        drawdown_info = analysis.get('drawdown_info')
+        if not drawdown_info:
+            continue
+        drawdown_data = drawdown_info['drawdown_data']
+        names.append(analysis['asset_name'])
+        pnl_series.append(np.diff(drawdown_data['Cumulative_PnL'].to_numpy(), prepend=0.0))
+        times.append(drawdown_data['Date and time'].to_numpy())
+    
+    ranking = batch_drawdown_summary(pnl_series, names, times)
+    return ranking.sort_values('Max_Drawdown', kind='stable').reset_index()
+
+# Fonction de chargement commune (une seule lecture XLSX par fichier)
+@traced()
+def load_exit_trades(file_path, compact=True):
+    """Charge et filtre les trades de sortie d'un fichier XLSX (types compacts par défaut)"""
+    with TradingViewDataExtractor(file_path) as extractor:
+        trades_df = extractor.load_trades(usecols=TRADE_COLUMNS)
+    return exit_rows(trades_df, compact)
+
+@traced()
+def exit_rows(trades_df, compact=True):
+    """Lignes Exit de la liste des trades (dates converties), quelle que soit la source (XLSX, CSV, Parquet)"""
+    exit_trades = trades_df[trades_df['Type'].str.contains('Exit')].copy()
+    exit_trades['Date and time'] = pd.to_datetime(exit_trades['Date and time'])
+    return compact_trades(exit_trades) if compact else exit_trades
+
+# Fonction d'analyse complète
+@traced()
+def analyze_xlsx_file_complete(file_path, exit_trades=None, cube=None, drawdown_info=None):
+    """Analyse complète d'un fichier XLSX (réutilise exit_trades / cube / drawdown si déjà calculés)"""
+    if exit_trades is None:
+        exit_trades = load_exit_trades(file_path)
+    if cube is None:
+        cube = TradeCube(exit_trades)
+    asset_name = extract_asset_name(os.path.basename(file_path))
+    
+    if drawdown_info is None:
+        drawdown_info = calculate_drawdown_analysis(exit_trades)
+    
+    # ANALYSE SPÉCIFIQUE POUR OPTIMISATION PAR ACTIF/MOIS
+    month_weekday = cube.rollup(['Month_Name', 'Weekday'])
+    optimal_daily_analysis = month_weekday[[
+        'Month_Name', 'Weekday', 'Total_PnL_JPY', 'Avg_PnL_JPY', 'Trade_Count', 'Std_PnL_JPY',
+        'Total_PnL_Pct', 'Avg_PnL_Pct', 'Std_PnL_Pct', 'Win_Rate'
+    ]]
+    optimal_daily_analysis.columns = ['Mois', 'Jour_Semaine', 'Total_PnL_JPY', 'Moyenne_PnL_JPY', 'Nb_Trades', 'Std_PnL_JPY', 'Total_PnL_Pct', 'Moyenne_PnL_Pct', 'Std_PnL_Pct', 'Win_Rate']
+    
+    best_day_per_month = None
+    if not optimal_daily_analysis.empty:
+        best_day_per_month = optimal_daily_analysis.loc[optimal_daily_analysis.groupby('Mois')['Total_PnL_JPY'].idxmax()]
+    
+    # ANALYSES STANDARD
+    daily_analysis = cube.rollup(['Date'])[[
+        'Date', 'Total_PnL_JPY', 'Avg_PnL_JPY', 'Trade_Count', 'Total_PnL_Pct', 'Avg_PnL_Pct', 'Win_Rate'
+    ]]
+    
+    monthly_analysis = cube.rollup(['Month_Period'])[[
+        'Month_Period', 'Total_PnL_JPY', 'Avg_PnL_JPY', 'Std_PnL_JPY', 'Trade_Count',
+        'Total_PnL_Pct', 'Avg_PnL_Pct', 'Std_PnL_Pct', 'Win_Rate'
+    ]].rename(columns={'Month_Period': 'Month'})
+    
+    direction_counts = cube.direction_counts()
+    long_trades = int(direction_counts.get('long', 0))
+    short_trades = int(direction_counts.get('short', 0))
+    total_trades = len(exit_trades)
+    bias_stats = {
+        'long_trades': long_trades,
+        'short_trades': short_trades,
+        'total_trades': total_trades,
+        'long_percentage': (long_trades / total_trades * 100) if total_trades > 0 else 0,
+        'short_percentage': (short_trades / total_trades * 100) if total_trades > 0 else 0,
+        'asset_name': asset_name
+    }
+    bias_df = pd.DataFrame([bias_stats])
+    
+    # Même regroupement Mois x Jour que l'analyse d'optimisation, sans nouveau passage sur les trades
+    weekly_analysis = month_weekday[[
+        'Month_Name', 'Weekday', 'Avg_PnL_JPY', 'Std_PnL_JPY', 'Trade_Count', 'Avg_PnL_Pct', 'Std_PnL_Pct', 'Win_Rate'
+    ]].rename(columns={'Month_Name': 'Month'})
+    
+    totals = cube.totals()
+    return {
+        'daily_analysis': daily_analysis,
+        'monthly_analysis': monthly_analysis,
+        'bias_analysis': bias_df,
+        'weekly_analysis': weekly_analysis,
+        'drawdown_info': drawdown_info,
+        'optimal_daily_analysis': optimal_daily_analysis,
+        'best_day_per_month': best_day_per_month,
+        'asset_name': asset_name,
+        'total_pnl': daily_analysis['Total_PnL_JPY'].sum() if not daily_analysis.empty else 0,
+        'total_trades': total_trades,
+        'win_rate_global': totals['Wins'] / total_trades * 100 if total_trades > 0 else 0
+    }
+
+# p-values du tableau de vérité, calculées à la demande (indépendantes des autres analyses)
+@traced()
+def weekday_significance(file_path, n_permutations=config.SIGNIFICANCE_PERMUTATIONS):
+    """p-values par jour de la semaine d'un fichier : {jour: {'p_value_pnl', 'p_value_wins'}}"""
+    exit_trades = load_exit_trades(file_path)
+    return weekday_pvalues(exit_trades, n_permutations=n_permutations)
+
+# Fonction pour analyse du tableau de vérité
+@traced()
+def analyze_single_file_truth(file_path, exit_trades=None, cube=None, significance=config.SIGNIFICANCE_ON_ANALYSIS):
+    """
+    Analyse pour le tableau de vérité (réutilise exit_trades / cube si déjà calculés)
+
+    Le test de permutation (colonnes P_Value, P_Value_WR, Significatif) n'est
+    calculé qu'avec significance=True : le dashboard le demande à la volée via
+    weekday_significance() quand les cellules significatives sont affichées.
+    """
+    if exit_trades is None:
+        exit_trades = load_exit_trades(file_path)
+    if cube is None:
+        cube = TradeCube(exit_trades)
+    asset_name = extract_asset_name(os.path.basename(file_path))
+    
+    weekday_analysis = cube.rollup(['Weekday'])[[
+        'Weekday', 'Total_PnL_JPY', 'Avg_PnL_JPY', 'Trade_Count', 'Total_PnL_Pct', 'Avg_PnL_Pct',
+        'Win_Rate', 'Long_Percentage'
+    ]]
+    weekday_analysis.columns = ['Jour_Semaine', 'Total_PnL_JPY', 'Moyenne_PnL_JPY', 'Nb_Trades', 'Total_PnL_Pct', 'Moyenne_PnL_Pct', 'Win_Rate', 'Pourcentage_Long']
+    weekday_analysis.insert(7, 'Est_Rentable', weekday_analysis['Total_PnL_JPY'] > config.TRUTH_PNL_THRESHOLD)
+    weekday_analysis.insert(8, 'Qualite_Signal', weekday_analysis['Win_Rate'] > config.TRUTH_WIN_RATE_THRESHOLD)
+    
+    # Significativité : test de permutation des jours (P&L total et nombre de gagnants)
+    if significance:
+        pvalues = weekday_pvalues(exit_trades)
+        weekday_analysis['P_Value'] = weekday_analysis['Jour_Semaine'].map(lambda day: pvalues[day]['p_value_pnl'])
+        weekday_analysis['P_Value_WR'] = weekday_analysis['Jour_Semaine'].map(lambda day: pvalues[day]['p_value_wins'])
+        weekday_analysis['Significatif'] = weekday_analysis['P_Value'] < 1 - config.CONFIDENCE_LEVEL
+    
+    days_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+    weekday_analysis['Day_Order'] = weekday_analysis['Jour_Semaine'].apply(
+        lambda x: days_order.index(x) if x in days_order else 7
+    )
+    weekday_analysis = weekday_analysis.sort_values('Day_Order')
+    weekday_analysis = weekday_analysis.drop('Day_Order', axis=1)
+    
+    totals = cube.totals()
+    return {
+        'asset_name': asset_name,
+        'weekday_analysis': weekday_analysis,
+        'total_pnl': totals['Sum'],
+        'total_trades': len(exit_trades),
+        'win_rate_global': totals['Wins'] / len(exit_trades) * 100 if len(exit_trades) > 0 else 0
+    }
@@ -2,10 +2,28 @@
 import streamlit as st
 import pandas as pd
 import os
+import time
+from collections import OrderedDict
 from datetime import datetime
 import numpy as np
 import plotly.graph_objects as go
 import plotly.express as px
+import config
+from parallel_analysis import iter_analyses, iter_significance
+from backtest_analysis import drawdown_ranking
+from portfolio import portfolio_from_analyses
+from monte_carlo import METHODS, run_monte_carlo
+from rolling_metrics import RollingPrefix
+from analytics_store import AnalyticsStore
+from variant_index import VariantIndex
+from analysis_results import AnalysisSet
+from instrumentation import Trace, trace_frame
+from truth_table import stack_weekday_stats, classify, truth_matrix, with_pvalues
+from figures import (line_trace, payload_caption, equity_figure, monthly_figure, heatmap_figure, pnl_histogram,
+                     drawdown_figure, portfolio_figure, contribution_figure, rolling_figure)
+from result_cache import ResultCache
+from trades_cache import file_digest
+from trade_frame import memory_report
 
 # Configuration de la page
 st.set_page_config(
@@ -14,190 +32,25 @@ st.set_page_config(
     page_icon="📊"
 )
 
-# Titre de l'application
-st.title("📊 Dashboard d'Analyse de Backtest TradingView")
+# Cache des résultats partagé par toutes les sessions du serveur (clé = hash du fichier)
+@st.cache_resource
+def get_result_cache():
+    return ResultCache(config.RESULT_CACHE_MAX_BYTES)
 
-# Sidebar pour les paramètres
-st.sidebar.header("📁 Sélection des fichiers")
+result_cache = get_result_cache()
 
-# Fonction pour extraire le nom de l'actif du nom de fichier
-def extract_asset_name(filename):
-    """Extrait le nom de l'actif depuis le nom du fichier"""
-    asset_name = "INCONNU"
-    if "_" in filename:
-        parts = filename.split("_")
-        for part in parts:
-            # Chercher le code actif (GBPJPY, EURUSD, etc.)
-            if len(part) == 6 and part.isupper() and any(c.isalpha() for c in part):
-                asset_name = part
-                break
-    return asset_name
+# Base analytique SQLite (trades et agrégats de tous les exports indexés)
+@st.cache_resource
+def get_analytics_store():
+    return AnalyticsStore(config.ANALYTICS_DB)
 
-# Fonction pour calculer le drawdown
-def calculate_drawdown_analysis(trades_df):
-    """Calcule l'analyse détaillée du drawdown"""
-    try:
-        df_sorted = trades_df.sort_values('Date and time').copy()
-        df_sorted['Cumulative_PnL'] = df_sorted['Net P&L JPY'].cumsum()
-        df_sorted['Running_Max'] = df_sorted['Cumulative_PnL'].expanding().max()
-        df_sorted['Drawdown_Absolute'] = df_sorted['Cumulative_PnL'] - df_sorted['Running_Max']
-        df_sorted['Drawdown_Percentage'] = (df_sorted['Drawdown_Absolute'] / df_sorted['Running_Max'].replace(0, np.nan)) * 100
-        max_drawdown_abs = df_sorted['Drawdown_Absolute'].min()
-        max_drawdown_pct = df_sorted['Drawdown_Percentage'].min()
-        
-        return {
-            'drawdown_data': df_sorted,
-            'max_drawdown_absolute': max_drawdown_abs,
-            'max_drawdown_percentage': max_drawdown_pct,
-            'current_drawdown': df_sorted['Drawdown_Absolute'].iloc[-1],
-            'current_drawdown_pct': df_sorted['Drawdown_Percentage'].iloc[-1]
-        }
-    except Exception as e:
-        return None
+analytics_store = get_analytics_store()
 
-# Fonction d'analyse complète
-def analyze_xlsx_file_complete(file_path):
-    """Analyse complète d'un fichier XLSX"""
-    try:
-        trades_df = pd.read_excel(file_path, sheet_name='List of trades')
-        exit_trades = trades_df[trades_df['Type'].str.contains('Exit')].copy()
-        exit_trades['Date and time'] = pd.to_datetime(exit_trades['Date and time'])
-        asset_name = extract_asset_name(os.path.basename(file_path))
-        
-        drawdown_info = calculate_drawdown_analysis(exit_trades)
-        
-        # ANALYSE SPÉCIFIQUE POUR OPTIMISATION PAR ACTIF/MOIS
-        exit_trades['Year'] = exit_trades['Date and time'].dt.year
-        exit_trades['Month'] = exit_trades['Date and time'].dt.month
-        exit_trades['Month_Name'] = exit_trades['Date and time'].dt.month_name()
-        exit_trades['Weekday'] = exit_trades['Date and time'].dt.day_name()
-        exit_trades['Day_of_Week'] = exit_trades['Date and time'].dt.dayofweek
-        
-        optimal_daily_analysis = exit_trades.groupby(['Month_Name', 'Weekday']).agg({
-            'Net P&L JPY': ['sum', 'mean', 'count', 'std'],
-            'Net P&L %': ['sum', 'mean', 'std']
-        }).reset_index()
-        optimal_daily_analysis.columns = ['Mois', 'Jour_Semaine', 'Total_PnL_JPY', 'Moyenne_PnL_JPY', 'Nb_Trades', 'Std_PnL_JPY', 'Total_PnL_Pct', 'Moyenne_PnL_Pct', 'Std_PnL_Pct']
-        
-        exit_trades['Win'] = exit_trades['Net P&L JPY'] > 0
-        winrate_analysis = exit_trades.groupby(['Month_Name', 'Weekday'])['Win'].apply(lambda x: x.sum() / len(x) * 100 if len(x) > 0 else 0).reset_index()
-        winrate_analysis.columns = ['Mois', 'Jour_Semaine', 'Win_Rate']
-        
-        optimal_daily_analysis = pd.merge(optimal_daily_analysis, winrate_analysis, on=['Mois', 'Jour_Semaine'])
-        best_day_per_month = None
-        if not optimal_daily_analysis.empty:
-            best_day_per_month = optimal_daily_analysis.loc[optimal_daily_analysis.groupby('Mois')['Total_PnL_JPY'].idxmax()]
-        
-        # ANALYSES STANDARD
-        exit_trades['Date'] = exit_trades['Date and time'].dt.date
-        daily_analysis = exit_trades.groupby('Date').agg({
-            'Net P&L JPY': ['sum', 'mean', 'count'],
-            'Net P&L %': ['sum', 'mean']
-        }).reset_index()
-        daily_analysis.columns = ['Date', 'Total_PnL_JPY', 'Avg_PnL_JPY', 'Trade_Count', 'Total_PnL_Pct', 'Avg_PnL_Pct']
-        
-        daily_winrate = exit_trades.groupby('Date')['Win'].apply(lambda x: x.sum() / len(x) * 100).reset_index()
-        daily_winrate.columns = ['Date', 'Win_Rate']
-        daily_analysis = pd.merge(daily_analysis, daily_winrate, on='Date')
-        
-        exit_trades['Month_Period'] = exit_trades['Date and time'].dt.to_period('M')
-        monthly_analysis = exit_trades.groupby('Month_Period').agg({
-            'Net P&L JPY': ['sum', 'mean', 'std', 'count'],
-            'Net P&L %': ['sum', 'mean', 'std']
-        }).reset_index()
-        monthly_analysis.columns = ['Month', 'Total_PnL_JPY', 'Avg_PnL_JPY', 'Std_PnL_JPY', 'Trade_Count', 'Total_PnL_Pct', 'Avg_PnL_Pct', 'Std_PnL_Pct']
-        
-        monthly_winrate = exit_trades.groupby('Month_Period')['Win'].apply(lambda x: x.sum() / len(x) * 100).reset_index()
-        monthly_winrate.columns = ['Month', 'Win_Rate']
-        monthly_analysis = pd.merge(monthly_analysis, monthly_winrate, on='Month')
-        
-        long_trades = len(exit_trades[exit_trades['Type'].str.contains('long', case=False)])
-        short_trades = len(exit_trades[exit_trades['Type'].str.contains('short', case=False)])
-        total_trades = len(exit_trades)
-        bias_stats = {
-            'long_trades': long_trades,
-            'short_trades': short_trades,
-            'total_trades': total_trades,
-            'long_percentage': (long_trades / total_trades * 100) if total_trades > 0 else 0,
-            'short_percentage': (short_trades / total_trades * 100) if total_trades > 0 else 0,
-            'asset_name': asset_name
-        }
-        bias_df = pd.DataFrame([bias_stats])
-        
-        weekly_analysis = exit_trades.groupby(['Month_Name', 'Weekday']).agg({
-            'Net P&L JPY': ['mean', 'std', 'count'],
-            'Net P&L %': ['mean', 'std']
-        }).reset_index()
-        weekly_analysis.columns = ['Month', 'Weekday', 'Avg_PnL_JPY', 'Std_PnL_JPY', 'Trade_Count', 'Avg_PnL_Pct', 'Std_PnL_Pct']
-        
-        weekly_winrate = exit_trades.groupby(['Month_Name', 'Weekday'])['Win'].apply(lambda x: x.sum() / len(x) * 100 if len(x) > 0 else 0).reset_index()
-        weekly_winrate.columns = ['Month', 'Weekday', 'Win_Rate']
-        weekly_analysis = pd.merge(weekly_analysis, weekly_winrate, on=['Month', 'Weekday'])
-        
-        return {
-            'daily_analysis': daily_analysis,
-            'monthly_analysis': monthly_analysis,
-            'bias_analysis': bias_df,
-            'weekly_analysis': weekly_analysis,
-            'drawdown_info': drawdown_info,
-            'optimal_daily_analysis': optimal_daily_analysis,
-            'best_day_per_month': best_day_per_month,
-            'asset_name': asset_name,
-            'total_pnl': daily_analysis['Total_PnL_JPY'].sum() if not daily_analysis.empty else 0,
-            'total_trades': total_trades,
-            'win_rate_global': (exit_trades['Net P&L JPY'] > 0).sum() / total_trades * 100 if total_trades > 0 else 0
-        }
-    except Exception as e:
-        st.error(f"Erreur lors de l'analyse du fichier {file_path}: {e}")
-        return None
+# Titre de l'application
+st.title("📊 Dashboard d'Analyse de Backtest TradingView")
 
-# Fonction pour analyse du tableau de vérité
-def analyze_single_file_truth(file_path):
-    """Analyse pour le tableau de vérité"""
-    try:
-        trades_df = pd.read_excel(file_path, sheet_name='List of trades')
-        exit_trades = trades_df[trades_df['Type'].str.contains('Exit')].copy()
-        exit_trades['Date and time'] = pd.to_datetime(exit_trades['Date and time'])
-        asset_name = extract_asset_name(os.path.basename(file_path))
-        
-        exit_trades['Weekday'] = exit_trades['Date and time'].dt.day_name()
-        weekday_analysis = exit_trades.groupby('Weekday').agg({
-            'Net P&L JPY': ['sum', 'mean', 'count'],
-            'Net P&L %': ['sum', 'mean']
-        }).reset_index()
-        weekday_analysis.columns = ['Jour_Semaine', 'Total_PnL_JPY', 'Moyenne_PnL_JPY', 'Nb_Trades', 'Total_PnL_Pct', 'Moyenne_PnL_Pct']
-        
-        exit_trades['Win'] = exit_trades['Net P&L JPY'] > 0
-        winrate_analysis = exit_trades.groupby('Weekday')['Win'].apply(lambda x: x.sum() / len(x) * 100 if len(x) > 0 else 0).reset_index()
-        winrate_analysis.columns = ['Jour_Semaine', 'Win_Rate']
-        
-        weekday_analysis = pd.merge(weekday_analysis, winrate_analysis, on='Jour_Semaine')
-        weekday_analysis['Est_Rentable'] = weekday_analysis['Total_PnL_JPY'] > 0
-        weekday_analysis['Qualite_Signal'] = weekday_analysis['Win_Rate'] > 50
-        
-        long_analysis = exit_trades.groupby('Weekday')['Type'].apply(
-            lambda x: (x.str.contains('long', case=False)).sum() / len(x) * 100 if len(x) > 0 else 0
-        ).reset_index()
-        long_analysis.columns = ['Jour_Semaine', 'Pourcentage_Long']
-        weekday_analysis = pd.merge(weekday_analysis, long_analysis, on='Jour_Semaine')
-        
-        days_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-        weekday_analysis['Day_Order'] = weekday_analysis['Jour_Semaine'].apply(
-            lambda x: days_order.index(x) if x in days_order else 7
-        )
-        weekday_analysis = weekday_analysis.sort_values('Day_Order')
-        weekday_analysis = weekday_analysis.drop('Day_Order', axis=1)
-        
-        return {
-            'asset_name': asset_name,
-            'weekday_analysis': weekday_analysis,
-            'total_pnl': exit_trades['Net P&L JPY'].sum(),
-            'total_trades': len(exit_trades),
-            'win_rate_global': (exit_trades['Net P&L JPY'] > 0).sum() / len(exit_trades) * 100 if len(exit_trades) > 0 else 0
-        }
-    except Exception as e:
-        st.error(f"Erreur lors de l'analyse du fichier {file_path}: {e}")
-        return None
+# Sidebar pour les paramètres
+st.sidebar.header("📁 Sélection des fichiers")
 
 # Rechercher les fichiers XLSX disponibles
 xlsx_files = [f for f in os.listdir('.') if f.endswith('.xlsx')]
@@ -222,454 +75,782 @@ if xlsx_files:
         if len(selected_files) > 3:
             st.sidebar.info(f"... et {len(selected_files) - 3} autres")
     
+    max_workers = st.sidebar.number_input(
+        'Processus parallèles:',
+        min_value=1,
+        max_value=max(1, config.MAX_WORKERS),
+        value=max(1, config.MAX_WORKERS)
+    )
+    
+    incremental_mode = st.sidebar.checkbox(
+        'Mode incrémental (ne traiter que les nouveaux trades)',
+        value=config.INCREMENTAL_MODE,
+        help="Réutilise l'état sauvegardé lors de l'analyse d'un export précédent de la même stratégie"
+    )
+    
+    trace_memory = st.sidebar.checkbox(
+        'Mesurer la mémoire par étape (tracemalloc, plus lent)',
+        value=config.INSTRUMENTATION_MEMORY,
+        disabled=not config.INSTRUMENTATION,
+        help="Ajoute le pic mémoire de chaque étape au profil des fichiers analysés"
+    )
+    
     analyze_button = st.sidebar.button('🔍 Analyser les fichiers sélectionnés', type="primary")
     
     if analyze_button:
         if selected_files:
             with st.spinner(f'Analyse de {len(selected_files)} fichiers en cours...'):
-                complete_analyses = []
-                truth_analyses = []
+                results = {}
+                load_time = 0.0
+                analysis_time = 0.0
+                incremental_files = 0
+                new_trades = 0
+                start = time.perf_counter()
                 
+                # Résultats déjà calculés (par cette session ou une autre) pour le même contenu
+                cache_keys = {file: (file_digest(file), os.path.basename(file)) for file in selected_files}
+                to_analyze = []
+                for file in selected_files:
+                    cached = result_cache.get(cache_keys[file])
+                    if cached is not None:
+                        results[file] = cached
+                    else:
+                        to_analyze.append(file)
+                
+                # Chaque fichier est lu une seule fois et analysé dans un processus du pool;
+                # la progression suit l'ordre de fin de traitement
                 progress_bar = st.progress(0)
-                for i, file in enumerate(selected_files):
-                    complete_analysis = analyze_xlsx_file_complete(file)
-                    if complete_analysis:
-                        complete_analyses.append(complete_analysis)
-                    
-                    truth_analysis = analyze_single_file_truth(file)
-                    if truth_analysis:
-                        truth_analyses.append(truth_analysis)
-                    
-                    progress_bar.progress((i + 1) / len(selected_files))
+                for done, result in enumerate(iter_analyses(to_analyze, int(max_workers), incremental_mode, trace_memory),
+                                               start=len(results) + 1):
+                    if result['error'] is not None:
+                        st.error(f"Erreur lors de l'analyse du fichier {result['file']}: {result['error']}")
+                    else:
+                        results[result['file']] = result
+                        result_cache.put(cache_keys[result['file']], {
+                            'complete': result['complete'], 'truth': result['truth'], 'memory': result['memory'],
+                            'trace': result['trace']
+                        })
+                        load_time += result['load_time']
+                        analysis_time += result['analysis_time']
+                        if result['incremental'] is not None and result['incremental']['mode'] == 'incremental':
+                            incremental_files += 1
+                            new_trades += result['incremental']['new_trades']
+                    progress_bar.progress(done / len(selected_files), text=f"{os.path.basename(result['file'])} ({done}/{len(selected_files)})")
+                
+                # Conserver l'ordre de sélection pour l'affichage (un résultat par couple actif / fichier)
+                analyses = AnalysisSet.from_results([
+                    dict(results[file], file=file) for file in selected_files if file in results
+                ])
+                st.session_state['memory_report'] = memory_report(analyses.memory_reports())
                 
-                if complete_analyses:
+                st.session_state['analysis_timings'] = {
+                    'files': len(selected_files),
+                    'cached_files': len(selected_files) - len(to_analyze),
+                    'workers': int(max_workers),
+                    'load_time': load_time,
+                    'analysis_time': analysis_time,
+                    'wall_time': time.perf_counter() - start,
+                    'incremental_files': incremental_files,
+                    'new_trades': new_trades
+                }
+                
+                if len(analyses):
                     st.session_state['complete_analysis_complete'] = True
-                    st.session_state['complete_analyses'] = complete_analyses
-                    st.session_state['truth_analyses'] = truth_analyses
-                    st.success(f"Analyse de {len(complete_analyses)} actifs terminée!")
+                    st.session_state['analyses'] = analyses
+                    st.session_state['figure_cache'] = OrderedDict()
+                    st.success(f"Analyse de {len(analyses)} actifs terminée!")
                 else:
                     st.error("Impossible d'analyser les fichiers - vérifiez que les fichiers sont valides")
         else:
             st.warning("Veuillez sélectionner au moins un fichier")
+    
+    # Indexation de tous les exports du dossier (seuls les fichiers nouveaux ou modifiés sont relus)
+    if st.sidebar.button("🗄️ Indexer les fichiers dans la base"):
+        with st.spinner(f"Indexation de {len(xlsx_files)} fichiers..."):
+            ingestion = analytics_store.ingest(xlsx_files, int(max_workers))
+        for file_name, error in ingestion['errors'].items():
+            st.sidebar.error(f"{file_name}: {error}")
+        st.sidebar.success(
+            f"{ingestion['ingested']} fichiers indexés ({ingestion['rows']} trades), "
+            f"{ingestion['skipped']} inchangés en {ingestion['elapsed']:.1f}s"
+        )
 else:
     st.warning('Aucun fichier XLSX trouvé dans le dossier')
 
-# Afficher les résultats si l'analyse est lancée
-if 'complete_analysis_complete' in st.session_state and st.session_state['complete_analysis_complete']:
-    complete_analyses = st.session_state['complete_analyses']
-    truth_analyses = st.session_state['truth_analyses']
+# Temps de chargement / analyse de la dernière exécution
+if 'analysis_timings' in st.session_state:
+    timings = st.session_state['analysis_timings']
+    st.sidebar.caption(
+        f"⏱️ {timings['files']} fichiers - Chargement XLSX: {timings['load_time']:.2f}s "
+        f"(1 lecture/fichier) | Analyse: {timings['analysis_time']:.2f}s | "
+        f"Durée totale: {timings['wall_time']:.2f}s ({timings['workers']} processus)"
+    )
+    if timings.get('cached_files'):
+        st.sidebar.caption(f"🗃️ {timings['cached_files']} fichiers servis depuis le cache des résultats")
+    if timings.get('incremental_files'):
+        st.sidebar.caption(
+            f"♻️ {timings['incremental_files']} fichiers mis à jour en mode incrémental "
+            f"({timings['new_trades']} nouveaux trades)"
+        )
+
+# Mémoire occupée par fichier (trades bruts / compacts et résultats conservés)
+if 'memory_report' in st.session_state and not st.session_state['memory_report'].empty:
+    with st.sidebar.expander("💾 Mémoire par fichier"):
+        st.dataframe(st.session_state['memory_report'].round(2), hide_index=True)
+
+# Profil par étape de chaque fichier (temps, CPU et pic mémoire mesurés pendant l'analyse)
+analysis_traces = st.session_state['analyses'].traces() if 'analyses' in st.session_state else {}
+if analysis_traces:
+    with st.sidebar.expander("⏱️ Profil par étape"):
+        trace_label = st.selectbox("Fichier:", list(analysis_traces), key='trace_file')
+        file_trace = analysis_traces[trace_label]
+        st.caption(f"{file_trace['name']} - {file_trace['wall_s'] * 1000:.0f} ms "
+                   f"(CPU {file_trace['cpu_s'] * 1000:.0f} ms), analysé le {file_trace['started']}")
+        st.dataframe(trace_frame(file_trace).round(2), hide_index=True)
+
+# Statistiques du cache des résultats (communes à toutes les sessions)
+cache_stats = result_cache.stats()
+st.sidebar.caption(
+    f"🗃️ Cache résultats: {cache_stats['hits']} hits / {cache_stats['misses']} misses / "
+    f"{cache_stats['evictions']} évictions - {cache_stats['entries']} entrées, "
+    f"{cache_stats['bytes'] / 1024**2:.1f} / {cache_stats['max_bytes'] / 1024**2:.0f} Mo"
+)
+
+# Nombre maximum de points par courbe envoyés au navigateur (0 = tous)
+chart_max_points = st.sidebar.select_slider(
+    'Points max par courbe:',
+    options=[500, 1000, 2000, 5000, 20000, 0],
+    value=config.CHART_MAX_POINTS,
+    format_func=lambda n: "Tous" if n == 0 else f"{n:,}".replace(',', ' ')
+)
+
+# Seuils du tableau de vérité : la reclassification repart des statistiques déjà calculées
+with st.sidebar.expander("📋 Seuils du tableau de vérité"):
+    truth_win_rate = st.slider("Win rate minimum (%)", 0.0, 100.0, config.TRUTH_WIN_RATE_THRESHOLD, 1.0)
+    truth_pnl = st.number_input("P&L minimum (JPY)", value=config.TRUTH_PNL_THRESHOLD, step=100.0)
+    truth_min_trades = st.number_input("Trades minimum par cellule", min_value=1,
+                                       value=config.TRUTH_MIN_TRADES, step=1)
+
+def memo(key, build):
+    """
+    Objet (figure, classement...) construit une seule fois par clé (vue, actif, paramètres) ;
+    le cache est vidé à chaque nouvelle analyse et limité aux config.FIGURE_CACHE_SIZE dernières clés
+    """
+    cache = st.session_state.setdefault('figure_cache', OrderedDict())
+    if key in cache:
+        cache.move_to_end(key)
+    else:
+        cache[key] = build()
+        while len(cache) > config.FIGURE_CACHE_SIZE:
+            cache.popitem(last=False)
+    return cache[key]
+
+def show_figure(key, build, source_points=None):
+    """Affiche une figure mémorisée (et la légende des points envoyés si source_points est donné)"""
+    def build_with_caption():
+        fig = build()
+        return fig, payload_caption(fig, source_points) if source_points is not None else None
+    fig, caption = memo(('figure',) + key, build_with_caption)
+    st.plotly_chart(fig, use_container_width=True)
+    if caption:
+        st.caption(caption)
+
+def weekday_significance_all(analyses):
+    """
+    p-values par jour de chaque analyse (dans l'ordre de l'ensemble), calculées seulement à la demande :
+    mémorisées par contenu de fichier dans le cache des résultats, les fichiers manquants en parallèle
+    """
+    n_permutations = config.SIGNIFICANCE_PERMUTATIONS
+    pvalues, keys = {}, {}
+    for analysis in analyses:
+        if analysis.path is None or not os.path.exists(analysis.path):
+            continue
+        keys[analysis.path] = (file_digest(analysis.path), analysis.file_name, 'pvalues', n_permutations)
+        cached = result_cache.get(keys[analysis.path])
+        if cached is not None:
+            pvalues[analysis.path] = cached
+    missing = [path for path in keys if path not in pvalues]
+    if missing:
+        with st.spinner(f"Test de permutation ({n_permutations} permutations) sur {len(missing)} fichiers..."):
+            for path, result, error in iter_significance(missing, config.MAX_WORKERS, n_permutations):
+                if error is not None:
+                    st.error(f"p-values de {os.path.basename(path)}: {error}")
+                    continue
+                pvalues[path] = result
+                result_cache.put(keys[path], result)
+    return [pvalues.get(analysis.path) for analysis in analyses]
+
+store_stats = analytics_store.stats()
+st.sidebar.caption(
+    f"🗄️ Base d'analyse: {store_stats['exports']} exports, {store_stats['trades']} trades, "
+    f"{store_stats['bytes'] / 1024**2:.1f} Mo"
+)
+
+def render_views():
+    # Afficher les résultats si l'analyse est lancée (ou si la base contient des exports)
+    if st.session_state.get('complete_analysis_complete') or store_stats['exports']:
+        analyses = st.session_state.get('analyses', AnalysisSet())
+        truth_analyses = analyses.truth_analyses()
     
-    st.header("📊 Dashboard d'Analyse de Backtest TradingView")
+        st.header("📊 Dashboard d'Analyse de Backtest TradingView")
+        if len(analyses):
+            with st.expander(f"📁 {len(analyses)} fichiers analysés"):
+                st.dataframe(memo(('summary',), analyses.summary).round(2), use_container_width=True, hide_index=True)
     
-    # Choix du type d'analyse
-    analysis_type = st.radio(
-        "Choisissez le type d'analyse:",
-        ["📋 Tableau de Vérité (NOUVEAU)", "🎯 Optimisation par Actif/Mois", "📈 Analyse Détaillée", "📉 Visualisations Graphiques"],
-        horizontal=True
-    )
+        # Choix du type d'analyse
+        analysis_type = st.radio(
+            "Choisissez le type d'analyse:",
+            ["📋 Tableau de Vérité (NOUVEAU)", "🎯 Optimisation par Actif/Mois", "📈 Analyse Détaillée", "📉 Visualisations Graphiques", "🏆 Classement Drawdown", "💼 Portefeuille", "🎲 Monte Carlo", "📐 Métriques Glissantes", "🗄️ Base d'Analyse"],
+            horizontal=True
+        )
     
-    if analysis_type == "📋 Tableau de Vérité (NOUVEAU)":
-        st.subheader("📋 TABLEAU DE VÉRITÉ - Validation des Hypothèses")
+        if analysis_type == "📋 Tableau de Vérité (NOUVEAU)":
+            st.subheader("📋 TABLEAU DE VÉRITÉ - Validation des Hypothèses")
         
-        if truth_analyses:
-            # Créer le tableau de vérité
-            days_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-            assets_list = [analysis['asset_name'] for analysis in truth_analyses]
+            if truth_analyses:
+                # Statistiques (jour x actif) empilées une fois par analyse, puis classées selon les seuils
+                stats = memo(('truth_stats',), lambda: stack_weekday_stats(truth_analyses))
+                assets_list = stats['assets']
             
-            truth_matrix = pd.DataFrame(index=days_order, columns=assets_list)
-            details_matrix = {}
+                alpha = 1 - config.CONFIDENCE_LEVEL
+                significant_only = st.checkbox(
+                    f"Afficher uniquement les cellules significatives (test de permutation, p < {alpha:.2f})",
+                    value=False
+                )
+                assets_as_rows = st.checkbox(
+                    "Actifs en lignes (triable par nombre de jours ✅)",
+                    value=len(assets_list) > config.TRUTH_ASSETS_AS_ROWS_ABOVE
+                )
             
-            for analysis in truth_analyses:
-                asset_name = analysis['asset_name']
-                weekday_df = analysis['weekday_analysis']
-                details_matrix[asset_name] = weekday_df.set_index('Jour_Semaine')
-                
-                for day in days_order:
-                    if day in weekday_df['Jour_Semaine'].values:
-                        day_data = weekday_df[weekday_df['Jour_Semaine'] == day].iloc[0]
-                        is_profitable = day_data['Est_Rentable']
-                        is_good_quality = day_data['Qualite_Signal']
-                        
-                        if is_profitable and is_good_quality:
-                            truth_matrix.loc[day, asset_name] = "✅ OUI"
-                        elif is_profitable:
-                            truth_matrix.loc[day, asset_name] = "⚠️ P&L+"
-                        elif is_good_quality:
-                            truth_matrix.loc[day, asset_name] = "⚠️ WR+"
-                        else:
-                            truth_matrix.loc[day, asset_name] = "❌ NON"
-                    else:
-                        truth_matrix.loc[day, asset_name] = "➖ N/A"
+                if significant_only:
+                    # Test de permutation lancé seulement ici, une fois par analyse
+                    stats = memo(('truth_stats', 'pvalues', config.SIGNIFICANCE_PERMUTATIONS),
+                                 lambda: with_pvalues(stats, weekday_significance_all(analyses)))
+                codes = classify(stats, truth_win_rate, truth_pnl, int(truth_min_trades), significant_only, alpha)
+                matrix = truth_matrix(stats, codes, assets_as_rows)
             
-            st.write("### 🔍 TABLEAU DE VÉRITÉ : Jour VS Actif")
-            st.write("*✅ OUI = Rentable + Bon Win Rate | ⚠️ P&L+ = Seulement rentable | ⚠️ WR+ = Bon Win Rate seulement | ❌ NON = Ni l'un ni l'autre*")
-            st.dataframe(truth_matrix, use_container_width=True)
+                st.write("### 🔍 TABLEAU DE VÉRITÉ : Jour VS Actif")
+                st.write(f"*✅ OUI = Rentable (P&L > {truth_pnl:g}) + Bon Win Rate (> {truth_win_rate:g}%) | "
+                         f"⚠️ P&L+ = Seulement rentable | ⚠️ WR+ = Bon Win Rate seulement | ❌ NON = Ni l'un ni l'autre | "
+                         f"➖ N/A = moins de {int(truth_min_trades)} trade(s)*")
+                # Grille virtualisée : seules les cellules visibles sont dessinées, même avec des milliers d'actifs
+                st.dataframe(matrix, use_container_width=True)
+                if significant_only:
+                    st.caption("➖ NS = non significatif : P&L du jour compatible avec une répartition aléatoire des trades")
+                    with st.expander("🎲 p-values (P&L du jour vs permutations des jours)"):
+                        pvalue_matrix = pd.DataFrame(stats['p_value'], index=stats['days'], columns=assets_list)
+                        st.dataframe((pvalue_matrix.T if assets_as_rows else pvalue_matrix).round(4),
+                                     use_container_width=True)
+                else:
+                    st.caption("🎲 Les p-values (test de permutation) sont calculées à la demande : "
+                               "cochez « Afficher uniquement les cellules significatives »")
             
-            # Détails par actif
-            st.write("### 📋 DÉTAILS PAR ACTIF")
-            for analysis in truth_analyses:
-                asset_name = analysis['asset_name']
-                weekday_df = analysis['weekday_analysis']
-                
-                with st.expander(f"📋 {asset_name} - Détails (P&L: {analysis['total_pnl']:.0f} JPY)", expanded=False):
-                    display_df = weekday_df.copy()
-                    display_df['Performance'] = display_df.apply(
-                        lambda row: "✅" if row['Est_Rentable'] and row['Qualite_Signal'] 
-                                   else "⚠️" if row['Est_Rentable'] or row['Qualite_Signal']
-                                   else "❌", axis=1
-                    )
-                    st.dataframe(display_df[['Jour_Semaine', 'Total_PnL_JPY', 'Win_Rate', 'Nb_Trades', 'Performance']], use_container_width=True)
-        else:
-            st.warning("Aucune analyse disponible")
+                # Détails d'un actif (un sélecteur plutôt qu'un panneau par actif)
+                st.write("### 📋 DÉTAILS PAR ACTIF")
+                detail_index = st.selectbox("Actif:", range(len(truth_analyses)),
+                                            format_func=lambda i: assets_list[i])
+                analysis = truth_analyses[detail_index]
+                st.write(f"**{analysis['asset_name']}** - P&L: {analysis['total_pnl']:.0f} JPY")
+                display_df = analysis['weekday_analysis'].copy()
+                profitable = display_df['Total_PnL_JPY'] > truth_pnl
+                good_quality = display_df['Win_Rate'] > truth_win_rate
+                display_df['Performance'] = np.select(
+                    [profitable & good_quality, profitable | good_quality], ["✅", "⚠️"], default="❌"
+                )
+                if significant_only and 'P_Value' not in display_df.columns:
+                    display_df['P_Value'] = display_df['Jour_Semaine'].map(
+                        dict(zip(stats['days'], stats['p_value'][:, detail_index])))
+                detail_columns = ['Jour_Semaine', 'Total_PnL_JPY', 'Win_Rate', 'Nb_Trades', 'Performance']
+                detail_columns += [col for col in ('P_Value', 'P_Value_WR') if col in display_df.columns]
+                st.dataframe(display_df[detail_columns], use_container_width=True)
+            else:
+                st.warning("Aucune analyse disponible")
     
-    elif analysis_type == "🎯 Optimisation par Actif/Mois":
-        st.subheader("🎯 Analyse d'Optimisation par Actif/Mois")
+        elif analysis_type == "🎯 Optimisation par Actif/Mois":
+            st.subheader("🎯 Analyse d'Optimisation par Actif/Mois")
         
-        if complete_analyses:
-            asset_names = [analysis['asset_name'] for analysis in complete_analyses]
-            selected_asset = st.selectbox("Choisissez un actif à analyser:", asset_names)
+            if len(analyses):
+                selected_asset = st.selectbox("Choisissez un actif à analyser:", analyses.labels)
+                selected_analysis = analyses.by_label(selected_asset).complete
             
-            selected_analysis = None
-            for analysis in complete_analyses:
-                if analysis['asset_name'] == selected_asset:
-                    selected_analysis = analysis
-                    break
-            
-            if selected_analysis:
-                daily_data = selected_analysis['daily_analysis']
-                monthly_data = selected_analysis['monthly_analysis']
-                bias_data = selected_analysis['bias_analysis'].iloc[0]
-                weekly_data = selected_analysis['weekly_analysis']
-                drawdown_info = selected_analysis['drawdown_info']
-                optimal_daily = selected_analysis['optimal_daily_analysis']
-                best_day_per_month = selected_analysis['best_day_per_month']
-                asset_name = selected_analysis['asset_name']
+                if selected_analysis:
+                    daily_data = selected_analysis['daily_analysis']
+                    monthly_data = selected_analysis['monthly_analysis']
+                    bias_data = selected_analysis['bias_analysis'].iloc[0]
+                    weekly_data = selected_analysis['weekly_analysis']
+                    drawdown_info = selected_analysis['drawdown_info']
+                    optimal_daily = selected_analysis['optimal_daily_analysis']
+                    best_day_per_month = selected_analysis['best_day_per_month']
+                    asset_name = selected_analysis['asset_name']
                 
-                # Métriques principales
-                col1, col2, col3, col4 = st.columns(4)
-                with col1:
-                    st.metric("Nombre de Trades", f"{int(bias_data['total_trades'])}")
-                with col2:
-                    st.metric("P&L Total", f"{selected_analysis['total_pnl']:.0f} JPY")
-                with col3:
-                    st.metric("Win Rate Global", f"{selected_analysis['win_rate_global']:.1f}%")
-                with col4:
-                    if drawdown_info and 'max_drawdown_percentage' in drawdown_info:
-                        st.metric("Drawdown Max", f"{drawdown_info['max_drawdown_percentage']:.1f}%")
+                    # Métriques principales
+                    col1, col2, col3, col4 = st.columns(4)
+                    with col1:
+                        st.metric("Nombre de Trades", f"{int(bias_data['total_trades'])}")
+                    with col2:
+                        st.metric("P&L Total", f"{selected_analysis['total_pnl']:.0f} JPY")
+                    with col3:
+                        st.metric("Win Rate Global", f"{selected_analysis['win_rate_global']:.1f}%")
+                    with col4:
+                        if drawdown_info and 'max_drawdown_percentage' in drawdown_info:
+                            st.metric("Drawdown Max", f"{drawdown_info['max_drawdown_percentage']:.1f}%")
                 
-                # Tabs pour différentes analyses
-                tab1, tab2, tab3 = st.tabs(["📅 Meilleur Jour/Mois", "📊 Heatmap Jour/Mois", "📋 Données Brutes"])
+                    # Seule la vue choisie est construite (st.tabs calcule le contenu de tous les onglets)
+                    optimization_view = st.radio("Vue:", ["📅 Meilleur Jour/Mois", "📊 Heatmap Jour/Mois", "📋 Données Brutes"],
+                                                 horizontal=True, key="optimization_view", label_visibility="collapsed")
                 
-                with tab1:
-                    st.write("### 📅 Meilleur Jour de Trading par Mois")
-                    if best_day_per_month is not None and not best_day_per_month.empty:
-                        st.dataframe(best_day_per_month[['Mois', 'Jour_Semaine', 'Total_PnL_JPY', 'Win_Rate', 'Nb_Trades']].sort_values('Mois'))
+                    if optimization_view == "📅 Meilleur Jour/Mois":
+                        st.write("### 📅 Meilleur Jour de Trading par Mois")
+                        if best_day_per_month is not None and not best_day_per_month.empty:
+                            st.dataframe(best_day_per_month[['Mois', 'Jour_Semaine', 'Total_PnL_JPY', 'Win_Rate', 'Nb_Trades']].sort_values('Mois'))
                         
-                        # Recommandations
-                        st.write("### 💡 Recommandations")
-                        profitable_configs = best_day_per_month[
-                            (best_day_per_month['Total_PnL_JPY'] > 0) & 
-                            (best_day_per_month['Win_Rate'] > 50) &
-                            (best_day_per_month['Nb_Trades'] >= 5)
-                        ]
-                        if not profitable_configs.empty:
-                            st.success("Configurations recommandées:")
-                            for _, config in profitable_configs.iterrows():
-                                st.write(f"- {config['Mois']}: Trader le {config['Jour_Semaine']} "
-                                       f"(P&L: {config['Total_PnL_JPY']:.0f} JPY, "
-                                       f"Win Rate: {config['Win_Rate']:.1f}%)")
+                            # Recommandations
+                            st.write("### 💡 Recommandations")
+                            profitable_configs = best_day_per_month[
+                                (best_day_per_month['Total_PnL_JPY'] > 0) & 
+                                (best_day_per_month['Win_Rate'] > 50) &
+                                (best_day_per_month['Nb_Trades'] >= 5)
+                            ]
+                            if not profitable_configs.empty:
+                                st.success("Configurations recommandées:")
+                                for _, recommendation in profitable_configs.iterrows():
+                                    st.write(f"- {recommendation['Mois']}: Trader le {recommendation['Jour_Semaine']} "
+                                           f"(P&L: {recommendation['Total_PnL_JPY']:.0f} JPY, "
+                                           f"Win Rate: {recommendation['Win_Rate']:.1f}%)")
+                            else:
+                                st.info("Pas de configurations fortement rentables identifiées")
                         else:
-                            st.info("Pas de configurations fortement rentables identifiées")
-                    else:
-                        st.info("Pas de données optimisées disponibles")
+                            st.info("Pas de données optimisées disponibles")
                 
-                with tab2:
-                    st.write("### 🌡️ Heatmap des Performances")
-                    if optimal_daily is not None and not optimal_daily.empty:
-                        # Créer une heatmap
-                        pivot_heatmap = optimal_daily.pivot_table(
-                            values='Total_PnL_JPY', 
-                            index='Jour_Semaine', 
-                            columns='Mois', 
-                            aggfunc='sum', 
-                            fill_value=0
-                        )
-                        
-                        # Réordonner les jours
-                        days_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-                        pivot_heatmap = pivot_heatmap.reindex(
-                            index=[day for day in days_order if day in pivot_heatmap.index],
-                            columns=[col for col in pivot_heatmap.columns if col in pivot_heatmap.columns]
-                        )
+                    elif optimization_view == "📊 Heatmap Jour/Mois":
+                        st.write("### 🌡️ Heatmap des Performances")
+                        if optimal_daily is not None and not optimal_daily.empty:
+                            # Créer une heatmap
+                            pivot_heatmap = optimal_daily.pivot_table(
+                                values='Total_PnL_JPY', 
+                                index='Jour_Semaine', 
+                                columns='Mois', 
+                                aggfunc='sum', 
+                                fill_value=0
+                            )
                         
-                        if not pivot_heatmap.empty:
-                            fig_heatmap = go.Figure(data=go.Heatmap(
-                                z=pivot_heatmap.values,
-                                x=pivot_heatmap.columns,
-                                y=pivot_heatmap.index,
-                                colorscale='RdYlGn',
-                                colorbar=dict(title="P&L (JPY)"),
-                                zmid=0
-                            ))
-                            
-                            fig_heatmap.update_layout(
-                                title=f"Heatmap des Performances - {asset_name}",
-                                xaxis_title="Mois",
-                                yaxis_title="Jour de la Semaine"
+                            # Réordonner les jours
+                            days_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+                            pivot_heatmap = pivot_heatmap.reindex(
+                                index=[day for day in days_order if day in pivot_heatmap.index],
+                                columns=[col for col in pivot_heatmap.columns if col in pivot_heatmap.columns]
                             )
-                            
-                            st.plotly_chart(fig_heatmap, use_container_width=True)
-                    else:
-                        st.info("Pas de données pour la heatmap")
+                        
+                            if not pivot_heatmap.empty:
+                                show_figure(('optimization_heatmap', asset_name), lambda: heatmap_figure(
+                                    pivot_heatmap, f"Heatmap des Performances - {asset_name}", "P&L (JPY)"))
+                        else:
+                            st.info("Pas de données pour la heatmap")
                 
-                with tab3:
-                    st.write("### 📋 Données Brutes Complètes")
-                    if optimal_daily is not None and not optimal_daily.empty:
-                        st.dataframe(optimal_daily, use_container_width=True)
                     else:
-                        st.info("Pas de données brutes disponibles")
-        else:
-            st.warning("Aucune analyse disponible")
+                        st.write("### 📋 Données Brutes Complètes")
+                        if optimal_daily is not None and not optimal_daily.empty:
+                            st.dataframe(optimal_daily, use_container_width=True)
+                        else:
+                            st.info("Pas de données brutes disponibles")
+            else:
+                st.warning("Aucune analyse disponible")
     
-    elif analysis_type == "📈 Analyse Détaillée":
-        st.subheader("📈 Analyse Détaillée des Performances")
+        elif analysis_type == "📈 Analyse Détaillée":
+            st.subheader("📈 Analyse Détaillée des Performances")
         
-        if complete_analyses:
-            asset_names = [analysis['asset_name'] for analysis in complete_analyses]
-            selected_asset = st.selectbox("Sélectionnez un actif:", asset_names, key="detail_asset")
-            
-            selected_analysis = None
-            for analysis in complete_analyses:
-                if analysis['asset_name'] == selected_asset:
-                    selected_analysis = analysis
-                    break
+            if len(analyses):
+                selected_asset = st.selectbox("Sélectionnez un actif:", analyses.labels, key="detail_asset")
+                selected_analysis = analyses.by_label(selected_asset).complete
             
-            if selected_analysis:
-                daily_data = selected_analysis['daily_analysis']
-                monthly_data = selected_analysis['monthly_analysis']
-                bias_data = selected_analysis['bias_analysis'].iloc[0]
-                weekly_data = selected_analysis['weekly_analysis']
+                if selected_analysis:
+                    daily_data = selected_analysis['daily_analysis']
+                    monthly_data = selected_analysis['monthly_analysis']
+                    bias_data = selected_analysis['bias_analysis'].iloc[0]
+                    weekly_data = selected_analysis['weekly_analysis']
                 
-                # Afficher les métriques
-                col1, col2, col3, col4 = st.columns(4)
-                with col1:
-                    st.metric("P&L Total", f"{selected_analysis['total_pnl']:.0f} JPY")
-                with col2:
-                    st.metric("Nb Trades", f"{selected_analysis['total_trades']}")
-                with col3:
-                    st.metric("Win Rate", f"{selected_analysis['win_rate_global']:.1f}%")
-                with col4:
-                    st.metric("Biais Long", f"{bias_data['long_percentage']:.1f}%")
+                    # Afficher les métriques
+                    col1, col2, col3, col4 = st.columns(4)
+                    with col1:
+                        st.metric("P&L Total", f"{selected_analysis['total_pnl']:.0f} JPY")
+                    with col2:
+                        st.metric("Nb Trades", f"{selected_analysis['total_trades']}")
+                    with col3:
+                        st.metric("Win Rate", f"{selected_analysis['win_rate_global']:.1f}%")
+                    with col4:
+                        st.metric("Biais Long", f"{bias_data['long_percentage']:.1f}%")
                 
-                # Tabs pour différentes visualisations
-                detail_tab1, detail_tab2, detail_tab3 = st.tabs(["📈 Courbe Equity", "📊 Performance Mensuelle", "🗓️ Performance Hebdomadaire"])
+                    # Seule la vue choisie est construite ; la courbe d'equity est partagée avec les Visualisations
+                    detail_view = st.radio("Vue:", ["📈 Courbe Equity", "📊 Performance Mensuelle", "🗓️ Performance Hebdomadaire"],
+                                           horizontal=True, key="detail_view", label_visibility="collapsed")
                 
-                with detail_tab1:
-                    st.write("### 📈 Courbe d'Equity")
-                    if daily_data is not None and not daily_data.empty:
-                        daily_sorted = daily_data.sort_values('Date')
-                        daily_sorted['Cumulative_PnL'] = daily_sorted['Total_PnL_JPY'].cumsum()
-                        
-                        fig_equity = go.Figure()
-                        fig_equity.add_trace(go.Scatter(
-                            x=daily_sorted['Date'],
-                            y=daily_sorted['Cumulative_PnL'],
-                            mode='lines',
-                            name='Equity',
-                            line=dict(color='blue', width=2)
-                        ))
-                        
-                        fig_equity.update_layout(
-                            title="Courbe d'Equity",
-                            xaxis_title="Date",
-                            yaxis_title="P&L Cumulatif (JPY)"
-                        )
-                        
-                        st.plotly_chart(fig_equity, use_container_width=True)
-                    else:
-                        st.info("Pas de données pour la courbe d'équity")
+                    if detail_view == "📈 Courbe Equity":
+                        st.write("### 📈 Courbe d'Equity")
+                        if daily_data is not None and not daily_data.empty:
+                            show_figure(('equity', selected_asset, chart_max_points),
+                                        lambda: equity_figure(daily_data, chart_max_points), len(daily_data))
+                        else:
+                            st.info("Pas de données pour la courbe d'équity")
                 
-                with detail_tab2:
-                    st.write("### 📊 Performance Mensuelle")
-                    if monthly_data is not None and not monthly_data.empty:
-                        # Graphique mensuel
-                        monthly_sorted = monthly_data.sort_values('Month')
-                        colors = ['green' if x > 0 else 'red' for x in monthly_sorted['Total_PnL_JPY']]
+                    elif detail_view == "📊 Performance Mensuelle":
+                        st.write("### 📊 Performance Mensuelle")
+                        if monthly_data is not None and not monthly_data.empty:
+                            show_figure(('monthly', selected_asset), lambda: monthly_figure(monthly_data))
                         
-                        fig_monthly = go.Figure()
-                        fig_monthly.add_trace(go.Bar(
-                            x=monthly_sorted['Month'].astype(str),
-                            y=monthly_sorted['Total_PnL_JPY'],
-                            marker_color=colors,
-                            name='P&L Mensuel'
-                        ))
-                        
-                        fig_monthly.update_layout(
-                            title="Performance Mensuelle",
-                            xaxis_title="Mois",
-                            yaxis_title="P&L (JPY)",
-                            xaxis_tickangle=-45
-                        )
-                        
-                        st.plotly_chart(fig_monthly, use_container_width=True)
-                        
-                        # Tableau des données
-                        st.dataframe(monthly_data, use_container_width=True)
-                    else:
-                        st.info("Pas de données mensuelles disponibles")
+                            # Tableau des données
+                            st.dataframe(monthly_data, use_container_width=True)
+                        else:
+                            st.info("Pas de données mensuelles disponibles")
                 
-                with detail_tab3:
-                    st.write("### 🗓️ Performance Hebdomadaire")
-                    if weekly_data is not None and not weekly_data.empty:
-                        # Heatmap hebdomadaire
-                        pivot_weekly = weekly_data.pivot_table(
-                            values='Avg_PnL_JPY', 
-                            index='Weekday', 
-                            columns='Month', 
-                            aggfunc='mean', 
-                            fill_value=0
-                        )
-                        
-                        if not pivot_weekly.empty:
-                            fig_weekly = go.Figure(data=go.Heatmap(
-                                z=pivot_weekly.values,
-                                x=pivot_weekly.columns,
-                                y=pivot_weekly.index,
-                                colorscale='RdYlGn',
-                                colorbar=dict(title="P&L Moyen"),
-                                zmid=0
-                            ))
-                            
-                            fig_weekly.update_layout(
-                                title="Heatmap des Performances Hebdomadaires",
-                                xaxis_title="Mois",
-                                yaxis_title="Jour de la Semaine"
+                    else:
+                        st.write("### 🗓️ Performance Hebdomadaire")
+                        if weekly_data is not None and not weekly_data.empty:
+                            # Heatmap hebdomadaire
+                            pivot_weekly = weekly_data.pivot_table(
+                                values='Avg_PnL_JPY', 
+                                index='Weekday', 
+                                columns='Month', 
+                                aggfunc='mean', 
+                                fill_value=0
                             )
-                            
-                            st.plotly_chart(fig_weekly, use_container_width=True)
                         
-                        # Tableau détaillé
-                        st.dataframe(weekly_data, use_container_width=True)
-                    else:
-                        st.info("Pas de données hebdomadaires disponibles")
-        else:
-            st.warning("Aucune analyse disponible")
+                            if not pivot_weekly.empty:
+                                show_figure(('weekly_heatmap', selected_asset), lambda: heatmap_figure(
+                                    pivot_weekly, "Heatmap des Performances Hebdomadaires", "P&L Moyen"))
+                        
+                            # Tableau détaillé
+                            st.dataframe(weekly_data, use_container_width=True)
+                        else:
+                            st.info("Pas de données hebdomadaires disponibles")
+            else:
+                st.warning("Aucune analyse disponible")
+    
+        elif analysis_type == "📉 Visualisations Graphiques":
+            st.subheader("📉 Visualisations Graphiques Complètes")
+        
+            if len(analyses):
+                selected_asset = st.selectbox("Sélectionnez un actif pour visualisation:", analyses.labels, key="viz_asset")
+                selected_analysis = analyses.by_label(selected_asset).complete
+            
+                if selected_analysis:
+                    daily_data = selected_analysis['daily_analysis']
+                    monthly_data = selected_analysis['monthly_analysis']
+                    drawdown_info = selected_analysis['drawdown_info']
+                
+                    # Graphiques dans des colonnes
+                    col1, col2 = st.columns(2)
+                
+                    with col1:
+                        # Courbe d'équity
+                        st.write("### 📈 Courbe d'Equity")
+                        if daily_data is not None and not daily_data.empty:
+                            show_figure(('equity', selected_asset, chart_max_points),
+                                        lambda: equity_figure(daily_data, chart_max_points), len(daily_data))
+                
+                    with col2:
+                        # Histogramme des P&L quotidiens
+                        st.write("### 📊 Distribution des P&L")
+                        if daily_data is not None and not daily_data.empty:
+                            show_figure(('pnl_histogram', selected_asset), lambda: pnl_histogram(daily_data))
+                
+                    # Drawdown
+                    st.write("### 📉 Analyse du Drawdown")
+                    if drawdown_info and 'drawdown_data' in drawdown_info:
+                        drawdown_data = drawdown_info['drawdown_data']
+                        show_figure(('drawdown', selected_asset, chart_max_points),
+                                    lambda: drawdown_figure(drawdown_data, chart_max_points), len(drawdown_data))
+                    
+                        # Durées sous l'eau et récupération
+                        col_dd1, col_dd2, col_dd3 = st.columns(3)
+                        with col_dd1:
+                            st.metric("Drawdown Max", f"{drawdown_info['max_drawdown_absolute']:.0f} JPY")
+                        with col_dd2:
+                            longest = drawdown_info.get('longest_underwater_duration')
+                            st.metric("Plus longue période sous l'eau",
+                                      f"{longest.days} j" if longest is not None else "-",
+                                      f"{drawdown_info.get('longest_underwater_trades', 0)} trades", delta_color="off")
+                        with col_dd3:
+                            recovery = drawdown_info.get('max_drawdown_recovery_time')
+                            st.metric("Récupération du DD max", f"{recovery.days} j" if recovery is not None else "Non récupéré")
+                    
+                        episodes = drawdown_info.get('drawdown_episodes')
+                        if episodes is not None and not episodes.empty:
+                            st.write("#### 🔻 Pires épisodes de drawdown")
+                            st.dataframe(episodes.drop(columns=['Peak_Index', 'Trough_Index', 'Recovery_Index']), use_container_width=True)
+                
+                    # Performance mensuelle
+                    st.write("### 📆 Performance Mensuelle")
+                    if monthly_data is not None and not monthly_data.empty:
+                        show_figure(('monthly', selected_asset), lambda: monthly_figure(monthly_data))
+            else:
+                st.warning("Aucune analyse disponible")
     
-    elif analysis_type == "📉 Visualisations Graphiques":
-        st.subheader("📉 Visualisations Graphiques Complètes")
+        elif analysis_type == "🏆 Classement Drawdown":
+            st.subheader("🏆 Classement des stratégies par drawdown")
         
-        if complete_analyses:
-            asset_names = [analysis['asset_name'] for analysis in complete_analyses]
-            selected_asset = st.selectbox("Sélectionnez un actif pour visualisation:", asset_names, key="viz_asset")
+            if len(analyses):
+                # Toutes les courbes sont calculées ensemble (matrice stratégies x trades)
+                ranking = memo(('drawdown_ranking',), lambda: drawdown_ranking(analyses.complete_analyses()))
+            
+                sort_options = {
+                    "Drawdown max (JPY)": ('Max_Drawdown', True),
+                    "Drawdown max (%)": ('Max_Drawdown_Pct', True),
+                    "Drawdown actuel (JPY)": ('Current_Drawdown', True),
+                    "Plus longue période sous l'eau": ('Longest_Underwater_Trades', False),
+                    "P&L total": ('Total_PnL', False)
+                }
+                sort_label = st.selectbox("Trier par:", list(sort_options.keys()))
+                sort_column, ascending = sort_options[sort_label]
+                ranking = ranking.sort_values(sort_column, ascending=ascending, kind='stable')
+            
+                fig_ranking = go.Figure()
+                fig_ranking.add_trace(go.Bar(
+                    x=ranking['Strategy'],
+                    y=ranking['Max_Drawdown'],
+                    marker_color='red',
+                    name='Drawdown Max'
+                ))
+                fig_ranking.update_layout(
+                    title="Drawdown maximum par stratégie",
+                    xaxis_title="Stratégie",
+                    yaxis_title="Drawdown (JPY)"
+                )
+                st.plotly_chart(fig_ranking, use_container_width=True)
             
-            selected_analysis = None
-            for analysis in complete_analyses:
-                if analysis['asset_name'] == selected_asset:
-                    selected_analysis = analysis
-                    break
+                st.dataframe(ranking.round(2), use_container_width=True, hide_index=True)
+            else:
+                st.warning("Aucune analyse disponible")
+    
+        elif analysis_type == "💼 Portefeuille":
+            st.subheader("💼 Portefeuille combiné")
+        
+            if len(analyses):
+                assets_list = analyses.labels
+                selected_assets = st.multiselect("Actifs du portefeuille:", assets_list, default=assets_list)
+                book = analyses.complete_analyses(selected_assets)
             
-            if selected_analysis:
-                daily_data = selected_analysis['daily_analysis']
-                monthly_data = selected_analysis['monthly_analysis']
-                drawdown_info = selected_analysis['drawdown_info']
+                if book:
+                    # Fusion chronologique des trades déjà triés de chaque actif
+                    portfolio = memo(('portfolio', tuple(selected_assets)), lambda: portfolio_from_analyses(book))
                 
-                # Graphiques dans des colonnes
-                col1, col2 = st.columns(2)
+                    col1, col2, col3, col4 = st.columns(4)
+                    with col1:
+                        st.metric("P&L Total", f"{portfolio['equity'][-1]:.0f} JPY" if len(portfolio['equity']) else "0 JPY")
+                    with col2:
+                        st.metric("Trades", f"{len(portfolio['pnl'])}")
+                    with col3:
+                        st.metric("Drawdown Max", f"{portfolio['max_drawdown']:.0f} JPY")
+                    with col4:
+                        st.metric("Drawdown Actuel", f"{portfolio['current_drawdown']:.0f} JPY")
                 
+                    show_figure(('portfolio', tuple(selected_assets), chart_max_points),
+                                lambda: portfolio_figure(portfolio, chart_max_points), 2 * len(portfolio['equity']))
+                
+                    st.write("### 🧩 Contribution par actif")
+                    contribution = portfolio['contribution']
+                    show_figure(('contribution', tuple(selected_assets)), lambda: contribution_figure(contribution))
+                    st.dataframe(contribution.round(2), use_container_width=True, hide_index=True)
+                else:
+                    st.info("Sélectionnez au moins un actif")
+            else:
+                st.warning("Aucune analyse disponible")
+    
+        elif analysis_type == "🎲 Monte Carlo":
+            st.subheader("🎲 Simulation Monte Carlo de la séquence des trades")
+        
+            if len(analyses):
+                assets_list = analyses.labels
+                col1, col2, col3, col4 = st.columns(4)
                 with col1:
-                    # Courbe d'équity
-                    st.write("### 📈 Courbe d'Equity")
-                    if daily_data is not None and not daily_data.empty:
-                        daily_sorted = daily_data.sort_values('Date')
-                        daily_sorted['Cumulative_PnL'] = daily_sorted['Total_PnL_JPY'].cumsum()
-                        
-                        fig_equity = go.Figure()
-                        fig_equity.add_trace(go.Scatter(
-                            x=daily_sorted['Date'],
-                            y=daily_sorted['Cumulative_PnL'],
-                            mode='lines',
-                            name='Equity',
-                            line=dict(color='blue', width=2),
-                            fill='tonexty',
-                            fillcolor='rgba(0, 100, 255, 0.2)'
-                        ))
-                        
-                        fig_equity.update_layout(
-                            title="Courbe d'Equity Cumulative",
-                            xaxis_title="Date",
-                            yaxis_title="P&L Cumulatif (JPY)"
-                        )
-                        
-                        st.plotly_chart(fig_equity, use_container_width=True)
+                    selected_asset = st.selectbox("Actif:", assets_list, key='mc_asset')
+                with col2:
+                    method = st.selectbox("Méthode:", METHODS, format_func=lambda m: "Bootstrap (avec remise)" if m == 'bootstrap' else "Permutation")
+                with col3:
+                    n_paths = st.number_input("Nombre de chemins:", min_value=100, max_value=1_000_000, value=config.MONTE_CARLO_PATHS, step=1000)
+                with col4:
+                    seed = st.number_input("Graine:", min_value=0, value=config.MONTE_CARLO_SEED)
+            
+                if st.button("▶️ Lancer la simulation"):
+                    analysis = analyses.by_label(selected_asset).complete
+                    drawdown_info = analysis.get('drawdown_info')
+                    if drawdown_info:
+                        pnl = np.diff(drawdown_info['drawdown_data']['Cumulative_PnL'].to_numpy(), prepend=0.0)
+                        workers = st.session_state.get('analysis_timings', {}).get('workers', config.MAX_WORKERS)
+                        with st.spinner(f"Simulation de {int(n_paths)} chemins..."):
+                            start = time.perf_counter()
+                            simulation = run_monte_carlo(pnl, int(n_paths), method, int(seed), max_workers=workers)
+                        if simulation is None:
+                            st.warning(f"Pas assez de trades pour la simulation (minimum {config.MIN_TRADES_FOR_ANALYSIS})")
+                        else:
+                            simulation['asset_name'] = selected_asset
+                            simulation['elapsed'] = time.perf_counter() - start
+                            st.session_state['monte_carlo'] = simulation
+            
+                simulation = st.session_state.get('monte_carlo')
+                if simulation is not None:
+                    st.write(f"### {simulation['asset_name']} - {simulation['n_paths']} chemins x {simulation['n_trades']} trades "
+                             f"(IC {simulation['confidence']:.0%}, graine {simulation['seed']})")
+                    st.caption(f"⏱️ {simulation['elapsed']:.2f}s | Probabilité de perte: {simulation['prob_loss']:.2f}%")
+                    st.dataframe(simulation['summary'].round(2), use_container_width=True, hide_index=True)
                 
+                    drawdowns = simulation['paths']['max_drawdown']
+                    summary = simulation['summary'].set_index('Metric')
+                    fig_mc = go.Figure()
+                    fig_mc.add_trace(go.Histogram(x=drawdowns, nbinsx=60, name='Drawdown max simulé'))
+                    for value, label in ((summary.loc['Max_Drawdown', 'Observed'], 'Observé'),
+                                         (summary.loc['Max_Drawdown', 'Lower'], 'Borne IC')):
+                        fig_mc.add_vline(x=value, line_dash='dash', line_color='red', annotation_text=label)
+                    fig_mc.update_layout(
+                        title="Distribution du drawdown maximum",
+                        xaxis_title="Drawdown max (JPY)",
+                        yaxis_title="Nombre de chemins"
+                    )
+                    st.plotly_chart(fig_mc, use_container_width=True)
+            else:
+                st.warning("Aucune analyse disponible")
+
+        elif analysis_type == "📐 Métriques Glissantes":
+            st.subheader("📐 Métriques glissantes (win rate, Sharpe, profit factor, espérance)")
+        
+            if len(analyses):
+                assets_list = analyses.labels
+                col1, col2, col3 = st.columns([2, 1, 3])
+                with col1:
+                    selected_asset = st.selectbox("Actif:", assets_list, key='rolling_asset')
                 with col2:
-                    # Histogramme des P&L quotidiens
-                    st.write("### 📊 Distribution des P&L")
-                    if daily_data is not None and not daily_data.empty:
-                        fig_hist = go.Figure()
-                        fig_hist.add_trace(go.Histogram(
-                            x=daily_data['Total_PnL_JPY'],
-                            nbinsx=30,
-                            name='Distribution des P&L',
-                            marker_color='lightblue',
-                            opacity=0.7
-                        ))
-                        
-                        fig_hist.update_layout(
-                            title="Distribution des P&L Quotidiens",
-                            xaxis_title="P&L (JPY)",
-                            yaxis_title="Fréquence"
+                    by = st.radio("Fenêtre en:", ['trades', 'days'], format_func=lambda b: "Trades" if b == 'trades' else "Jours")
+            
+                drawdown_info = analyses.by_label(selected_asset).complete.get('drawdown_info')
+                if drawdown_info:
+                    # Sommes cumulées calculées une fois par actif : déplacer le curseur
+                    # ne fait qu'une différence par trade
+                    drawdown_data = drawdown_info['drawdown_data']
+                    prefixes = st.session_state.setdefault('rolling_prefixes', {})
+                    cached = prefixes.get(selected_asset)
+                    if cached is None or cached[0] is not drawdown_data:
+                        prefix = RollingPrefix(
+                            drawdown_data['Date and time'].to_numpy(),
+                            np.diff(drawdown_data['Cumulative_PnL'].to_numpy(), prepend=0.0)
                         )
-                        
-                        st.plotly_chart(fig_hist, use_container_width=True)
+                        prefixes[selected_asset] = (drawdown_data, prefix)
+                    else:
+                        prefix = cached[1]
                 
-                # Drawdown
-                st.write("### 📉 Analyse du Drawdown")
-                if drawdown_info and 'drawdown_data' in drawdown_info:
-                    drawdown_data = drawdown_info['drawdown_data']
-                    fig_drawdown = go.Figure()
-                    fig_drawdown.add_trace(go.Scatter(
-                        x=drawdown_data['Date and time'],
-                        y=drawdown_data['Drawdown_Percentage'],
-                        mode='lines',
-                        name='Drawdown %',
-                        line=dict(color='red', width=2),
-                        fill='tonexty',
-                        fillcolor='rgba(255, 0, 0, 0.3)'
-                    ))
-                    
-                    fig_drawdown.update_layout(
-                        title="Evolution du Drawdown (%)",
-                        xaxis_title="Date",
-                        yaxis_title="Drawdown (%)"
-                    )
-                    
-                    st.plotly_chart(fig_drawdown, use_container_width=True)
+                    with col3:
+                        if by == 'trades':
+                            window = st.slider("Taille de la fenêtre (trades):", min_value=2,
+                                               max_value=max(3, len(prefix)), value=min(50, max(2, len(prefix))))
+                        else:
+                            window = st.slider("Taille de la fenêtre (jours):", min_value=1, max_value=365, value=30)
                 
-                # Performance mensuelle
-                st.write("### 📆 Performance Mensuelle")
-                if monthly_data is not None and not monthly_data.empty:
-                    monthly_sorted = monthly_data.sort_values('Month')
-                    colors = ['green' if x > 0 else 'red' for x in monthly_sorted['Total_PnL_JPY']]
-                    
-                    fig_monthly = go.Figure()
-                    fig_monthly.add_trace(go.Bar(
-                        x=monthly_sorted['Month'].astype(str),
-                        y=monthly_sorted['Total_PnL_JPY'],
-                        marker_color=colors,
-                        name='P&L Mensuel'
-                    ))
-                    
-                    fig_monthly.update_layout(
-                        title="Performance Mensuelle",
-                        xaxis_title="Mois",
-                        yaxis_title="P&L (JPY)",
-                        xaxis_tickangle=-45
-                    )
+                    rolling = memo(('rolling', selected_asset, by, window),
+                                   lambda: prefix.rolling(window, by, min_trades=2 if by == 'days' else None))
+                    if rolling.empty:
+                        st.info("Pas assez de trades pour cette fenêtre")
+                    else:
+                        show_figure(('rolling', selected_asset, by, window, chart_max_points),
+                                    lambda: rolling_figure(rolling, chart_max_points), 5 * len(rolling))
                     
-                    st.plotly_chart(fig_monthly, use_container_width=True)
-        else:
-            st.warning("Aucune analyse disponible")
+                        with st.expander("📄 Données"):
+                            st.dataframe(rolling.round(3), use_container_width=True, hide_index=True)
+                else:
+                    st.warning("Aucune donnée de drawdown pour cet actif")
+            else:
+                st.warning("Aucune analyse disponible")
+
+        elif analysis_type == "🗄️ Base d'Analyse":
+            st.subheader("🗄️ Comparaison de tous les exports indexés")
+        
+            exports = analytics_store.exports()
+            if not exports.empty:
+                # Filtres appliqués dans les requêtes SQL (aucun fichier XLSX relu)
+                col1, col2 = st.columns(2)
+                with col1:
+                    assets = st.multiselect("Actifs:", sorted(exports['asset'].dropna().unique()))
+                with col2:
+                    strategies = st.multiselect("Stratégies:", sorted(exports['strategy'].dropna().unique()))
+                exports = analytics_store.exports(assets, strategies)
+            
+                col1, col2, col3, col4 = st.columns(4)
+                with col1:
+                    st.metric("Exports", f"{len(exports)}")
+                with col2:
+                    st.metric("Trades", f"{int(exports['trades'].sum())}")
+                with col3:
+                    st.metric("Meilleur P&L", f"{exports['total_pnl'].max():.0f} JPY" if len(exports) else "-")
+                with col4:
+                    st.metric("Pire drawdown", f"{exports['max_drawdown'].min():.0f} JPY" if len(exports) else "-")
+            
+                st.dataframe(
+                    exports[['file_name', 'strategy', 'version', 'params', 'broker', 'asset', 'export_date', 'trades',
+                             'total_pnl', 'win_rate', 'profit_factor', 'max_drawdown', 'max_drawdown_pct']].round(2),
+                    use_container_width=True, hide_index=True
+                )
+            
+                st.write("### 🏅 Meilleures variantes par groupe")
+                # Index reconstruit uniquement quand la base change
+                index_key = tuple(store_stats.values())
+                if st.session_state.get('variant_index_key') != index_key:
+                    st.session_state['variant_index'] = VariantIndex.from_store(analytics_store)
+                    st.session_state['variant_index_key'] = index_key
+                variant_index = st.session_state['variant_index']
+                metric_labels = {'total_pnl': "P&L total", 'win_rate': "Win rate", 'max_drawdown': "Drawdown max",
+                                 'profit_factor': "Profit factor", 'avg_pnl': "P&L moyen"}
+                col1, col2, col3, col4 = st.columns(4)
+                with col1:
+                    group = st.selectbox("Grouper par:", ['asset', 'strategy', 'version', 'params'],
+                                         format_func=lambda g: {'asset': "Actif", 'strategy': "Stratégie",
+                                                                'version': "Version", 'params': "Paramètres"}[g])
+                with col2:
+                    metric = st.selectbox("Critère:", list(metric_labels), format_func=metric_labels.get)
+                with col3:
+                    k = st.number_input("Variantes par groupe:", min_value=1, max_value=20, value=1)
+                with col4:
+                    latest_only = st.checkbox("Dernier export de chaque variante", value=True)
+                best = variant_index.best_per(group, metric, int(k), latest_only=latest_only,
+                                              min_trades=config.MIN_TRADES_FOR_ANALYSIS, asset=assets, strategy=strategies)
+                st.dataframe(
+                    best[['Rank', 'file_name', 'strategy', 'version', 'params', 'asset', 'trades',
+                          'total_pnl', 'win_rate', 'profit_factor', 'max_drawdown']].round(2),
+                    use_container_width=True, hide_index=True
+                )
+            
+                st.write("### 📅 P&L par actif et jour de la semaine (tous exports)")
+                weekday = analytics_store.weekday_summary(assets, strategies)
+                if not weekday.empty:
+                    heatmap = weekday.pivot(index='Asset', columns='Weekday', values='Total_PnL')
+                    heatmap = heatmap[[day for day in ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday'] if day in heatmap.columns]]
+                    fig_weekday = px.imshow(heatmap, color_continuous_scale='RdYlGn', color_continuous_midpoint=0,
+                                            aspect='auto', labels=dict(color="P&L (JPY)"))
+                    st.plotly_chart(fig_weekday, use_container_width=True)
+            
+                st.write("### 📈 P&L cumulé des meilleurs exports")
+                top_n = st.slider("Nombre d'exports:", min_value=1, max_value=max(2, min(20, len(exports))), value=min(5, max(1, len(exports))))
+                top = exports.head(top_n)
+                daily = analytics_store.daily_pnl(top['export_id'].tolist())
+                names = dict(zip(top['export_id'], top['file_name']))
+                fig_daily = go.Figure()
+                for export_id, curve in daily.groupby('export_id'):
+                    fig_daily.add_trace(line_trace(curve['date'], curve['cumulative_pnl'], chart_max_points,
+                                                   mode='lines', name=names[export_id]))
+                fig_daily.update_layout(xaxis_title="Date", yaxis_title="P&L cumulé (JPY)")
+                st.plotly_chart(fig_daily, use_container_width=True)
+                st.caption(payload_caption(fig_daily, len(daily)))
+            else:
+                st.info("La base est vide : utilisez « Indexer les fichiers dans la base » dans la barre latérale")
+
+# Résultats rendus dans un fragment : changer de vue, d'actif ou de paramètre ne réexécute
+# que ce bloc (la barre latérale, la liste des fichiers et la base ne sont pas relues)
+@st.fragment
+def render_results():
+    with Trace("Rendu", config.INSTRUMENTATION) as render_trace:
+        render_views()
+    if render_trace.spans:
+        # Seules les constructions (figures non mémorisées, classements) apparaissent
+        with st.expander(f"⏱️ Profil du rendu ({render_trace.wall * 1000:.0f} ms)"):
+            st.dataframe(trace_frame(render_trace.to_dict()).round(2), hide_index=True)
+
+render_results()
 
 # Pied de page
 st.markdown("---")
@@ -0,0 +1,75 @@
+# Micro-benchmark : winrate par groupe via apply(lambda) + merge vs grouped_metrics
+
+import argparse
+import time
+import numpy as np
+import pandas as pd
+
+from metrics import grouped_metrics, long_flags, win_flags
+
+
+def make_trades(n_trades: int, n_groups: int, seed: int = 0) -> pd.DataFrame:
+    '''Trades synthetiques repartis sur n_groups cles'''
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'Group': rng.integers(0, n_groups, n_trades),
+        'Type': np.where(rng.random(n_trades) < 0.5, 'Exit long', 'Exit short'),
+        'Net P&L JPY': rng.normal(5, 60, n_trades)
+    })
+
+
+def lambda_version(df: pd.DataFrame) -> pd.DataFrame:
+    '''Ancienne implementation : agg + deux apply(lambda) + deux merge'''
+    stats = df.groupby('Group').agg({'Net P&L JPY': ['sum', 'mean', 'count']}).reset_index()
+    stats.columns = ['Group', 'Total', 'Avg', 'Count']
+
+    df = df.assign(Win=df['Net P&L JPY'] > 0)
+    winrate = df.groupby('Group')['Win'].apply(lambda x: x.sum() / len(x) * 100 if len(x) > 0 else 0).reset_index()
+    winrate.columns = ['Group', 'Win_Rate']
+    stats = pd.merge(stats, winrate, on='Group')
+
+    longs = df.groupby('Group')['Type'].apply(
+        lambda x: (x.str.contains('long', case=False)).sum() / len(x) * 100 if len(x) > 0 else 0
+    ).reset_index()
+    longs.columns = ['Group', 'Long_Percentage']
+    return pd.merge(stats, longs, on='Group')
+
+
+def vectorized_version(df: pd.DataFrame) -> pd.DataFrame:
+    '''Nouvelle implementation : une seule agregation nommee'''
+    return grouped_metrics(df, 'Group', {
+        'Total': ('Net P&L JPY', 'sum'),
+        'Avg': ('Net P&L JPY', 'mean'),
+        'Count': ('Net P&L JPY', 'count')
+    }, wins=win_flags(df['Net P&L JPY']), longs=long_flags(df['Type']))
+
+
+def best_time(func, df: pd.DataFrame, repeat: int):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(df)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark du calcul des ratios par groupe')
+    parser.add_argument('--trades', type=int, default=1_000_000)
+    parser.add_argument('--groups', type=int, nargs='+', default=[100, 1_000, 10_000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f'{"Groupes":>10} {"apply+merge":>14} {"grouped_metrics":>16} {"Gain":>8}')
+    for n_groups in args.groups:
+        df = make_trades(args.trades, n_groups)
+        old_time, old_result = best_time(lambda_version, df, args.repeat)
+        new_time, new_result = best_time(vectorized_version, df, args.repeat)
+
+        pd.testing.assert_frame_equal(old_result, new_result[old_result.columns], check_dtype=False)
+        print(f'{n_groups:>10} {old_time:>13.3f}s {new_time:>15.3f}s {old_time / new_time:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
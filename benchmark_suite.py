@@ -0,0 +1,243 @@
+# Benchmark par etape sur des exports synthetiques : generation, lecture, analyses du dashboard
+# (cube, analyse complete, tableau de verite, test de permutation), methodes de
+# TradingPerformanceAnalyzer, rapports de PerformanceReporter et figures
+#
+#   python benchmark_suite.py --trades 1000 10000 100000 1000000
+#
+# Chaque mesure est ajoutee en JSON (une ligne par etape) a config.BENCHMARK_RESULTS :
+# les executions successives forment les courbes temps / memoire en fonction du nombre de trades.
+
+import argparse
+import json
+import os
+import platform
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import config
+from analyzer import TradingPerformanceAnalyzer
+from aggregation import TradeCube
+from backtest_analysis import TRADE_COLUMNS, analyze_xlsx_file_complete, analyze_single_file_truth, exit_rows
+from data_extractor import TradingViewDataExtractor, closed_trades
+from figures import equity_figure, monthly_figure, pnl_histogram, drawdown_figure, rolling_figure
+from reporter import PerformanceReporter
+from significance import weekday_pvalues
+from rolling_metrics import RollingPrefix
+from synthetic_export import FORMATS, XLSX_MAX_TRADES, export_name, read_export, write_export
+from trades_cache import TradesCache
+
+# Methodes de TradingPerformanceAnalyzer mesurees (chacune sur un analyseur neuf : pas de cache interne)
+ANALYZER_METHODS = [
+    ('calculate_daily_performance', ()),
+    ('calculate_monthly_performance', ()),
+    ('calculate_drawdown', ()),
+    ('drawdown_statistics', ()),
+    ('calculate_bias_analysis', ()),
+    ('advanced_weekly_analysis', ()),
+    ('rolling_metrics', (100,))
+]
+# Format relu pour les etapes d'analyse (le plus rapide disponible)
+READ_PREFERENCE = ('parquet', 'csv', 'xlsx')
+
+
+def measure(func: Callable[[Any], Any], setup: Optional[Callable[[], Any]] = None,
+            repeat: int = 1, memory: bool = True) -> Tuple[Any, Dict[str, Optional[float]]]:
+    '''
+    Meilleur temps sur repeat executions de func(setup()) et pic memoire d'une execution
+
+    setup n'est pas chronometre (objet neuf a chaque execution). Le pic memoire
+    est mesure par tracemalloc lors d'une execution supplementaire, pour ne pas
+    ralentir les executions chronometrees.
+    '''
+    best = None
+    result = None
+    for _ in range(max(1, repeat)):
+        argument = setup() if setup is not None else None
+        start = time.perf_counter()
+        result = func(argument)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    peak = None
+    if memory:
+        argument = setup() if setup is not None else None
+        tracemalloc.start()
+        try:
+            baseline = tracemalloc.get_traced_memory()[0]
+            func(argument)
+            peak = (tracemalloc.get_traced_memory()[1] - baseline) / 1024 ** 2
+        finally:
+            tracemalloc.stop()
+    return result, {'seconds': best, 'peak_mb': peak}
+
+
+def environment() -> Dict[str, Any]:
+    return {
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'cpus': os.cpu_count()
+    }
+
+
+def run_benchmark(n_trades: int, formats: List[str], workdir: str, seed: int = config.MONTE_CARLO_SEED,
+                  repeat: int = 1, memory: bool = True, max_points: int = config.CHART_MAX_POINTS) -> List[Dict[str, Any]]:
+    '''
+    Mesure toutes les etapes pour un export synthetique de n_trades trades
+
+    Une etape en echec (ex. rapport Excel au-dela de la limite de lignes) est
+    enregistree avec son erreur et n'interrompt pas les suivantes.
+
+    Returns:
+        List[Dict]: une mesure par etape (groupe, etape, format, secondes, pic memoire, erreur)
+    '''
+    records = []
+
+    def stage(group: str, name: str, func: Callable[[Any], Any], setup: Optional[Callable[[], Any]] = None,
+              fmt: Optional[str] = None) -> Any:
+        result, error = None, None
+        try:
+            result, metrics = measure(func, setup, repeat, memory)
+        except Exception as e:
+            metrics = {'seconds': None, 'peak_mb': None}
+            error = f'{type(e).__name__}: {e}'
+        seconds = metrics['seconds']
+        records.append({
+            'trades': n_trades,
+            'group': group,
+            'stage': name,
+            'format': fmt,
+            'seconds': seconds,
+            'peak_mb': metrics['peak_mb'],
+            'trades_per_s': n_trades / seconds if seconds else None,
+            'error': error
+        })
+        return result
+
+    # Generation et lecture de chaque format
+    paths = {}
+    for fmt in formats:
+        if fmt == 'xlsx' and n_trades > XLSX_MAX_TRADES:
+            continue
+        path = os.path.join(workdir, f'{export_name(n_trades, seed)}.{fmt}')
+        stage('generate', 'write_export', lambda _, path=path: write_export(path, n_trades, seed), fmt=fmt)
+        if os.path.exists(path):
+            paths[fmt] = path
+    if not paths:
+        return records
+
+    trades = {}
+    for fmt, path in paths.items():
+        trades[fmt] = stage('ingest', 'read_trades', lambda _, path=path: read_export(path, TRADE_COLUMNS), fmt=fmt)
+    if 'xlsx' in paths:
+        # Relecture via le cache Parquet de la feuille (deuxieme ouverture d'un meme export)
+        cache = TradesCache(os.path.join(workdir, 'trades_cache'))
+        with TradingViewDataExtractor(paths['xlsx'], cache=cache) as extractor:
+            extractor.load_trades(usecols=TRADE_COLUMNS)
+
+        def cached_read(_):
+            with TradingViewDataExtractor(paths['xlsx'], cache=cache) as extractor:
+                return extractor.load_trades(usecols=TRADE_COLUMNS)
+        stage('ingest', 'read_trades_cached', cached_read, fmt='xlsx')
+
+    fmt = next(fmt for fmt in READ_PREFERENCE if trades.get(fmt) is not None)
+    trades_df = trades[fmt]
+    exit_trades = stage('ingest', 'exit_rows', lambda _: exit_rows(trades_df), fmt=fmt)
+
+    # Analyses du dashboard : cube d'agregation partage, analyse complete et tableau de verite
+    complete = None
+    if exit_trades is not None:
+        cube = stage('analysis', 'TradeCube', lambda _: TradeCube(exit_trades))
+        complete = stage('analysis', 'analyze_xlsx_file_complete',
+                         lambda _: analyze_xlsx_file_complete(paths[fmt], exit_trades, cube))
+        stage('analysis', 'analyze_single_file_truth',
+              lambda _: analyze_single_file_truth(paths[fmt], exit_trades, cube))
+        # p-values du tableau de verite (calculees a la demande dans le dashboard)
+        stage('significance', 'weekday_pvalues', lambda _: weekday_pvalues(exit_trades))
+
+    # Chaine du traitement par lots : trades fermes puis TradingPerformanceAnalyzer
+    closed = stage('analyzer', 'closed_trades', lambda _: closed_trades(trades_df))
+    if closed is not None:
+        stage('analyzer', '__init__', lambda _: TradingPerformanceAnalyzer(closed))
+        results = {}
+        for method, args in ANALYZER_METHODS:
+            results[method] = stage('analyzer', method, lambda analyzer, method=method, args=args:
+                                    getattr(analyzer, method)(*args),
+                                    setup=lambda: TradingPerformanceAnalyzer(closed))
+
+        analysis_results = {
+            'daily_performance': results['calculate_daily_performance'],
+            'monthly_performance': results['calculate_monthly_performance'],
+            'drawdown_analysis': results['calculate_drawdown'],
+            'bias_analysis': results['calculate_bias_analysis'],
+            'weekly_analysis': results['advanced_weekly_analysis']
+        }
+        if all(value is not None for value in analysis_results.values()):
+            reporter = PerformanceReporter(os.path.join(workdir, 'reports', str(n_trades)))
+            stage('reporter', 'generate_basic_report', lambda _: reporter.generate_basic_report(
+                analysis_results['daily_performance'], analysis_results['monthly_performance'],
+                analysis_results['drawdown_analysis'], analysis_results['bias_analysis']))
+            stage('reporter', 'generate_advanced_report',
+                  lambda _: reporter.generate_advanced_report(analysis_results['weekly_analysis']))
+            stage('reporter', 'generate_excel_report', lambda _: reporter.generate_excel_report(analysis_results))
+
+    # Figures du dashboard (sous-echantillonnees a max_points points par courbe)
+    if complete is not None:
+        daily_data = complete['daily_analysis']
+        stage('figures', 'equity_figure', lambda _: equity_figure(daily_data, max_points))
+        stage('figures', 'monthly_figure', lambda _: monthly_figure(complete['monthly_analysis']))
+        stage('figures', 'pnl_histogram', lambda _: pnl_histogram(daily_data))
+        drawdown_info = complete['drawdown_info']
+        if drawdown_info:
+            drawdown_data = drawdown_info['drawdown_data']
+            stage('figures', 'drawdown_figure', lambda _: drawdown_figure(drawdown_data, max_points))
+            prefix = RollingPrefix(drawdown_data['Date and time'].to_numpy(),
+                                   np.diff(drawdown_data['Cumulative_PnL'].to_numpy(), prepend=0.0))
+            stage('figures', 'rolling_figure', lambda _: rolling_figure(prefix.rolling(50), max_points))
+    return records
+
+
+def save_records(records: List[Dict[str, Any]], output: str, run: Dict[str, Any]) -> None:
+    '''Ajoute les mesures au fichier JSON Lines (une ligne par etape, avec l'identifiant de l'execution)'''
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'a', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps({**run, **record}) + '\n')
+
+
+def print_records(records: List[Dict[str, Any]]) -> None:
+    table = pd.DataFrame(records)
+    table['stage'] = table['group'] + '/' + table['stage'] + table['format'].map(lambda f: f' ({f})' if isinstance(f, str) else '')
+    table['ms'] = table['seconds'] * 1000
+    print(table[['trades', 'stage', 'ms', 'peak_mb', 'trades_per_s', 'error']].round(1).to_string(index=False))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark par etape sur des exports TradingView synthetiques')
+    parser.add_argument('--trades', type=int, nargs='+', default=[1_000, 10_000, 100_000])
+    parser.add_argument('--format', nargs='+', choices=FORMATS, default=list(FORMATS))
+    parser.add_argument('--seed', type=int, default=config.MONTE_CARLO_SEED)
+    parser.add_argument('--repeat', type=int, default=1, help='Executions chronometrees par etape (meilleur temps)')
+    parser.add_argument('--no-memory', action='store_true', help='Ne pas mesurer le pic memoire (tracemalloc)')
+    parser.add_argument('--output', default=config.BENCHMARK_RESULTS, help='Fichier JSON Lines des mesures')
+    parser.add_argument('--workdir', help='Dossier des exports generes (temporaire et supprime par defaut)')
+    args = parser.parse_args()
+
+    run = {'run': datetime.now().isoformat(timespec='seconds'), 'seed': args.seed, 'repeat': args.repeat, **environment()}
+    for n_trades in sorted(args.trades):
+        with tempfile.TemporaryDirectory() as tmp:
+            workdir = args.workdir or tmp
+            records = run_benchmark(n_trades, args.format, workdir, args.seed, args.repeat, not args.no_memory)
+        save_records(records, args.output, run)
+        print_records(records)
+    print(f'Mesures ajoutees a {args.output}')
+
+
+if __name__ == '__main__':
+    main()
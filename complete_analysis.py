@@ -3,6 +3,8 @@ import pandas as pd
 import numpy as np
 from datetime import datetime
 import os
+from data_extractor import TradingViewDataExtractor
+from metrics import grouped_metrics, long_flags, win_flags
 
 # Creation du dossier reports si necessaire
 if not os.path.exists('reports'):
@@ -19,8 +21,8 @@ file_path = xlsx_files[0]
 base_name = os.path.splitext(os.path.basename(file_path))[0]
 print(f'Analyse du fichier: {file_path}')
 
-# Lire les donnees
-trades_df = pd.read_excel(file_path, sheet_name='List of trades')
+# Lire les donnees (cache Parquet si le fichier n'a pas change)
+trades_df = TradingViewDataExtractor(file_path).load_trades()
 print(f'Nombre total d_entrees: {len(trades_df)}')
 
 # Filtrer uniquement les sorties (exits) pour l_analyse
@@ -31,35 +33,33 @@ print(f'Nombre de trades analysables: {len(exit_trades)}')
 # ANALYSE QUOTIDIENNE
 print('Calcul des performances quotidiennes...')
 exit_trades['Date'] = exit_trades['Date and time'].dt.date
-daily_analysis = exit_trades.groupby('Date').agg({
-    'Net P&L JPY': ['sum', 'mean', 'count'],
-    'Net P&L %': ['sum', 'mean']
-}).reset_index()
-daily_analysis.columns = ['Date', 'Total_PnL_JPY', 'Avg_PnL_JPY', 'Trade_Count', 'Total_PnL_Pct', 'Avg_PnL_Pct']
+wins = win_flags(exit_trades['Net P&L JPY'])
 
-# Calcul du winrate quotidien
-exit_trades['Win'] = exit_trades['Net P&L JPY'] > 0
-daily_winrate = exit_trades.groupby('Date')['Win'].apply(lambda x: x.sum() / len(x) * 100).reset_index()
-daily_winrate.columns = ['Date', 'Win_Rate']
-daily_analysis = pd.merge(daily_analysis, daily_winrate, on='Date')
+# Sommes, moyennes et winrate quotidien dans une seule agregation
+daily_analysis = grouped_metrics(exit_trades, 'Date', {
+    'Total_PnL_JPY': ('Net P&L JPY', 'sum'),
+    'Avg_PnL_JPY': ('Net P&L JPY', 'mean'),
+    'Trade_Count': ('Net P&L JPY', 'count'),
+    'Total_PnL_Pct': ('Net P&L %', 'sum'),
+    'Avg_PnL_Pct': ('Net P&L %', 'mean')
+}, wins=wins)
 
 # ANALYSE MENSUELLE
 print('Calcul des performances mensuelles...')
 exit_trades['Month'] = exit_trades['Date and time'].dt.to_period('M')
-monthly_analysis = exit_trades.groupby('Month').agg({
-    'Net P&L JPY': ['sum', 'mean', 'std', 'count'],
-    'Net P&L %': ['sum', 'mean', 'std']
-}).reset_index()
-monthly_analysis.columns = ['Month', 'Total_PnL_JPY', 'Avg_PnL_JPY', 'Std_PnL_JPY', 'Trade_Count', 'Total_PnL_Pct', 'Avg_PnL_Pct', 'Std_PnL_Pct']
-
-# Calcul du winrate mensuel
-monthly_winrate = exit_trades.groupby('Month')['Win'].apply(lambda x: x.sum() / len(x) * 100).reset_index()
-monthly_winrate.columns = ['Month', 'Win_Rate']
-monthly_analysis = pd.merge(monthly_analysis, monthly_winrate, on='Month')
+monthly_analysis = grouped_metrics(exit_trades, 'Month', {
+    'Total_PnL_JPY': ('Net P&L JPY', 'sum'),
+    'Avg_PnL_JPY': ('Net P&L JPY', 'mean'),
+    'Std_PnL_JPY': ('Net P&L JPY', 'std'),
+    'Trade_Count': ('Net P&L JPY', 'count'),
+    'Total_PnL_Pct': ('Net P&L %', 'sum'),
+    'Avg_PnL_Pct': ('Net P&L %', 'mean'),
+    'Std_PnL_Pct': ('Net P&L %', 'std')
+}, wins=wins)
 
 # ANALYSE DU BIAS (Long/Short)
 print('Calcul du biais Long/Short...')
-long_trades = len(exit_trades[exit_trades['Type'].str.contains('long', case=False)])
+long_trades = int(long_flags(exit_trades['Type']).sum())
 short_trades = len(exit_trades[exit_trades['Type'].str.contains('short', case=False)])
 total_trades = len(exit_trades)
 bias_stats = {
@@ -74,16 +74,13 @@ bias_stats = {
 print('Calcul de l_analyse hebdomadaire avancee...')
 exit_trades['Weekday'] = exit_trades['Date and time'].dt.day_name()
 exit_trades['Month_Name'] = exit_trades['Date and time'].dt.month_name()
-weekly_analysis = exit_trades.groupby(['Month_Name', 'Weekday']).agg({
-    'Net P&L JPY': ['mean', 'std', 'count'],
-    'Net P&L %': ['mean', 'std']
-}).reset_index()
-weekly_analysis.columns = ['Month', 'Weekday', 'Avg_PnL_JPY', 'Std_PnL_JPY', 'Trade_Count', 'Avg_PnL_Pct', 'Std_PnL_Pct']
-
-# Calcul du winrate hebdomadaire
-weekly_winrate = exit_trades.groupby(['Month_Name', 'Weekday'])['Win'].apply(lambda x: x.sum() / len(x) * 100 if len(x) > 0 else 0).reset_index()
-weekly_winrate.columns = ['Month', 'Weekday', 'Win_Rate']
-weekly_analysis = pd.merge(weekly_analysis, weekly_winrate, on=['Month', 'Weekday'])
+weekly_analysis = grouped_metrics(exit_trades, ['Month_Name', 'Weekday'], {
+    'Avg_PnL_JPY': ('Net P&L JPY', 'mean'),
+    'Std_PnL_JPY': ('Net P&L JPY', 'std'),
+    'Trade_Count': ('Net P&L JPY', 'count'),
+    'Avg_PnL_Pct': ('Net P&L %', 'mean'),
+    'Std_PnL_Pct': ('Net P&L %', 'std')
+}, wins=wins).rename(columns={'Month_Name': 'Month'})
 
 # SAUVEGARDE DES RAPPORTS
 print('Generation des rapports...')
@@ -97,7 +94,7 @@ print('\n=== RESUME DE L_ANALYSE ===')
 print(f'Nombre de trades: {total_trades}')
 total_pl = exit_trades['Net P&L JPY'].sum()
 print(f'P and L total: {total_pl:,.2f} JPY')
-win_rate = (exit_trades['Net P&L JPY'] > 0).sum() / len(exit_trades) * 100
+win_rate = wins.mean() * 100
 print(f'Win rate: {win_rate:.2f}%')
 print(f'Biais Long: {bias_stats["long_percentage"]:.2f}% ({long_trades} trades)')
 print(f'Biais Short: {bias_stats["short_percentage"]:.2f}% ({short_trades} trades)')
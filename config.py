@@ -16,3 +16,59 @@ TIME_COLUMNS = ['Entry Time', 'Exit Time', 'Entry', 'Exit']
 # Parametres d'analyse
 MIN_TRADES_FOR_ANALYSIS = 10
 CONFIDENCE_LEVEL = 0.95
+
+# Cache Parquet de la feuille 'List of trades'
+CACHE_DIR = os.path.join(BASE_DIR, '.cache', 'trades')
+CACHE_MAX_BYTES = 1024 * 1024 * 1024  # 1 Go
+
+# Nombre de processus pour l'analyse parallele des fichiers
+MAX_WORKERS = os.cpu_count() or 1
+
+# Mode incremental : etat sauvegarde par strategie (re-exports successifs)
+INCREMENTAL_MODE = True
+STATE_DIR = os.path.join(BASE_DIR, '.cache', 'state')
+
+# Cache memoire des resultats d'analyse partage par les sessions du dashboard
+RESULT_CACHE_MAX_BYTES = 512 * 1024 * 1024  # 512 Mo
+
+# Simulations Monte Carlo (bootstrap / permutation des trades)
+MONTE_CARLO_PATHS = 10000
+MONTE_CARLO_SEED = 42
+MONTE_CARLO_MAX_BYTES = 256 * 1024 * 1024  # memoire max d'un bloc de simulations
+
+# Test de permutation des cellules du tableau de verite (jour x actif)
+SIGNIFICANCE_PERMUTATIONS = 10000
+SIGNIFICANCE_MAX_BYTES = 64 * 1024 * 1024
+# p-values calculees pendant l'analyse de chaque fichier (sinon a la demande, depuis le
+# tableau de verite du dashboard, et memorisees par contenu de fichier)
+SIGNIFICANCE_ON_ANALYSIS = False
+
+# Seuils par defaut du tableau de verite (modifiables dans la barre laterale du dashboard)
+TRUTH_WIN_RATE_THRESHOLD = 50.0  # win rate (%) au-dela duquel le signal est de bonne qualite
+TRUTH_PNL_THRESHOLD = 0.0  # P&L total au-dela duquel le jour est rentable
+TRUTH_MIN_TRADES = 1  # cellules avec moins de trades affichees N/A
+TRUTH_ASSETS_AS_ROWS_ABOVE = 30  # au-dela, actifs en lignes (grille virtualisee verticalement)
+
+# Surveillance du dossier des exports (python watcher.py)
+WATCH_POLL_SECONDS = 1.0  # intervalle entre deux scans du dossier
+WATCH_DEBOUNCE_SECONDS = 2.0  # taille et date inchangees pendant ce delai = ecriture terminee
+WATCH_QUEUE_SIZE = 32  # fichiers admis en attente au-dela des processus occupes
+
+# Base analytique SQLite : trades normalises et agregats de tous les exports
+ANALYTICS_DB = os.path.join(BASE_DIR, '.cache', 'analytics.sqlite')
+
+# Graphiques : nombre maximum de points envoyes au navigateur par courbe, et
+# taille a partir de laquelle les courbes passent en WebGL (Scattergl)
+CHART_MAX_POINTS = 2000
+WEBGL_THRESHOLD = 1000
+FIGURE_CACHE_SIZE = 64  # figures memorisees par session du dashboard
+
+# Exports synthetiques et benchmarks (python synthetic_export.py / python benchmark_suite.py)
+SYNTHETIC_DIR = os.path.join(BASE_DIR, '.cache', 'synthetic')
+SYNTHETIC_CHUNK_TRADES = 500_000  # trades generes et ecrits par bloc (memoire bornee)
+BENCHMARK_RESULTS = os.path.join(REPORTS_DIR, 'benchmarks.jsonl')  # une ligne JSON par etape mesuree
+
+# Instrumentation par etape (instrumentation.py) : une trace par fichier analyse.
+# Les spans ne coutent rien hors d'une trace ; TV_INSTRUMENTATION=0 desactive les traces
+INSTRUMENTATION = os.environ.get('TV_INSTRUMENTATION', '1') != '0'
+INSTRUMENTATION_MEMORY = False  # pic memoire tracemalloc par etape (ralentit l'analyse)
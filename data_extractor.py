@@ -1,50 +1,197 @@
 import pandas as pd
 import numpy as np
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterator, List, Mapping, Optional
 import warnings
+from trades_cache import TradesCache
+from instrumentation import span, traced
 warnings.filterwarnings('ignore')
 
+# Cache partage par tous les extracteurs du processus
+_default_cache = TradesCache()
+
+TRADES_SHEET = 'List of trades'
+
+
+class LazySheets(Mapping):
+    '''Dictionnaire des feuilles d'un classeur, chaque feuille n'est lue qu'au premier acces'''
+
+    def __init__(self, extractor: 'TradingViewDataExtractor'):
+        self._extractor = extractor
+
+    def __getitem__(self, sheet_name: str) -> pd.DataFrame:
+        if sheet_name not in self._extractor.sheet_names:
+            raise KeyError(sheet_name)
+        return self._extractor.get_sheet(sheet_name)
+
+    def __iter__(self):
+        return iter(self._extractor.sheet_names)
+
+    def __len__(self) -> int:
+        return len(self._extractor.sheet_names)
+
+
 class TradingViewDataExtractor:
-    '''Classe pour extraire les donnees des fichiers XLSX de TradingView'''
-    
-    def __init__(self, file_path: str):
+    '''
+    Classe pour extraire les donnees des fichiers XLSX de TradingView
+
+    Le classeur est ouvert une seule fois et chaque feuille n'est parsee
+    qu'au premier acces.
+    '''
+
+    def __init__(self, file_path: str, cache: Optional[TradesCache] = _default_cache):
         self.file_path = file_path
         self.data_sheets = {}
-        
-    def load_data(self) -> Dict[str, pd.DataFrame]:
-        '''Charge toutes les feuilles du fichier XLSX'''
+        self.cache = cache
+        self._workbook = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def workbook(self) -> pd.ExcelFile:
+        '''Classeur ouvert a la demande et conserve pour les lectures suivantes'''
+        if self._workbook is None:
+            with span('ExcelFile'):
+                self._workbook = pd.ExcelFile(self.file_path)
+        return self._workbook
+
+    @property
+    def sheet_names(self) -> List[str]:
+        return self.workbook.sheet_names
+
+    def close(self) -> None:
+        '''Ferme le classeur (les feuilles deja lues restent disponibles)'''
+        if self._workbook is not None:
+            self._workbook.close()
+            self._workbook = None
+
+    @traced()
+    def get_sheet(self, sheet_name: str, **read_kwargs) -> pd.DataFrame:
+        '''Parse une feuille au premier acces puis la garde en memoire'''
+        if sheet_name not in self.data_sheets:
+            self.data_sheets[sheet_name] = self.workbook.parse(sheet_name, **read_kwargs)
+        return self.data_sheets[sheet_name]
+
+    def load_data(self) -> Mapping[str, pd.DataFrame]:
+        '''Ouvre le fichier XLSX et retourne ses feuilles (lues seulement a l'acces)'''
         try:
-            excel_file = pd.ExcelFile(self.file_path)
-            
-            for sheet_name in excel_file.sheet_names:
-                self.data_sheets[sheet_name] = pd.read_excel(
-                    self.file_path,
-                    sheet_name=sheet_name
-                )
-                
-            print(f'Fichier charge avec {len(self.data_sheets)} feuilles')
-            return self.data_sheets
-            
+            sheets = LazySheets(self)
+            print(f'Fichier charge avec {len(sheets)} feuilles')
+            return sheets
+
         except Exception as e:
             print(f'Erreur lors du chargement du fichier: {e}')
             return {}
-    
-    def parse_trades_list(self) -> pd.DataFrame:
+
+    @traced()
+    def load_trades(self, usecols: Optional[List[str]] = None,
+                    dtype: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+        '''
+        Charge uniquement la feuille 'List of trades', via le cache Parquet si disponible
+
+        Args:
+            usecols: Colonnes a conserver (toutes par defaut)
+            dtype: Types a appliquer aux colonnes
+        '''
+        if TRADES_SHEET in self.data_sheets:
+            df = self.data_sheets[TRADES_SHEET]
+            df = df[usecols] if usecols is not None else df
+            df = df.astype(dtype) if dtype is not None else df
+        elif self.cache is not None and self.cache.enabled:
+            # Le cache conserve toujours la feuille complete, seules les colonnes demandees sont relues
+            df = self.cache.get_or_load(
+                self.file_path,
+                self._read_trades_sheet,
+                columns=usecols
+            )
+            df = df.astype(dtype) if dtype is not None else df
+        else:
+            df = self._read_trades_sheet(usecols, dtype)
+
+        if usecols is None and dtype is None:
+            self.data_sheets[TRADES_SHEET] = df
+        return df
+
+    @traced('read_excel')
+    def _read_trades_sheet(self, usecols: Optional[List[str]] = None,
+                           dtype: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+        return self.workbook.parse(TRADES_SHEET, usecols=usecols, dtype=dtype)
+
+    def iter_sheet_chunks(self, sheet_name: str = TRADES_SHEET, chunksize: int = 50000,
+                          usecols: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+        '''
+        Lit une feuille ligne par ligne (openpyxl en lecture seule) et produit des blocs
+        de chunksize lignes, sans charger toute la feuille en memoire
+        '''
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(self.file_path, read_only=True, data_only=True)
+        try:
+            rows = workbook[sheet_name].iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                return
+            header = list(header)
+            indices = [header.index(col) for col in usecols] if usecols is not None else list(range(len(header)))
+            columns = [header[i] for i in indices]
+
+            chunk = []
+            for row in rows:
+                chunk.append([row[i] for i in indices])
+                if len(chunk) >= chunksize:
+                    yield pd.DataFrame(chunk, columns=columns)
+                    chunk = []
+            if chunk:
+                yield pd.DataFrame(chunk, columns=columns)
+        finally:
+            workbook.close()
+
+    def parse_trades_list(self, usecols: Optional[List[str]] = None,
+                          dtype: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
         '''Parse la feuille 'List of trades' pour extraire les informations pertinentes'''
-        if 'List of trades' not in self.data_sheets:
+        if TRADES_SHEET not in self.data_sheets and TRADES_SHEET not in self.sheet_names:
             print('Feuille ''List of trades'' non trouvee')
             return pd.DataFrame()
-        
-        df = self.data_sheets['List of trades']
-        
-        # Afficher les premires lignes pour inspection
+
+        df = self.load_trades(usecols=usecols, dtype=dtype)
+
+        # Afficher les premières lignes pour inspection
         print('Structure de la feuille List of trades:')
         print(df.head())
-        
+
         return df
-    
+
+    @traced()
+    def parse_closed_trades(self) -> pd.DataFrame:
+        '''
+        Une ligne par trade ferme, au format de TradingPerformanceAnalyzer
+
+        La feuille 'List of trades' contient une ligne Entry et une ligne Exit par
+        trade : la ligne Exit donne le P&L et la date de sortie, la ligne Entry la
+        date d'entree. Type devient 'Long' / 'Short'.
+        '''
+        if TRADES_SHEET not in self.data_sheets and TRADES_SHEET not in self.sheet_names:
+            print('Feuille ''List of trades'' non trouvee')
+            return pd.DataFrame()
+        return closed_trades(self.load_trades())
+
     def get_performance_summary(self) -> pd.DataFrame:
         '''Recupere le resume des performances'''
-        if 'Performance' in self.data_sheets:
-            return self.data_sheets['Performance']
+        if 'Performance' in self.sheet_names:
+            return self.get_sheet('Performance')
         return pd.DataFrame()
+
+
+@traced()
+def closed_trades(trades: pd.DataFrame) -> pd.DataFrame:
+    '''Apparie les lignes Entry / Exit de la liste des trades TradingView (voir parse_closed_trades)'''
+    is_exit = trades['Type'].str.startswith('Exit')
+    entries = trades.loc[~is_exit].drop_duplicates('Trade #').set_index('Trade #')['Date and time']
+    closed = trades.loc[is_exit].drop_duplicates('Trade #').drop(columns=['Type', 'Date and time'])
+    closed.insert(1, 'Type', trades.loc[closed.index, 'Type'].str.split().str[-1].str.capitalize())
+    closed.insert(2, 'Entry Time', pd.to_datetime(closed['Trade #'].map(entries)))
+    closed.insert(3, 'Exit Time', pd.to_datetime(trades.loc[closed.index, 'Date and time']))
+    return closed.sort_values('Trade #', kind='stable').reset_index(drop=True)
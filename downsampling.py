@@ -0,0 +1,97 @@
+# Reduction du nombre de points des courbes avant affichage (equity, drawdown...)
+#
+# Les deux methodes renvoient les positions des points conserves (tries) : les
+# valeurs d'origine (dates, P&L) sont reprises telles quelles, sans interpolation.
+
+import numpy as np
+from typing import Tuple
+
+
+def _as_float(x: np.ndarray) -> np.ndarray:
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        x = x.astype('datetime64[ns]').view(np.int64)
+    elif np.issubdtype(x.dtype, np.timedelta64):
+        x = x.astype('timedelta64[ns]').view(np.int64)
+    elif x.dtype == object:
+        # Axe non numerique (dates Python, periodes) deja trie : les positions suffisent
+        return np.arange(len(x), dtype=float)
+    return x.astype(float)
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    '''
+    Largest-Triangle-Three-Buckets : garde la forme visuelle de la courbe
+
+    Le premier et le dernier point sont conserves ; chaque bucket intermediaire
+    fournit le point formant le plus grand triangle avec le point retenu dans le
+    bucket precedent et la moyenne du bucket suivant.
+    '''
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    xf, yf = _as_float(x), np.asarray(y, dtype=float)
+
+    # n_out - 2 buckets entre le premier et le dernier point
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    counts = np.diff(edges)
+    # Moyenne de chaque bucket (le bucket suivant du dernier est le point final)
+    mean_x = np.append(np.add.reduceat(xf[1:n - 1], edges[:-1] - 1) / counts, xf[-1])
+    mean_y = np.append(np.add.reduceat(yf[1:n - 1], edges[:-1] - 1) / counts, yf[-1])
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        # Double de l'aire du triangle (a, point du bucket, moyenne du bucket suivant)
+        area = np.abs((xf[a] - mean_x[i + 1]) * (yf[start:end] - yf[a])
+                      - (xf[a] - xf[start:end]) * (mean_y[i + 1] - yf[a]))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def minmax_indices(y: np.ndarray, n_buckets: int) -> np.ndarray:
+    '''
+    Premier, minimum, maximum et dernier point de chaque bucket (un bucket par pixel)
+
+    Les extremes sont exacts : le creux du drawdown maximum est toujours affiche.
+    '''
+    n = len(y)
+    if n_buckets * 4 >= n or n_buckets < 1:
+        return np.arange(n)
+    y = np.asarray(y, dtype=float)
+    starts = np.linspace(0, n, n_buckets + 1).astype(np.int64)[:-1]
+    ends = np.append(starts[1:], n)
+    bucket = np.repeat(np.arange(n_buckets), ends - starts)
+
+    # Position du premier minimum / maximum de chaque bucket
+    minima = np.repeat(np.minimum.reduceat(y, starts), ends - starts)
+    maxima = np.repeat(np.maximum.reduceat(y, starts), ends - starts)
+    first_min = np.flatnonzero(y == minima)
+    first_min = first_min[np.unique(bucket[first_min], return_index=True)[1]]
+    first_max = np.flatnonzero(y == maxima)
+    first_max = first_max[np.unique(bucket[first_max], return_index=True)[1]]
+    return np.unique(np.concatenate([starts, ends - 1, first_min, first_max]))
+
+
+def downsample(x: np.ndarray, y: np.ndarray, max_points: int,
+               method: str = 'minmax') -> Tuple[np.ndarray, np.ndarray]:
+    '''
+    Au plus max_points points de la serie (x, y)
+
+    Args:
+        method: 'minmax' (extremes exacts, ideal pour le drawdown) ou 'lttb'
+            (forme generale, ideal pour l'equity)
+    '''
+    x, y = np.asarray(x), np.asarray(y)
+    if max_points <= 0 or len(y) <= max_points:
+        return x, y
+    if method == 'lttb':
+        indices = lttb_indices(x, y, max_points)
+    elif method == 'minmax':
+        indices = minmax_indices(y, max_points // 4)
+    else:
+        raise ValueError(f"Methode inconnue: {method} ('minmax' ou 'lttb')")
+    return x[indices], y[indices]
@@ -0,0 +1,215 @@
+# Noyau de calcul du drawdown sur tableaux NumPy (un seul passage, O(n))
+
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, Optional, Sequence
+
+from instrumentation import traced
+
+# Taille maximale (en cellules) de la matrice strategies x trades d'un bloc du calcul groupe
+BATCH_MAX_CELLS = 2_000_000
+
+
+def _underwater_episodes(drawdown: np.ndarray):
+    '''Debut (inclus) et fin (exclue, = indice de recuperation) de chaque periode sous l'eau'''
+    underwater = (drawdown < 0).astype(np.int8)
+    edges = np.diff(np.concatenate(([0], underwater, [0])))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def drawdown_curve(pnl: np.ndarray, start_equity: float = 0.0, start_max: float = -np.inf):
+    '''
+    Equity, plus haut courant et drawdown (absolu et %) a partir des P&L tries par date
+
+    start_equity / start_max permettent de prolonger une courbe deja calculee
+    (mode incremental) sans repasser sur les trades precedents.
+    '''
+    pnl = np.asarray(pnl, dtype=float)
+    equity = start_equity + np.cumsum(pnl)
+    running_max = np.maximum(np.maximum.accumulate(equity), start_max) if len(pnl) else equity
+    drawdown = equity - running_max
+    with np.errstate(divide='ignore', invalid='ignore'):
+        drawdown_pct = np.where(running_max != 0, drawdown / running_max * 100, np.nan)
+    return equity, running_max, drawdown, drawdown_pct
+
+
+@traced()
+def drawdown_kernel(pnl: np.ndarray, times: Optional[np.ndarray] = None, top_n: int = 5) -> Dict[str, Any]:
+    '''
+    Calcule equity, plus haut courant et drawdown a partir des P&L tries par date
+
+    Args:
+        pnl: P&L de chaque trade, dans l'ordre chronologique
+        times: Dates de sortie correspondantes (optionnel, pour les durees)
+        top_n: Nombre de pires episodes de drawdown a retourner
+
+    Returns:
+        Dict: tableaux equity / running_max / drawdown / drawdown_pct et statistiques
+        (max, courant, plus longue periode sous l'eau, temps de recuperation, episodes)
+    '''
+    equity, running_max, drawdown, drawdown_pct = drawdown_curve(pnl)
+    return drawdown_statistics(equity, running_max, drawdown, drawdown_pct, times, top_n)
+
+
+def drawdown_statistics(equity: np.ndarray, running_max: np.ndarray, drawdown: np.ndarray,
+                        drawdown_pct: np.ndarray, times: Optional[np.ndarray] = None,
+                        top_n: int = 5) -> Dict[str, Any]:
+    '''Statistiques et episodes de drawdown a partir des courbes deja calculees'''
+    n = len(equity)
+    result = {
+        'equity': equity,
+        'running_max': running_max,
+        'drawdown': drawdown,
+        'drawdown_pct': drawdown_pct,
+        'max_drawdown': float(drawdown.min()) if n else 0.0,
+        'max_drawdown_pct': float(np.nanmin(drawdown_pct)) if n and not np.isnan(drawdown_pct).all() else np.nan,
+        'current_drawdown': float(drawdown[-1]) if n else 0.0,
+        'current_drawdown_pct': float(drawdown_pct[-1]) if n else np.nan,
+        'longest_underwater_trades': 0,
+        'longest_underwater_duration': None,
+        'max_drawdown_recovery_trades': None,
+        'max_drawdown_recovery_time': None,
+        'episodes': pd.DataFrame(columns=[
+            'Peak_Index', 'Trough_Index', 'Recovery_Index', 'Depth', 'Depth_Pct',
+            'Underwater_Trades', 'Recovery_Trades'
+        ])
+    }
+
+    starts, ends = _underwater_episodes(drawdown)
+    if len(starts) == 0:
+        return result
+
+    # Creux de chaque episode : minimum par segment puis premiere position atteignant ce minimum
+    depths = np.minimum.reduceat(drawdown, starts)
+    underwater_idx = np.flatnonzero(drawdown < 0)
+    episode_ids = np.repeat(np.arange(len(starts)), ends - starts)
+    at_trough = drawdown[underwater_idx] == depths[episode_ids]
+    _, first = np.unique(episode_ids[at_trough], return_index=True)
+    troughs = underwater_idx[at_trough][first]
+
+    peaks = starts - 1
+    recovered = ends < n
+    recovery_idx = np.where(recovered, ends, -1)
+    underwater_trades = ends - starts
+    recovery_trades = np.where(recovered, ends - troughs, -1)
+
+    order = np.argsort(depths, kind='stable')[:top_n]
+    episodes = pd.DataFrame({
+        'Peak_Index': peaks[order],
+        'Trough_Index': troughs[order],
+        'Recovery_Index': recovery_idx[order],
+        'Depth': depths[order],
+        'Depth_Pct': drawdown_pct[troughs[order]],
+        'Underwater_Trades': underwater_trades[order],
+        'Recovery_Trades': recovery_trades[order]
+    })
+
+    longest = int(np.argmax(underwater_trades))
+    worst = int(np.argmin(depths))
+    result['longest_underwater_trades'] = int(underwater_trades[longest])
+    result['max_drawdown_recovery_trades'] = int(recovery_trades[worst]) if recovered[worst] else None
+
+    if times is not None:
+        times = np.asarray(times)
+        end_times = np.where(recovered, times[np.minimum(ends, n - 1)], times[-1])
+        underwater_durations = end_times - times[peaks]
+        result['longest_underwater_duration'] = pd.Timedelta(underwater_durations.max())
+        if recovered[worst]:
+            result['max_drawdown_recovery_time'] = pd.Timedelta(times[ends[worst]] - times[troughs[worst]])
+
+        episodes['Peak_Time'] = times[peaks[order]]
+        episodes['Trough_Time'] = times[troughs[order]]
+        episodes['Recovery_Time'] = pd.Series(times[np.minimum(ends[order], n - 1)]).where(recovered[order]).values
+        episodes['Duration'] = underwater_durations[order]
+
+    result['episodes'] = episodes
+    return result
+
+
+@traced()
+def batch_drawdown_summary(pnl_series: Sequence[np.ndarray], names: Optional[Sequence[str]] = None,
+                           times: Optional[Sequence[np.ndarray]] = None,
+                           max_cells: int = BATCH_MAX_CELLS) -> pd.DataFrame:
+    '''
+    Equity, plus haut courant et drawdown de N strategies calcules ensemble (matrice 2-D)
+
+    Les series de longueurs differentes sont triees par longueur puis traitees par
+    blocs de lignes (au plus max_cells cellules par bloc) ; chaque ligne est completee
+    par des P&L nuls, qui ne modifient ni l'equity ni le plus haut courant.
+
+    Args:
+        pnl_series: P&L chronologiques de chaque strategie
+        names: Nom de chaque strategie (index 0..N-1 par defaut)
+        times: Dates de sortie de chaque strategie (optionnel, date du drawdown max)
+        max_cells: Taille maximale d'un bloc
+
+    Returns:
+        pd.DataFrame: Une ligne par strategie (Trades, Total_PnL, Peak_Equity,
+        Max_Drawdown, Max_Drawdown_Pct, Current_Drawdown, Current_Drawdown_Pct,
+        Longest_Underwater_Trades et Max_Drawdown_Time si times est fourni)
+    '''
+    n = len(pnl_series)
+    lengths = np.array([len(series) for series in pnl_series], dtype=np.int64)
+    summary = {
+        'Trades': lengths,
+        'Total_PnL': np.zeros(n),
+        'Peak_Equity': np.full(n, np.nan),
+        'Max_Drawdown': np.zeros(n),
+        'Max_Drawdown_Pct': np.full(n, np.nan),
+        'Current_Drawdown': np.zeros(n),
+        'Current_Drawdown_Pct': np.full(n, np.nan),
+        'Longest_Underwater_Trades': np.zeros(n, dtype=np.int64)
+    }
+    troughs = np.zeros(n, dtype=np.int64)
+
+    order = np.argsort(lengths, kind='stable')
+    order = order[lengths[order] > 0]
+    start = 0
+    while start < len(order):
+        # Bloc le plus grand possible dont la matrice (lignes x plus longue serie) tient dans max_cells
+        stop = start + 1
+        while stop < len(order) and (stop - start + 1) * lengths[order[stop]] <= max_cells:
+            stop += 1
+        rows = order[start:stop]
+        row_lengths = lengths[rows]
+        width = int(row_lengths.max())
+
+        valid = np.arange(width) < row_lengths[:, None]
+        equity = np.zeros((len(rows), width))
+        equity[valid] = np.concatenate([np.asarray(pnl_series[i], dtype=float) for i in rows])
+        np.cumsum(equity, axis=1, out=equity)
+        running_max = np.maximum.accumulate(equity, axis=1)
+        drawdown = equity - running_max
+        with np.errstate(divide='ignore', invalid='ignore'):
+            drawdown_pct = np.where(running_max != 0, drawdown / running_max * 100, np.nan)
+
+        line = np.arange(len(rows))
+        last = row_lengths - 1
+        trough = np.argmin(drawdown, axis=1)
+        summary['Total_PnL'][rows] = equity[line, last]
+        summary['Peak_Equity'][rows] = running_max[line, last]
+        summary['Max_Drawdown'][rows] = drawdown[line, trough]
+        summary['Current_Drawdown'][rows] = drawdown[line, last]
+        summary['Current_Drawdown_Pct'][rows] = drawdown_pct[line, last]
+        drawdown_pct[~valid] = np.nan
+        has_pct = ~np.isnan(drawdown_pct).all(axis=1)
+        summary['Max_Drawdown_Pct'][rows[has_pct]] = np.nanmin(drawdown_pct[has_pct], axis=1)
+        troughs[rows] = trough
+
+        # Plus longue periode sous l'eau : longueur des segments consecutifs de drawdown < 0
+        underwater = ((drawdown < 0) & valid).astype(np.int8)
+        edges = np.diff(underwater, axis=1, prepend=0, append=0)
+        episode_rows, episode_starts = np.nonzero(edges == 1)
+        _, episode_ends = np.nonzero(edges == -1)
+        longest = np.zeros(len(rows), dtype=np.int64)
+        np.maximum.at(longest, episode_rows, episode_ends - episode_starts)
+        summary['Longest_Underwater_Trades'][rows] = longest
+
+        start = stop
+
+    result = pd.DataFrame(summary, index=pd.Index(names if names is not None else range(n), name='Strategy'))
+    if times is not None:
+        result['Max_Drawdown_Time'] = [
+            pd.Timestamp(np.asarray(t)[troughs[i]]) if lengths[i] else pd.NaT for i, t in enumerate(times)
+        ]
+    return result
@@ -0,0 +1,65 @@
+# Metadonnees encodees dans le nom des exports TradingView
+#
+#   v3_STRATEGY_BOA_avec_param_1__VANTAGE_GBPJPY_2026-01-14_c678a.xlsx
+#   |  |             |              |       |      |          '- hash d'export
+#   |  |             |              |       |      '- date d'export
+#   |  |             |              |       '- actif
+#   |  |             |              '- courtier
+#   |  |             '- jeu de parametres
+#   |  '- strategie
+#   '- version
+
+import os
+import re
+from typing import Dict, Optional
+
+_EXPORT_NAME = re.compile(r'^(?P<body>.*?)_(?P<date>\d{4}-\d{2}-\d{2})(?:_(?P<hash>[0-9A-Za-z]+))?$')
+_VERSION = re.compile(r'^v\d+$', re.IGNORECASE)
+_PARAMS = re.compile(r'(?:^|_)(?P<params>(?:(?:avec|sans|with|no)_)?params?(?:_.*)?)$', re.IGNORECASE)
+
+
+def parse_export_name(file_name: str) -> Dict[str, Optional[str]]:
+    '''
+    Decoupe le nom d'un export en champs structures
+
+    Le nom est de la forme [version_]strategie[_parametres]__COURTIER_ACTIF_date[_hash].
+    Sans double underscore, le marche est forme des deux derniers elements avant la date.
+    Les champs introuvables valent None.
+
+    Returns:
+        Dict: version, strategy, params, broker, asset, export_date, export_hash et
+        variant (nom sans date ni hash : identifie les re-exports d'une meme variante)
+    '''
+    stem = os.path.splitext(os.path.basename(file_name))[0]
+    fields = dict.fromkeys(('version', 'strategy', 'params', 'broker', 'asset', 'export_date', 'export_hash'))
+
+    match = _EXPORT_NAME.match(stem)
+    body = stem
+    if match:
+        body = match.group('body')
+        fields['export_date'] = match.group('date')
+        fields['export_hash'] = match.group('hash')
+    fields['variant'] = body
+
+    if '__' in body:
+        strategy_part, market = body.rsplit('__', 1)
+        market_tokens = market.split('_')
+    elif body.count('_') >= 1:
+        tokens = body.split('_')
+        strategy_part, market_tokens = '_'.join(tokens[:-2]), tokens[-2:]
+    else:
+        strategy_part, market_tokens = body, []
+    if market_tokens and market_tokens[-1]:
+        fields['asset'] = market_tokens[-1]
+        fields['broker'] = '_'.join(market_tokens[:-1]) or None
+
+    tokens = [token for token in strategy_part.split('_') if token]
+    if tokens and _VERSION.match(tokens[0]):
+        fields['version'] = tokens.pop(0).lower()
+    strategy = '_'.join(tokens)
+    params = _PARAMS.search(strategy)
+    if params and params.start('params') > 0:
+        fields['params'] = params.group('params')
+        strategy = strategy[:params.start()]
+    fields['strategy'] = strategy or None
+    return fields
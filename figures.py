@@ -0,0 +1,215 @@
+# Construction des courbes Plotly du dashboard : reduction des points puis
+# trace SVG (go.Scatter) ou WebGL (go.Scattergl) selon la taille
+
+import numpy as np
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+from typing import Any, Dict
+
+import config
+from downsampling import downsample
+from instrumentation import traced
+
+
+@traced()
+def line_trace(x, y, max_points: int = config.CHART_MAX_POINTS, method: str = 'lttb',
+               webgl_threshold: int = config.WEBGL_THRESHOLD, **trace_kwargs: Any):
+    '''
+    Trace de courbe reduite a max_points points (0 = tous les points)
+
+    Args:
+        method: 'lttb' (forme de la courbe) ou 'minmax' (extremes exacts, pour le drawdown)
+        webgl_threshold: Au-dela de ce nombre de points, trace WebGL
+        trace_kwargs: Arguments de go.Scatter (mode, name, line, fill...)
+    '''
+    x, y = downsample(np.asarray(x), np.asarray(y), max_points, method)
+    trace_class = go.Scattergl if len(y) > webgl_threshold else go.Scatter
+    return trace_class(x=x, y=y, **trace_kwargs)
+
+
+def figure_payload(fig: go.Figure) -> Dict[str, int]:
+    '''Points envoyes au navigateur et taille du JSON de la figure'''
+    points = sum(len(trace.y) for trace in fig.data if getattr(trace, 'y', None) is not None)
+    return {'points': points, 'bytes': len(fig.to_json())}
+
+
+def payload_caption(fig: go.Figure, source_points: int) -> str:
+    '''Legende du type "2 000 points affiches sur 200 000 - 85 Ko envoyes (WebGL)"'''
+    payload = figure_payload(fig)
+    webgl = any(isinstance(trace, go.Scattergl) for trace in fig.data)
+    return (f"📦 {payload['points']:,} points affichés sur {source_points:,} - "
+            f"{payload['bytes'] / 1024:,.0f} Ko envoyés" + (" (WebGL)" if webgl else "")).replace(',', ' ')
+
+
+@traced()
+def equity_figure(daily_data, max_points: int = config.CHART_MAX_POINTS) -> go.Figure:
+    '''Courbe d'equity cumulee a partir du P&L quotidien'''
+    daily_sorted = daily_data.sort_values('Date')
+    fig = go.Figure()
+    fig.add_trace(line_trace(
+        daily_sorted['Date'],
+        daily_sorted['Total_PnL_JPY'].cumsum(),
+        max_points,
+        mode='lines',
+        name='Equity',
+        line=dict(color='blue', width=2),
+        fill='tonexty',
+        fillcolor='rgba(0, 100, 255, 0.2)'
+    ))
+    fig.update_layout(
+        title="Courbe d'Equity Cumulative",
+        xaxis_title="Date",
+        yaxis_title="P&L Cumulatif (JPY)"
+    )
+    return fig
+
+
+@traced()
+def monthly_figure(monthly_data) -> go.Figure:
+    '''Barres du P&L mensuel (vert / rouge)'''
+    monthly_sorted = monthly_data.sort_values('Month')
+    fig = go.Figure()
+    fig.add_trace(go.Bar(
+        x=monthly_sorted['Month'].astype(str),
+        y=monthly_sorted['Total_PnL_JPY'],
+        marker_color=np.where(monthly_sorted['Total_PnL_JPY'] > 0, 'green', 'red'),
+        name='P&L Mensuel'
+    ))
+    fig.update_layout(
+        title="Performance Mensuelle",
+        xaxis_title="Mois",
+        yaxis_title="P&L (JPY)",
+        xaxis_tickangle=-45
+    )
+    return fig
+
+
+@traced()
+def heatmap_figure(pivot, title: str, colorbar_title: str) -> go.Figure:
+    '''Heatmap jour de la semaine x mois (centree sur 0)'''
+    fig = go.Figure(data=go.Heatmap(
+        z=pivot.values,
+        x=pivot.columns,
+        y=pivot.index,
+        colorscale='RdYlGn',
+        colorbar=dict(title=colorbar_title),
+        zmid=0
+    ))
+    fig.update_layout(
+        title=title,
+        xaxis_title="Mois",
+        yaxis_title="Jour de la Semaine"
+    )
+    return fig
+
+
+@traced()
+def pnl_histogram(daily_data) -> go.Figure:
+    '''Distribution des P&L quotidiens'''
+    fig = go.Figure()
+    fig.add_trace(go.Histogram(
+        x=daily_data['Total_PnL_JPY'],
+        nbinsx=30,
+        name='Distribution des P&L',
+        marker_color='lightblue',
+        opacity=0.7
+    ))
+    fig.update_layout(
+        title="Distribution des P&L Quotidiens",
+        xaxis_title="P&L (JPY)",
+        yaxis_title="Fréquence"
+    )
+    return fig
+
+
+@traced()
+def drawdown_figure(drawdown_data, max_points: int = config.CHART_MAX_POINTS) -> go.Figure:
+    '''Drawdown en % de chaque trade (min/max par bucket : le creux reste exact)'''
+    fig = go.Figure()
+    fig.add_trace(line_trace(
+        drawdown_data['Date and time'],
+        drawdown_data['Drawdown_Percentage'],
+        max_points,
+        method='minmax',
+        mode='lines',
+        name='Drawdown %',
+        line=dict(color='red', width=2),
+        fill='tonexty',
+        fillcolor='rgba(255, 0, 0, 0.3)'
+    ))
+    fig.update_layout(
+        title="Evolution du Drawdown (%)",
+        xaxis_title="Date",
+        yaxis_title="Drawdown (%)"
+    )
+    return fig
+
+
+@traced()
+def portfolio_figure(portfolio: Dict[str, Any], max_points: int = config.CHART_MAX_POINTS) -> go.Figure:
+    '''Equity et drawdown du portefeuille combine (voir portfolio.build_portfolio)'''
+    fig = go.Figure()
+    fig.add_trace(line_trace(
+        portfolio['times'],
+        portfolio['equity'],
+        max_points,
+        mode='lines',
+        name='Equity portefeuille',
+        line=dict(color='blue', width=2)
+    ))
+    fig.add_trace(line_trace(
+        portfolio['times'],
+        portfolio['drawdown'],
+        max_points,
+        method='minmax',
+        mode='lines',
+        name='Drawdown',
+        line=dict(color='red', width=1),
+        fill='tozeroy',
+        fillcolor='rgba(255, 0, 0, 0.3)'
+    ))
+    fig.update_layout(
+        title="Equity et drawdown du portefeuille",
+        xaxis_title="Date",
+        yaxis_title="P&L (JPY)"
+    )
+    return fig
+
+
+@traced()
+def contribution_figure(contribution) -> go.Figure:
+    '''P&L total et P&L pendant le drawdown max de chaque actif du portefeuille'''
+    fig = go.Figure()
+    fig.add_trace(go.Bar(
+        x=contribution['Asset'],
+        y=contribution['Total_PnL'],
+        marker_color=np.where(contribution['Total_PnL'] > 0, 'green', 'red'),
+        name='P&L'
+    ))
+    fig.add_trace(go.Bar(
+        x=contribution['Asset'],
+        y=contribution['Max_DD_PnL'],
+        marker_color='orange',
+        name='P&L pendant le DD max'
+    ))
+    fig.update_layout(barmode='group', yaxis_title="P&L (JPY)")
+    return fig
+
+
+@traced()
+def rolling_figure(rolling, max_points: int = config.CHART_MAX_POINTS) -> go.Figure:
+    '''Metriques glissantes (voir rolling_metrics) : un panneau par indicateur'''
+    fig = make_subplots(
+        rows=5, cols=1, shared_xaxes=True, vertical_spacing=0.04,
+        subplot_titles=("Win rate (%)", "Moyenne par trade (JPY)", "Espérance (R = perte moyenne)",
+                        "Sharpe par trade", "Profit factor")
+    )
+    x = rolling['Date and time']
+    for row, column, name in ((1, 'Win_Rate', 'Win rate'), (2, 'Mean', 'Moyenne'), (3, 'Expectancy_R', 'Espérance (R)'),
+                              (4, 'Sharpe', 'Sharpe'), (5, 'Profit_Factor', 'Profit factor')):
+        fig.add_trace(line_trace(x, rolling[column], max_points, mode='lines', name=name), row=row, col=1)
+    # Seuils de reference : 50 % de reussite, moyenne / esperance / Sharpe nuls, profit factor de 1
+    for row, level in ((1, 50), (2, 0), (3, 0), (4, 0), (5, 1)):
+        fig.add_hline(y=level, line_dash='dash', line_color='gray', row=row, col=1)
+    fig.update_layout(height=1100, showlegend=False)
+    return fig
@@ -0,0 +1,223 @@
+# Mode incremental : re-exports successifs d'une meme strategie
+#
+# Un nouvel export TradingView d'une strategie reprend tous les trades du
+# precedent puis en ajoute quelques-uns. On detecte ce prefixe commun (Trade #
+# et dates) et on ne traite que les nouvelles lignes : le cube d'agregation et
+# la courbe equity / plus haut courant sont prolonges a partir de l'etat sauvegarde.
+
+import os
+import pickle
+import re
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, Optional, Tuple
+
+import config
+from aggregation import TradeCube
+from backtest_analysis import build_drawdown_info
+from drawdown import drawdown_curve, drawdown_statistics
+from instrumentation import traced
+
+STATE_VERSION = 3
+TRADE_COLUMN = 'Trade #'
+TIME_COLUMN = 'Date and time'
+PNL_COLUMN = 'Net P&L JPY'
+
+# Suffixe date + hash ajoute par TradingView a chaque export (_2026-01-14_c678a)
+_EXPORT_SUFFIX = re.compile(r'_\d{4}-\d{2}-\d{2}(_[0-9A-Za-z]+)?$')
+
+
+def strategy_key(file_path: str) -> str:
+    '''Identifiant de la strategie : nom du fichier sans la date ni le hash d'export'''
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    return _EXPORT_SUFFIX.sub('', stem)
+
+
+def sort_by_trade(trades: pd.DataFrame, trade_column: str = TRADE_COLUMN) -> pd.DataFrame:
+    '''Trades dans l'ordre des numeros (l'export TradingView est souvent en ordre inverse)'''
+    if trades[trade_column].is_monotonic_increasing:
+        return trades
+    return trades.sort_values(trade_column, kind='stable')
+
+
+def prefix_signature(trades: pd.DataFrame, trade_column: str = TRADE_COLUMN,
+                     time_column: str = TIME_COLUMN, pnl_column: str = PNL_COLUMN) -> Dict[str, Any]:
+    '''
+    Signature des trades deja traites (tries par Trade #) permettant de
+    reconnaitre un export qui les prolonge : Trade #, dates et P&L de chaque trade
+    '''
+    if trades.empty:
+        return {'n_trades': 0}
+    return {
+        'n_trades': len(trades),
+        'trade_numbers': trades[trade_column].to_numpy(copy=True),
+        'times': trades[time_column].to_numpy(copy=True),
+        'pnl': trades[pnl_column].to_numpy(dtype=float, copy=True)
+    }
+
+
+def find_new_rows(signature: Optional[Dict[str, Any]], trades: pd.DataFrame,
+                  trade_column: str = TRADE_COLUMN, time_column: str = TIME_COLUMN,
+                  pnl_column: str = PNL_COLUMN) -> Optional[int]:
+    '''
+    Position du premier nouveau trade si trades (tries par Trade #) prolonge
+    les trades decrits par signature, None sinon (recalcul complet necessaire)
+
+    Les n premiers trades doivent avoir exactement les memes Trade #, dates et
+    P&L que les trades deja traites (comparaison vectorisee de tout le prefixe :
+    un trade modifie ou encore ouvert lors de l'export precedent impose un
+    recalcul complet). Les nouveaux trades doivent sortir apres les anciens
+    pour que la courbe equity puisse etre prolongee telle quelle.
+    '''
+    if not signature or signature['n_trades'] == 0:
+        return None
+    n = signature['n_trades']
+    if len(trades) < n:
+        return None
+
+    trade_numbers = trades[trade_column].to_numpy()
+    times = trades[time_column].to_numpy()
+    pnl = trades[pnl_column].to_numpy(dtype=float)
+    if not (np.array_equal(trade_numbers[:n], signature['trade_numbers'])
+            and np.array_equal(times[:n], signature['times'])
+            and np.array_equal(pnl[:n], signature['pnl'], equal_nan=True)):
+        return None
+
+    if n < len(trades):
+        if trade_numbers[n] <= trade_numbers[n - 1] or times[n:].min() < times[:n].max():
+            return None
+    return n
+
+
+def _chronological(trades: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+    times = trades[TIME_COLUMN].to_numpy()
+    order = np.argsort(times, kind='stable')
+    return times[order], trades[PNL_COLUMN].to_numpy(dtype=float)[order]
+
+
+def _make_state(key: str, ordered: pd.DataFrame, cube: TradeCube, times: np.ndarray,
+                pnl: np.ndarray, curve: Tuple[np.ndarray, ...]) -> Dict[str, Any]:
+    equity, running_max, drawdown, drawdown_pct = curve
+    return {
+        'version': STATE_VERSION,
+        'key': key,
+        'signature': prefix_signature(ordered),
+        'cube_table': cube.table,
+        'pnl_center': cube.pnl_center,
+        'pct_center': cube.pct_center,
+        'times': times,
+        'pnl': pnl,
+        'equity': equity,
+        'running_max': running_max,
+        'drawdown': drawdown,
+        'drawdown_pct': drawdown_pct
+    }
+
+
+def state_cube(state: Dict[str, Any]) -> TradeCube:
+    '''Cube d'agregation reconstruit depuis l'etat'''
+    return TradeCube.from_table(state['cube_table'], state['pnl_center'], state['pct_center'])
+
+
+def update_state(key: str, state: Optional[Dict[str, Any]],
+                 exit_trades: pd.DataFrame) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    '''
+    Met a jour l'etat d'une strategie avec un nouvel export
+
+    Returns:
+        Tuple: (nouvel etat, {'mode': 'full' | 'incremental', 'new_trades': int})
+    '''
+    ordered = sort_by_trade(exit_trades)
+    if state is not None and state.get('version') != STATE_VERSION:
+        state = None
+    start = find_new_rows(state['signature'], ordered) if state is not None else None
+
+    if start is None:
+        times, pnl = _chronological(ordered)
+        new_state = _make_state(key, ordered, TradeCube(ordered), times, pnl, drawdown_curve(pnl))
+        return new_state, {'mode': 'full', 'new_trades': len(ordered)}
+
+    new_trades = ordered.iloc[start:]
+    if new_trades.empty:
+        return state, {'mode': 'incremental', 'new_trades': 0}
+
+    # Seules les nouvelles lignes sont agregees puis fusionnees au cube existant
+    cube = state_cube(state).merge(TradeCube(new_trades))
+
+    # La courbe repart du dernier equity / plus haut courant sauvegardes
+    new_times, new_pnl = _chronological(new_trades)
+    segment = drawdown_curve(new_pnl, state['equity'][-1], state['running_max'][-1])
+    curve = tuple(np.concatenate([state[name], part]) for name, part in
+                  zip(('equity', 'running_max', 'drawdown', 'drawdown_pct'), segment))
+
+    new_state = _make_state(key, ordered, cube, np.concatenate([state['times'], new_times]),
+                            np.concatenate([state['pnl'], new_pnl]), curve)
+    return new_state, {'mode': 'incremental', 'new_trades': len(new_trades)}
+
+
+def state_drawdown_info(state: Dict[str, Any], top_n: int = 5) -> Dict[str, Any]:
+    '''Analyse de drawdown (format du dashboard) a partir des courbes de l'etat'''
+    profile = drawdown_statistics(state['equity'], state['running_max'], state['drawdown'],
+                                  state['drawdown_pct'], state['times'], top_n)
+    return build_drawdown_info(state['times'], profile)
+
+
+class StateStore:
+    '''Etats incrementaux sauvegardes sur disque (un fichier pickle par strategie)'''
+
+    SUFFIX = '.pkl'
+
+    def __init__(self, state_dir: str = config.STATE_DIR):
+        self.state_dir = state_dir
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.state_dir, re.sub(r'[^\w.-]', '_', key) + self.SUFFIX)
+
+    def load(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self.path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'rb') as f:
+                return pickle.load(f)
+        except Exception as e:
+            print(f'Etat incremental illisible pour {key}, recalcul complet: {e}')
+            return None
+
+    def save(self, key: str, state: Dict[str, Any]) -> None:
+        os.makedirs(self.state_dir, exist_ok=True)
+        path = self.path(key)
+        tmp_path = path + f'.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    def clear(self, key: Optional[str] = None) -> None:
+        '''Supprime l'etat d'une strategie (ou de toutes)'''
+        if not os.path.isdir(self.state_dir):
+            return
+        names = [os.path.basename(self.path(key))] if key is not None else os.listdir(self.state_dir)
+        for name in names:
+            try:
+                os.remove(os.path.join(self.state_dir, name))
+            except OSError:
+                pass
+
+
+@traced()
+def analyze_incremental(file_path: str, exit_trades: pd.DataFrame,
+                        store: Optional[StateStore] = None) -> Tuple[TradeCube, Dict[str, Any], Dict[str, Any]]:
+    '''
+    Cube d'agregation et analyse de drawdown d'un export, en reutilisant l'etat
+    sauvegarde de la meme strategie
+
+    Returns:
+        Tuple: (cube, drawdown_info, {'key', 'mode', 'new_trades'})
+    '''
+    store = store or StateStore()
+    key = strategy_key(file_path)
+    state, status = update_state(key, store.load(key), exit_trades)
+    if status['mode'] == 'full' or status['new_trades'] > 0:
+        store.save(key, state)
+    status['key'] = key
+    return state_cube(state), state_drawdown_info(state), status
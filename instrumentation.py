@@ -0,0 +1,203 @@
+# Instrumentation par etape : spans imbriques (temps reel, temps CPU, pic memoire tracemalloc)
+#
+#   with Trace('export.xlsx', memory=True) as trace:
+#       with span('lecture'):
+#           ...
+#   trace.save('trace.json')
+#
+# Les spans ne mesurent que lorsqu'une Trace est active dans le contexte courant
+# (thread ou processus) : sans Trace, span() renvoie un objet vide partage et
+# @traced n'ajoute qu'un test, l'instrumentation peut donc rester en place en production.
+
+import json
+import os
+import time
+import tracemalloc
+from contextvars import ContextVar
+from datetime import datetime
+from functools import wraps
+import pandas as pd
+from typing import Any, Callable, Dict, List, Optional
+
+_current: ContextVar[Optional['Trace']] = ContextVar('instrumentation_trace', default=None)
+
+
+class _NullSpan:
+    '''Span sans effet (aucune Trace active)'''
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ('trace', 'name', 'path', 'depth', 'wall', 'cpu', 'memory_start', 'peak')
+
+    def __init__(self, trace: 'Trace', name: str):
+        self.trace = trace
+        self.name = name
+
+    def __enter__(self):
+        stack = self.trace._stack
+        parent = stack[-1] if stack else None
+        self.path = f'{parent.path}/{self.name}' if parent else self.name
+        self.depth = len(stack)
+        # Entree creee a l'ouverture : le parent precede ses enfants dans trace.spans
+        self.trace._entry(self.path, self.name, self.depth)
+        if self.trace.memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if parent is not None:
+                # Le pic du parent avant ce span est conserve : tracemalloc n'a qu'un pic global
+                parent.peak = max(parent.peak, peak)
+            tracemalloc.reset_peak()
+            self.memory_start = self.peak = current
+        stack.append(self)
+        self.wall = time.perf_counter()
+        self.cpu = time.thread_time()
+        return self
+
+    def __exit__(self, *exc_info):
+        wall = time.perf_counter() - self.wall
+        cpu = time.thread_time() - self.cpu
+        peak = None
+        stack = self.trace._stack
+        stack.pop()
+        if self.trace.memory:
+            absolute_peak = max(self.peak, tracemalloc.get_traced_memory()[1])
+            peak = absolute_peak - self.memory_start
+            if stack:
+                stack[-1].peak = max(stack[-1].peak, absolute_peak)
+        self.trace._record(self.path, wall, cpu, peak)
+        return False
+
+
+class Trace:
+    '''
+    Mesures des spans executes pendant le bloc with (un fichier, un rendu...)
+
+    Les appels repetes d'un meme span (meme chemin parent/enfant) sont cumules.
+    Avec memory=True, tracemalloc est demarre pour la duree de la trace (pic
+    memoire des allocations Python et NumPy, au prix d'un ralentissement).
+    Avec enabled=False la trace ne mesure rien et to_dict() renvoie None.
+    '''
+
+    def __init__(self, name: str, enabled: bool = True, memory: bool = False):
+        self.name = name
+        self.enabled = enabled
+        self.memory = enabled and memory
+        self.spans: Dict[str, Dict[str, Any]] = {}
+        self._stack: List[_Span] = []
+        self._token = None
+        self._started_tracemalloc = False
+        self.started = None
+        self.wall = 0.0
+        self.cpu = 0.0
+
+    def __enter__(self):
+        if not self.enabled:
+            return self
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        self._token = _current.set(self)
+        self.started = datetime.now().isoformat(timespec='seconds')
+        self.wall = time.perf_counter()
+        self.cpu = time.thread_time()
+        return self
+
+    def __exit__(self, *exc_info):
+        if not self.enabled:
+            return False
+        self.wall = time.perf_counter() - self.wall
+        self.cpu = time.thread_time() - self.cpu
+        _current.reset(self._token)
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+        return False
+
+    def _entry(self, path: str, name: str, depth: int) -> None:
+        if path not in self.spans:
+            self.spans[path] = {'path': path, 'name': name, 'depth': depth, 'calls': 0,
+                                'wall_s': 0.0, 'cpu_s': 0.0, 'peak_mb': None}
+
+    def _record(self, path: str, wall: float, cpu: float, peak: Optional[int]) -> None:
+        entry = self.spans[path]
+        entry['calls'] += 1
+        entry['wall_s'] += wall
+        entry['cpu_s'] += cpu
+        if peak is not None:
+            entry['peak_mb'] = max(entry['peak_mb'] or 0.0, peak / 1024 ** 2)
+
+    def to_dict(self) -> Optional[Dict[str, Any]]:
+        '''Trace serialisable (JSON, pickle entre processus), None si desactivee'''
+        if not self.enabled:
+            return None
+        return {
+            'name': self.name,
+            'started': self.started,
+            'wall_s': self.wall,
+            'cpu_s': self.cpu,
+            'memory': self.memory,
+            'spans': list(self.spans.values())
+        }
+
+    def save(self, path: str) -> Optional[str]:
+        '''Ecrit la trace en JSON (rien si desactivee)'''
+        trace = self.to_dict()
+        if trace is None:
+            return None
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(trace, f, indent=1)
+        return path
+
+
+def current_trace() -> Optional[Trace]:
+    return _current.get()
+
+
+def span(name: str):
+    '''Context manager mesurant le bloc dans la Trace active (sans effet sinon)'''
+    trace = _current.get()
+    if trace is None:
+        return _NULL_SPAN
+    return _Span(trace, name)
+
+
+def traced(name: Optional[str] = None) -> Callable:
+    '''Decorateur : chaque appel de la fonction est un span (nom qualifie par defaut)'''
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__qualname__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            trace = _current.get()
+            if trace is None:
+                return func(*args, **kwargs)
+            with _Span(trace, span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def trace_frame(trace: Optional[Dict[str, Any]]) -> pd.DataFrame:
+    '''Tableau d'une trace (to_dict) : une ligne par span, nom indente selon la profondeur'''
+    columns = ['Etape', 'Appels', 'Temps (ms)', 'CPU (ms)', 'Pic memoire (Mo)', 'Part (%)']
+    if not trace or not trace['spans']:
+        return pd.DataFrame(columns=columns)
+    spans = pd.DataFrame(trace['spans'])
+    return pd.DataFrame({
+        'Etape': ['  ' * depth + name for depth, name in zip(spans['depth'], spans['name'])],
+        'Appels': spans['calls'],
+        'Temps (ms)': spans['wall_s'] * 1000,
+        'CPU (ms)': spans['cpu_s'] * 1000,
+        'Pic memoire (Mo)': spans['peak_mb'],
+        'Part (%)': spans['wall_s'] / trace['wall_s'] * 100 if trace['wall_s'] else None
+    }, columns=columns)
@@ -0,0 +1,72 @@
+# Indicateurs vectorises par groupe (win rate, pourcentage long, ratios)
+
+import pandas as pd
+import numpy as np
+from typing import Dict, List, Optional, Tuple, Union
+
+from instrumentation import traced
+
+WIN_FLAG = '_win_flag'
+LONG_FLAG = '_long_flag'
+
+
+def win_flags(pnl: pd.Series) -> pd.Series:
+    '''Trade gagnant = P&L strictement positif'''
+    return pnl > 0
+
+
+def status_win_flags(status: pd.Series) -> pd.Series:
+    '''Trade gagnant d'apres une colonne de statut ('Win' / 'Loss')'''
+    return status == 'Win'
+
+
+def long_flags(direction: pd.Series) -> pd.Series:
+    '''Trade long d'apres la colonne Type ('Exit long', 'Entry long'...) ou Direction'''
+    return direction.str.contains('long', case=False)
+
+
+def percentage(numerator, denominator):
+    '''numerator / denominator * 100, ou 0 lorsque le denominateur est nul'''
+    numerator = np.asarray(numerator, dtype=float)
+    denominator = np.asarray(denominator, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(denominator > 0, numerator / denominator * 100, 0.0)
+
+
+@traced()
+def grouped_metrics(df: pd.DataFrame, by: Union[str, pd.Series, List[Union[str, pd.Series]]],
+                    aggregations: Dict[str, Tuple[str, str]],
+                    wins: Optional[pd.Series] = None,
+                    longs: Optional[pd.Series] = None) -> pd.DataFrame:
+    '''
+    Agregation nommee unique : sommes/moyennes demandees + Win_Rate et Long_Percentage
+
+    Les ratios sont calcules comme la moyenne d'indicateurs booleens dans le
+    meme appel groupby que les autres agregations (pas de apply ni de merge).
+
+    Args:
+        df: Trades a regrouper
+        by: Colonne(s) de regroupement, ou Series nommees calculees a la demande
+        aggregations: {nom_sortie: (colonne, fonction)} au format pandas NamedAgg
+        wins: Indicateur de trade gagnant (ajoute la colonne Win_Rate)
+        longs: Indicateur de trade long (ajoute la colonne Long_Percentage)
+
+    Returns:
+        pd.DataFrame: Une ligne par groupe, cles de regroupement en colonnes
+    '''
+    aggregations = dict(aggregations)
+    extra = {}
+    if wins is not None:
+        extra[WIN_FLAG] = wins.astype(float)
+        aggregations['Win_Rate'] = (WIN_FLAG, 'mean')
+    if longs is not None:
+        extra[LONG_FLAG] = longs.astype(float)
+        aggregations['Long_Percentage'] = (LONG_FLAG, 'mean')
+
+    source = df.assign(**extra) if extra else df
+    result = source.groupby(by).agg(**aggregations).reset_index()
+
+    for column in ('Win_Rate', 'Long_Percentage'):
+        if column in result.columns:
+            result[column] = result[column] * 100
+    return result
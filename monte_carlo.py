@@ -0,0 +1,177 @@
+# Simulations Monte Carlo de la sequence des trades (bootstrap / permutation)
+
+import argparse
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, Optional, Tuple
+
+import config
+from parallel_analysis import iter_parallel
+
+METHODS = ('bootstrap', 'shuffle')
+# Octets par trade et par chemin au pic memoire : echantillon (float64), plus haut
+# courant (float64), deux compteurs de pertes (int32) et indicateur de perte (bool)
+BYTES_PER_CELL = 8 + 8 + 4 + 4 + 1
+
+
+def path_statistics(paths: np.ndarray) -> Dict[str, np.ndarray]:
+    '''
+    P&L final, drawdown max et plus longue serie de pertes de chaque ligne (chemin)
+
+    La matrice est modifiee en place (elle devient la courbe d'equity).
+    '''
+    losses = paths < 0
+    equity = np.cumsum(paths, axis=1, out=paths)
+    running_max = np.maximum.accumulate(equity, axis=1)
+    np.subtract(equity, running_max, out=running_max)
+    max_drawdown = running_max.min(axis=1)
+    del running_max
+
+    # Serie de pertes = compteur cumule moins sa valeur au dernier trade gagnant
+    count = np.cumsum(losses, axis=1, dtype=np.int32)
+    last_reset = np.multiply(count, ~losses, dtype=np.int32)
+    np.maximum.accumulate(last_reset, axis=1, out=last_reset)
+    longest_streak = np.subtract(count, last_reset, out=count).max(axis=1)
+
+    return {
+        'final_pnl': equity[:, -1].copy(),
+        'max_drawdown': max_drawdown,
+        'longest_losing_streak': longest_streak
+    }
+
+
+def path_rng(entropy: int, path: int) -> np.random.Generator:
+    '''Generateur du chemin numero path : enfant path de SeedSequence(entropy), comme spawn()'''
+    return np.random.default_rng(np.random.SeedSequence(entropy, spawn_key=(path,)))
+
+
+def simulate_chunk(task: Tuple[int, np.ndarray, int, int, str, int]) -> Dict[str, np.ndarray]:
+    '''
+    Simule les chemins first_path .. first_path + n_paths - 1 (execute dans un processus du pool)
+
+    Chaque chemin a son propre generateur, derive de son numero : le resultat ne
+    depend ni du decoupage en blocs (max_bytes) ni du nombre de processus.
+    '''
+    _, pnl, first_path, n_paths, method, entropy = task
+    if method == 'bootstrap':
+        # Tirage avec remise des trades
+        paths = np.empty((n_paths, len(pnl)))
+        for row in range(n_paths):
+            indices = path_rng(entropy, first_path + row).integers(0, len(pnl), size=len(pnl), dtype=np.int32)
+            np.take(pnl, indices, out=paths[row])
+    else:
+        # Permutation : memes trades, ordre aleatoire (P&L final identique)
+        paths = np.tile(pnl, (n_paths, 1))
+        for row in range(n_paths):
+            path_rng(entropy, first_path + row).shuffle(paths[row])
+    return path_statistics(paths)
+
+
+def chunk_sizes(n_paths: int, n_trades: int, max_bytes: int = config.MONTE_CARLO_MAX_BYTES):
+    '''Decoupe n_paths en blocs dont la matrice tient dans max_bytes'''
+    per_chunk = max(1, max_bytes // max(1, n_trades * BYTES_PER_CELL))
+    sizes = [per_chunk] * (n_paths // per_chunk)
+    if n_paths % per_chunk:
+        sizes.append(n_paths % per_chunk)
+    return sizes
+
+
+def run_monte_carlo(pnl: np.ndarray, n_paths: int = config.MONTE_CARLO_PATHS, method: str = 'bootstrap',
+                    seed: Optional[int] = config.MONTE_CARLO_SEED,
+                    confidence: float = config.CONFIDENCE_LEVEL,
+                    max_workers: Optional[int] = None,
+                    max_bytes: int = config.MONTE_CARLO_MAX_BYTES) -> Optional[Dict[str, Any]]:
+    '''
+    Intervalles de confiance du P&L final, du drawdown max et de la plus longue
+    serie de pertes par reechantillonnage de la sequence des trades
+
+    Chaque chemin recoit sa propre graine derivee de seed (SeedSequence, cle =
+    numero du chemin) : pour une meme graine, le resultat est identique quels
+    que soient le nombre de processus et le decoupage en blocs (max_bytes).
+
+    Args:
+        pnl: P&L des trades dans l'ordre chronologique
+        n_paths: Nombre de chemins simules
+        method: 'bootstrap' (tirage avec remise) ou 'shuffle' (permutation)
+        seed: Graine (None = non reproductible)
+        confidence: Niveau de confiance des intervalles
+        max_workers: Processus du pool (config.MAX_WORKERS par defaut)
+        max_bytes: Memoire maximale d'un bloc de chemins
+
+    Returns:
+        Dict: 'summary' (DataFrame), 'paths' (statistiques de chaque chemin) et
+        les parametres, ou None si moins de config.MIN_TRADES_FOR_ANALYSIS trades
+    '''
+    if method not in METHODS:
+        raise ValueError(f'Methode inconnue: {method} (disponibles: {METHODS})')
+    pnl = np.asarray(pnl, dtype=float)
+    if len(pnl) < config.MIN_TRADES_FOR_ANALYSIS:
+        print(f'Pas assez de trades pour la simulation ({len(pnl)} < {config.MIN_TRADES_FOR_ANALYSIS})')
+        return None
+
+    sizes = chunk_sizes(n_paths, len(pnl), max_bytes)
+    # Entropie tiree une seule fois (seed=None) puis partagee par tous les blocs
+    entropy = np.random.SeedSequence(seed).entropy
+    firsts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    tasks = [(i, pnl, int(first), size, method, entropy) for i, (first, size) in enumerate(zip(firsts, sizes))]
+
+    chunks = [None] * len(tasks)
+    for task, result, error in iter_parallel(simulate_chunk, tasks, max_workers):
+        if error is not None:
+            raise RuntimeError(f'Echec de la simulation (bloc {task[0]}): {error}')
+        chunks[task[0]] = result
+    paths = {key: np.concatenate([chunk[key] for chunk in chunks]) for key in chunks[0]}
+
+    observed = path_statistics(pnl[None, :].copy())
+    alpha = (1 - confidence) / 2
+    rows = []
+    for key, label in (('final_pnl', 'Final_PnL'), ('max_drawdown', 'Max_Drawdown'),
+                       ('longest_losing_streak', 'Longest_Losing_Streak')):
+        values = paths[key]
+        lower, median, upper = np.quantile(values, [alpha, 0.5, 1 - alpha])
+        rows.append({
+            'Metric': label,
+            'Observed': observed[key][0],
+            'Mean': values.mean(),
+            'Lower': lower,
+            'Median': median,
+            'Upper': upper
+        })
+
+    return {
+        'summary': pd.DataFrame(rows),
+        'paths': paths,
+        'prob_loss': float((paths['final_pnl'] < 0).mean() * 100),
+        'n_paths': n_paths,
+        'n_trades': len(pnl),
+        'method': method,
+        'seed': seed,
+        'confidence': confidence
+    }
+
+
+def main():
+    from backtest_analysis import load_exit_trades
+
+    parser = argparse.ArgumentParser(description='Simulation Monte Carlo des trades d\'un export TradingView')
+    parser.add_argument('file', help='Fichier XLSX')
+    parser.add_argument('--paths', type=int, default=config.MONTE_CARLO_PATHS)
+    parser.add_argument('--method', choices=METHODS, default='bootstrap')
+    parser.add_argument('--seed', type=int, default=config.MONTE_CARLO_SEED)
+    parser.add_argument('--confidence', type=float, default=config.CONFIDENCE_LEVEL)
+    parser.add_argument('--jobs', type=int, default=config.MAX_WORKERS)
+    args = parser.parse_args()
+
+    exit_trades = load_exit_trades(args.file).sort_values('Date and time', kind='stable')
+    result = run_monte_carlo(exit_trades['Net P&L JPY'].to_numpy(dtype=float), args.paths, args.method,
+                             args.seed, args.confidence, args.jobs)
+    if result is None:
+        return
+    print(f'{result["n_paths"]} chemins x {result["n_trades"]} trades ({result["method"]}, '
+          f'graine {result["seed"]}, IC {result["confidence"]:.0%})')
+    print(result['summary'].round(2).to_string(index=False))
+    print(f'Probabilite de perte: {result["prob_loss"]:.2f}%')
+
+
+if __name__ == '__main__':
+    main()
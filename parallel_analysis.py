@@ -0,0 +1,139 @@
+# Analyse parallele de plusieurs fichiers de backtest (pool de processus)
+
+import multiprocessing
+import os
+import time
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+import config
+from aggregation import TradeCube
+from backtest_analysis import (load_exit_trades, analyze_xlsx_file_complete, analyze_single_file_truth,
+                               weekday_significance)
+from incremental import analyze_incremental
+from instrumentation import Trace, span
+from result_cache import estimate_size
+from trade_frame import compact_trades, frame_memory
+
+
+def _empty_result(file_path: str) -> Dict[str, Any]:
+    return {
+        'file': file_path,
+        'complete': None,
+        'truth': None,
+        'incremental': None,
+        'memory': None,
+        'trace': None,
+        'error': None,
+        'load_time': 0.0,
+        'analysis_time': 0.0
+    }
+
+
+def analyze_file(file_path: str, incremental: bool = False,
+                 trace_memory: bool = config.INSTRUMENTATION_MEMORY) -> Dict[str, Any]:
+    '''
+    Charge un fichier une seule fois puis calcule l'analyse complete et le tableau de verite.
+
+    En mode incremental, le cube d'agregation et le drawdown sont prolonges a
+    partir de l'etat sauvegarde pour la meme strategie (seuls les nouveaux
+    trades sont traites).
+
+    Les erreurs sont capturees et renvoyees dans le resultat pour qu'un fichier
+    invalide n'interrompe pas le traitement du lot.
+
+    Avec config.INSTRUMENTATION, le detail des etapes est renvoye dans
+    result['trace'] (voir instrumentation.Trace).
+    '''
+    result = _empty_result(file_path)
+    trace = Trace(os.path.basename(file_path), config.INSTRUMENTATION, trace_memory)
+    try:
+        with trace:
+            start = time.perf_counter()
+            exit_trades = load_exit_trades(file_path, compact=False)
+            raw_bytes = frame_memory(exit_trades)
+            with span('compact_trades'):
+                exit_trades = compact_trades(exit_trades)
+            result['load_time'] = time.perf_counter() - start
+
+            # Le cube d'agregation est calcule une fois et partage par les deux analyses
+            start = time.perf_counter()
+            drawdown_info = None
+            if incremental:
+                cube, drawdown_info, result['incremental'] = analyze_incremental(file_path, exit_trades)
+            else:
+                cube = TradeCube(exit_trades)
+            result['complete'] = analyze_xlsx_file_complete(file_path, exit_trades, cube, drawdown_info)
+            result['truth'] = analyze_single_file_truth(file_path, exit_trades, cube)
+            result['analysis_time'] = time.perf_counter() - start
+
+        result['memory'] = {
+            'rows': len(exit_trades),
+            'raw_bytes': raw_bytes,
+            'compact_bytes': frame_memory(exit_trades),
+            'result_bytes': estimate_size(result['complete']) + estimate_size(result['truth'])
+        }
+    except Exception as e:
+        result['error'] = f'{type(e).__name__}: {e}'
+    result['trace'] = trace.to_dict()
+    return result
+
+
+def iter_parallel(func: Callable[[Any], Any], items: Iterable[Any],
+                  max_workers: Optional[int] = None) -> Iterator[Tuple[Any, Any, Optional[str]]]:
+    '''
+    Applique func a chaque element dans un pool de processus.
+
+    Produit des tuples (element, resultat, erreur) dans l'ordre de fin de traitement.
+    Avec max_workers=1 le traitement reste sequentiel dans le processus courant.
+    '''
+    items = list(items)
+    if max_workers is None:
+        max_workers = config.MAX_WORKERS
+    max_workers = max(1, min(max_workers, len(items)))
+
+    if max_workers == 1:
+        for item in items:
+            try:
+                yield item, func(item), None
+            except Exception as e:
+                yield item, None, f'{type(e).__name__}: {e}'
+        return
+
+    # 'spawn' : comportement identique sous Windows et Linux, et sans risque
+    # de fork d'un processus multi-thread (serveur Streamlit)
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as pool:
+        futures = {pool.submit(func, item): item for item in items}
+        for future in as_completed(futures):
+            item = futures[future]
+            try:
+                yield item, future.result(), None
+            except Exception as e:
+                yield item, None, f'{type(e).__name__}: {e}'
+
+
+def iter_analyses(files: Iterable[str], max_workers: Optional[int] = None, incremental: bool = False,
+                  trace_memory: bool = config.INSTRUMENTATION_MEMORY) -> Iterator[Dict[str, Any]]:
+    '''Analyse les fichiers en parallele et produit chaque resultat des qu'il est pret'''
+    func = partial(analyze_file, incremental=incremental, trace_memory=trace_memory)
+    for file_path, result, error in iter_parallel(func, files, max_workers):
+        if error is not None:
+            # Le processus de travail lui-meme a echoue (memoire, pickling...)
+            result = _empty_result(file_path)
+            result['error'] = error
+        yield result
+
+
+def iter_significance(files: Iterable[str], max_workers: Optional[int] = None,
+                      n_permutations: int = config.SIGNIFICANCE_PERMUTATIONS) -> Iterator[Tuple[str, Any, Optional[str]]]:
+    '''p-values par jour de chaque fichier en parallele : tuples (fichier, p-values, erreur)'''
+    func = partial(weekday_significance, n_permutations=n_permutations)
+    return iter_parallel(func, files, max_workers)
+
+
+if __name__ == '__main__':
+    # Un seul point d'entree par lots (rapports par fichier, manifeste, --only-changed) : main.py
+    from main import main
+    main()
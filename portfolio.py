@@ -0,0 +1,112 @@
+# Mode portefeuille : fusion des trades de plusieurs actifs en un flux chronologique unique
+
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, List, Sequence, Tuple
+
+from drawdown import drawdown_kernel
+
+
+def kway_merge(times: Sequence[np.ndarray], values: Sequence[np.ndarray]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    '''
+    Fusionne k flux tries par date en un seul flux chronologique (O(n log k))
+
+    Le tri stable de NumPy (timsort) detecte les k sequences deja triees et se
+    contente de les fusionner. Seules les dates sont mises bout a bout ; les P&L
+    et codes actif sont ecrits directement a leur position finale, sans copie
+    concatenee intermediaire. A date egale, l'ordre des flux est conserve.
+
+    Args:
+        times: Dates triees de chaque flux
+        values: Valeurs correspondantes (P&L)
+
+    Returns:
+        Tuple: (dates, valeurs, indice du flux d'origine) dans l'ordre chronologique
+    '''
+    code_dtype = np.min_scalar_type(max(len(times) - 1, 0))
+    if len(times) == 0:
+        return np.array([], dtype='datetime64[ns]'), np.array([], dtype=float), np.array([], dtype=code_dtype)
+
+    all_times = np.concatenate([np.asarray(t) for t in times])
+    order = np.argsort(all_times, kind='stable')
+    merged_times = all_times[order]
+    del all_times
+
+    position = np.empty(len(order), dtype=np.int64)
+    position[order] = np.arange(len(order))
+    del order
+
+    merged_values = np.empty(len(position), dtype=float)
+    assets = np.empty(len(position), dtype=code_dtype)
+    start = 0
+    for i, stream_values in enumerate(values):
+        target = position[start:start + len(stream_values)]
+        merged_values[target] = stream_values
+        assets[target] = i
+        start += len(stream_values)
+    return merged_times, merged_values, assets
+
+
+def build_portfolio(names: List[str], times: Sequence[np.ndarray], pnl: Sequence[np.ndarray],
+                    top_n: int = 5) -> Dict[str, Any]:
+    '''
+    Courbe d'equity et drawdown du portefeuille combine + contribution de chaque actif
+
+    Args:
+        names: Nom de chaque actif
+        times: Dates de sortie triees de chaque actif
+        pnl: P&L de chaque trade, dans le meme ordre
+
+    Returns:
+        Dict: dates / P&L / codes actif fusionnes, profil de drawdown (drawdown_kernel)
+        et 'contribution' (un DataFrame par actif)
+    '''
+    merged_times, merged_pnl, assets = kway_merge(times, pnl)
+    profile = drawdown_kernel(merged_pnl, merged_times, top_n)
+
+    n_assets = len(names)
+    total_by_asset = np.bincount(assets, weights=merged_pnl, minlength=n_assets)
+    trades_by_asset = np.bincount(assets, minlength=n_assets)
+    total = total_by_asset.sum()
+
+    # Contribution de chaque actif au drawdown maximum (trades entre le pic et le creux)
+    dd_by_asset = np.zeros(n_assets)
+    episodes = profile['episodes']
+    if not episodes.empty:
+        worst = episodes.iloc[0]
+        window = slice(int(worst['Peak_Index']) + 1, int(worst['Trough_Index']) + 1)
+        dd_by_asset = np.bincount(assets[window], weights=merged_pnl[window], minlength=n_assets)
+    dd_total = dd_by_asset.sum()
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        contribution = pd.DataFrame({
+            'Asset': names,
+            'Trades': trades_by_asset,
+            'Total_PnL': total_by_asset,
+            'PnL_Share': np.where(total != 0, total_by_asset / total * 100, np.nan),
+            'Max_DD_PnL': dd_by_asset,
+            'Max_DD_Share': np.where(dd_total != 0, dd_by_asset / dd_total * 100, np.nan)
+        })
+
+    profile.update({
+        'times': merged_times,
+        'pnl': merged_pnl,
+        'assets': assets,
+        'asset_names': list(names),
+        'contribution': contribution
+    })
+    return profile
+
+
+def portfolio_from_analyses(complete_analyses: List[Dict[str, Any]], top_n: int = 5) -> Dict[str, Any]:
+    '''Portefeuille a partir des analyses completes (courbes de drawdown deja triees par date)'''
+    names, times, pnl = [], [], []
+    for analysis in complete_analyses:
+        drawdown_info = analysis.get('drawdown_info')
+        if not drawdown_info:
+            continue
+        drawdown_data = drawdown_info['drawdown_data']
+        names.append(analysis['asset_name'])
+        times.append(drawdown_data['Date and time'].to_numpy())
+        pnl.append(np.diff(drawdown_data['Cumulative_PnL'].to_numpy(), prepend=0.0))
+    return build_portfolio(names, times, pnl, top_n)
@@ -0,0 +1,107 @@
+# Metriques glissantes (win rate, moyenne, ecart-type, Sharpe, profit factor, esperance en R)
+# calculees par differences de sommes cumulees : O(n) quel que soit la taille de fenetre
+
+import numpy as np
+import pandas as pd
+from typing import Optional
+
+
+class RollingPrefix:
+    '''
+    Sommes cumulees des trades (nombre, P&L, carres centres, gagnants, perdants,
+    gains et pertes bruts). Les statistiques d'une fenetre [debut, fin) s'obtiennent par
+    simple difference de deux positions : changer de fenetre ne recalcule rien.
+    '''
+
+    def __init__(self, times: np.ndarray, pnl: np.ndarray):
+        self.times = np.asarray(times)
+        pnl = np.asarray(pnl, dtype=float)
+        # Centrer avant d'elever au carre limite la perte de precision sur l'ecart-type
+        self.center = float(pnl.mean()) if len(pnl) else 0.0
+        self._sum = np.zeros(1)
+        self._sum_sq = np.zeros(1)
+        self._wins = np.zeros(1, dtype=np.int64)
+        self._losses = np.zeros(1, dtype=np.int64)
+        self._gross_profit = np.zeros(1)
+        self._gross_loss = np.zeros(1)
+        self._extend(pnl)
+
+    def _extend(self, pnl: np.ndarray) -> None:
+        '''Prolonge les sommes cumulees depuis leur derniere valeur'''
+        for name, values in (
+            ('_sum', pnl),
+            ('_sum_sq', (pnl - self.center) ** 2),
+            ('_wins', pnl > 0),
+            ('_losses', pnl < 0),
+            ('_gross_profit', np.where(pnl > 0, pnl, 0.0)),
+            ('_gross_loss', np.where(pnl < 0, -pnl, 0.0))
+        ):
+            prefix = getattr(self, name)
+            setattr(self, name, np.concatenate([prefix, prefix[-1] + np.cumsum(values, dtype=prefix.dtype)]))
+
+    def append(self, times: np.ndarray, pnl: np.ndarray) -> None:
+        '''Ajoute des trades posterieurs aux precedents (mode incremental)'''
+        self.times = np.concatenate([self.times, np.asarray(times)])
+        self._extend(np.asarray(pnl, dtype=float))
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def window_stats(self, start: np.ndarray, end: np.ndarray) -> pd.DataFrame:
+        '''Statistiques des fenetres [start, end) (positions de trades)'''
+        count = (end - start).astype(float)
+        total = self._sum[end] - self._sum[start]
+        sum_sq = self._sum_sq[end] - self._sum_sq[start]
+        wins = (self._wins[end] - self._wins[start]).astype(float)
+        gross_profit = self._gross_profit[end] - self._gross_profit[start]
+        gross_loss = self._gross_loss[end] - self._gross_loss[start]
+        losses = self._losses[end] - self._losses[start]
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = total / count
+            centered = total - count * self.center
+            std = np.sqrt(np.maximum((sum_sq - centered ** 2 / count) / (count - 1), 0))
+            std = np.where(count > 1, std, np.nan)
+            win_rate = wins / count
+            avg_loss = np.where(losses > 0, gross_loss / losses, np.nan)
+            return pd.DataFrame({
+                'Date and time': self.times[end - 1],
+                'Trades': count.astype(np.int64),
+                'Win_Rate': win_rate * 100,
+                'Mean': mean,
+                'Std': std,
+                'Sharpe': np.where(std > 0, mean / std, np.nan),
+                'Profit_Factor': np.where(gross_loss > 0, gross_profit / gross_loss, np.nan),
+                # Esperance en R (multiples de la perte moyenne des trades perdants) :
+                # (taux de reussite x gain moyen - taux de perte x perte moyenne) / perte moyenne
+                # = moyenne / perte moyenne. Sans perte dans la fenetre, R n'est pas defini (NaN)
+                'Expectancy_R': mean / avg_loss
+            })
+
+    def by_trades(self, window: int) -> pd.DataFrame:
+        '''Fenetre des window derniers trades (une ligne par trade a partir du window-ieme)'''
+        window = max(1, int(window))
+        end = np.arange(window, len(self) + 1)
+        return self.window_stats(end - window, end)
+
+    def by_days(self, days: float) -> pd.DataFrame:
+        '''Fenetre des trades sortis dans les `days` derniers jours (une ligne par trade)'''
+        end = np.arange(1, len(self) + 1)
+        start = np.searchsorted(self.times, self.times - pd.Timedelta(days=days).to_timedelta64(), side='right')
+        return self.window_stats(start, end)
+
+    def rolling(self, window: float, by: str = 'trades', min_trades: Optional[int] = None) -> pd.DataFrame:
+        '''
+        Metriques glissantes sur window trades (by='trades') ou window jours (by='days')
+
+        min_trades ecarte les fenetres temporelles contenant trop peu de trades.
+        '''
+        if by == 'trades':
+            result = self.by_trades(int(window))
+        elif by == 'days':
+            result = self.by_days(window)
+        else:
+            raise ValueError(f"Fenetre inconnue: {by} ('trades' ou 'days')")
+        if min_trades:
+            result = result[result['Trades'] >= min_trades]
+        return result.reset_index(drop=True)
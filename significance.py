@@ -0,0 +1,98 @@
+# Tests de permutation pour le tableau de verite (significativite par jour de la semaine)
+
+import numpy as np
+from typing import Dict, Optional
+
+import config
+from instrumentation import traced
+
+DAYS_ORDER = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+
+def permutation_pvalues(pnl: np.ndarray, groups: np.ndarray, n_groups: int,
+                        n_permutations: int = config.SIGNIFICANCE_PERMUTATIONS,
+                        seed: Optional[int] = config.MONTE_CARLO_SEED,
+                        max_bytes: int = config.SIGNIFICANCE_MAX_BYTES) -> Dict[str, np.ndarray]:
+    '''
+    p-values bilaterales du P&L total et du nombre de trades gagnants de chaque
+    groupe, par permutation des etiquettes de groupe
+
+    Permuter les etiquettes revient a permuter les P&L sur des etiquettes fixes :
+    les trades sont ranges par groupe (segments contigus) puis chaque bloc de
+    permutations est une matrice (permutations x trades) melangee ligne par ligne,
+    dont les totaux par groupe sont obtenus en un seul np.add.reduceat.
+
+    Args:
+        pnl: P&L de chaque trade
+        groups: Code du groupe de chaque trade (0..n_groups-1, ex. jour de la semaine)
+        n_groups: Nombre de groupes
+        n_permutations: Nombre de permutations
+        seed: Graine (resultat reproductible)
+        max_bytes: Memoire maximale d'un bloc de permutations
+
+    Returns:
+        Dict: 'p_value_pnl' et 'p_value_wins' (NaN pour un groupe sans trade)
+    '''
+    pnl = np.asarray(pnl, dtype=float)
+    groups = np.asarray(groups)
+    counts = np.bincount(groups, minlength=n_groups)
+    observed_pnl = np.bincount(groups, weights=pnl, minlength=n_groups)
+    observed_wins = np.bincount(groups, weights=pnl > 0, minlength=n_groups)
+
+    present = np.flatnonzero(counts)
+    p_pnl = np.full(n_groups, np.nan)
+    p_wins = np.full(n_groups, np.nan)
+    if len(present) == 0 or n_permutations <= 0:
+        return {'p_value_pnl': p_pnl, 'p_value_wins': p_wins}
+
+    # Segments contigus par groupe (seuls les groupes non vides sont des bornes de reduceat)
+    ordered = pnl[np.argsort(groups, kind='stable')]
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))[present]
+    # Tolerance : les totaux permutes ne sont pas sommes dans le meme ordre que l'observe
+    tolerance = 1e-9 * (np.abs(observed_pnl[present]) + 1)
+    observed_pnl = observed_pnl[present]
+    observed_wins = observed_wins[present]
+
+    # Nombre de permutations au moins aussi extremes, queue haute / queue basse
+    upper_pnl = np.zeros(len(present), dtype=np.int64)
+    lower_pnl = np.zeros(len(present), dtype=np.int64)
+    upper_wins = np.zeros(len(present), dtype=np.int64)
+    lower_wins = np.zeros(len(present), dtype=np.int64)
+    rows = max(1, max_bytes // (len(pnl) * 9))
+    chunks = [min(rows, n_permutations - start) for start in range(0, n_permutations, rows)]
+    for chunk_rows, seed_sequence in zip(chunks, np.random.SeedSequence(seed).spawn(len(chunks))):
+        rng = np.random.default_rng(seed_sequence)
+        permuted = np.tile(ordered, (chunk_rows, 1))
+        rng.permuted(permuted, axis=1, out=permuted)
+        totals = np.add.reduceat(permuted, starts, axis=1)
+        wins = np.add.reduceat(permuted > 0, starts, axis=1, dtype=np.int64)
+        upper_pnl += (totals >= observed_pnl - tolerance).sum(axis=0)
+        lower_pnl += (totals <= observed_pnl + tolerance).sum(axis=0)
+        upper_wins += (wins >= observed_wins).sum(axis=0)
+        lower_wins += (wins <= observed_wins).sum(axis=0)
+
+    p_pnl[present] = _two_sided(upper_pnl, lower_pnl, n_permutations)
+    p_wins[present] = _two_sided(upper_wins, lower_wins, n_permutations)
+    return {'p_value_pnl': p_pnl, 'p_value_wins': p_wins}
+
+
+def _two_sided(upper: np.ndarray, lower: np.ndarray, n_permutations: int) -> np.ndarray:
+    # Deux fois la plus petite queue, avec la correction +1 (l'observe fait partie des permutations)
+    tail = (np.minimum(upper, lower) + 1) / (n_permutations + 1)
+    return np.minimum(1.0, 2 * tail)
+
+
+@traced()
+def weekday_pvalues(exit_trades, pnl_column: str = 'Net P&L JPY', time_column: str = 'Date and time',
+                    n_permutations: int = config.SIGNIFICANCE_PERMUTATIONS,
+                    seed: Optional[int] = config.MONTE_CARLO_SEED) -> Dict[str, Dict[str, float]]:
+    '''p-values par jour de la semaine : {jour: {'p_value_pnl', 'p_value_wins'}}'''
+    result = permutation_pvalues(
+        exit_trades[pnl_column].to_numpy(dtype=float),
+        exit_trades[time_column].dt.dayofweek.to_numpy(),
+        len(DAYS_ORDER), n_permutations, seed
+    )
+    return {
+        day: {'p_value_pnl': result['p_value_pnl'][i], 'p_value_wins': result['p_value_wins'][i]}
+        for i, day in enumerate(DAYS_ORDER)
+    }
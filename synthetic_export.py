@@ -0,0 +1,197 @@
+# Generateur d'exports TradingView synthetiques (feuille 'List of trades') pour les benchmarks
+#
+#   python synthetic_export.py --trades 1000 100000 --format xlsx csv parquet
+
+import argparse
+import os
+import time
+import numpy as np
+import pandas as pd
+from typing import Iterator, List, Optional
+
+import config
+
+FORMATS = ('xlsx', 'csv', 'parquet')
+COLUMNS = ['Trade #', 'Type', 'Signal', 'Date and time', 'Price JPY', 'Contracts',
+           'Net P&L JPY', 'Net P&L %', 'Run-up JPY', 'Drawdown JPY', 'Cumulative P&L JPY']
+TYPES = ['Entry long', 'Entry short', 'Exit long', 'Exit short']
+SIGNALS = ['Long', 'Short', 'Close']
+# Une ligne Entry et une ligne Exit par trade, plus l'en-tete : limite de lignes d'une feuille Excel
+XLSX_MAX_TRADES = (1_048_576 - 1) // 2
+
+
+def _rows(exit_values: np.ndarray, entry_values: np.ndarray) -> np.ndarray:
+    # Ligne Exit (indices pairs) puis ligne Entry (indices impairs) de chaque trade
+    values = np.empty(2 * len(exit_values), dtype=np.result_type(exit_values, entry_values))
+    values[0::2] = exit_values
+    values[1::2] = entry_values
+    return values
+
+
+def export_name(n_trades: int, seed: int, asset: str = 'USDJPY', export_date: str = '2026-01-01') -> str:
+    '''Nom d'export reconnu par parse_export_name (un parametre par graine, la taille en hash)'''
+    return f'v1_SYNTHETIC_param_{seed}__BENCH_{asset}_{export_date}_n{n_trades}'
+
+
+def trade_chunks(n_trades: int, seed: int = config.MONTE_CARLO_SEED,
+                 chunk_trades: int = config.SYNTHETIC_CHUNK_TRADES,
+                 start: str = '2015-01-02 08:00', span_days: float = 3650,
+                 win_rate: float = 0.52) -> Iterator[pd.DataFrame]:
+    '''
+    Liste des trades par blocs de chunk_trades trades (2 lignes par trade : Exit puis Entry)
+
+    Chaque bloc a sa propre graine derivee de seed (resultat reproductible pour
+    un meme seed et un meme chunk_trades) et reprend a la date, au numero de
+    trade, au prix et au P&L cumule du bloc precedent : la memoire reste bornee
+    quel que soit n_trades.
+
+    L'ecart moyen entre deux trades (1,5 jour au plus, une minute au moins) est
+    choisi pour que l'historique couvre environ span_days jours : 10M trades
+    restent dans la plage des dates datetime64[ns].
+    '''
+    mean_gap = max(60.0, min(1.5 * 86_400, span_days * 86_400 / max(1, n_trades)))
+    sizes = [min(chunk_trades, n_trades - first) for first in range(0, n_trades, chunk_trades)]
+    slot_end = pd.Timestamp(start).to_datetime64().astype('datetime64[s]').astype(np.int64)
+    price = 150.0
+    cumulative = 0.0
+    first_trade = 1
+    for size, seed_sequence in zip(sizes, np.random.SeedSequence(seed).spawn(len(sizes))):
+        rng = np.random.default_rng(seed_sequence)
+        # Un creneau par trade (duree exponentielle) : le trade est ferme avant le creneau suivant
+        gaps = 60 + rng.exponential(mean_gap - 60, size).astype(np.int64)
+        entries = slot_end + np.cumsum(gaps) - gaps
+        exits = entries + (gaps * rng.uniform(0.1, 0.9, size)).astype(np.int64)
+        slot_end = int(entries[-1] + gaps[-1])
+
+        is_short = rng.random(size) >= 0.55
+        wins = rng.random(size) < win_rate
+        pnl = np.round(np.where(wins, rng.gamma(2.0, 30.0, size), -rng.gamma(2.0, 27.0, size)), 2)
+        contracts = rng.integers(1, 5, size)
+        entry_price = np.round(price + np.cumsum(rng.normal(0, 0.3, size)), 3)
+        price = float(entry_price[-1])
+        exit_price = np.round(entry_price + np.where(is_short, -1, 1) * pnl / (contracts * 100.0), 3)
+        run_up = np.round(np.maximum(pnl, 0) + rng.gamma(1.5, 10.0, size), 2)
+        drawdown = np.round(np.minimum(pnl, 0) - rng.gamma(1.5, 10.0, size), 2)
+        cumulative_pnl = np.round(cumulative + np.cumsum(pnl), 2)
+        cumulative = float(cumulative_pnl[-1])
+        trade_numbers = np.arange(first_trade, first_trade + size)
+        pnl_pct = np.round(pnl / (entry_price * contracts) * 100, 2)
+
+        type_codes = _rows(2 + is_short, is_short.astype(np.int64))
+        signal_codes = _rows(np.full(size, 2), is_short.astype(np.int64))
+        yield pd.DataFrame({
+            'Trade #': _rows(trade_numbers, trade_numbers),
+            'Type': pd.Categorical.from_codes(type_codes, TYPES),
+            'Signal': pd.Categorical.from_codes(signal_codes, SIGNALS),
+            # Dates a la minute, comme dans les exports
+            'Date and time': (_rows(exits, entries) // 60 * 60).astype('datetime64[s]').astype('datetime64[ns]'),
+            'Price JPY': _rows(exit_price, entry_price),
+            'Contracts': _rows(contracts, contracts),
+            'Net P&L JPY': _rows(pnl, pnl),
+            'Net P&L %': _rows(pnl_pct, pnl_pct),
+            'Run-up JPY': _rows(run_up, run_up),
+            'Drawdown JPY': _rows(drawdown, drawdown),
+            'Cumulative P&L JPY': _rows(cumulative_pnl, cumulative_pnl)
+        }, columns=COLUMNS)
+        first_trade += size
+
+
+def make_trades(n_trades: int, seed: int = config.MONTE_CARLO_SEED, **kwargs) -> pd.DataFrame:
+    '''Liste des trades complete en un seul DataFrame'''
+    return pd.concat(trade_chunks(n_trades, seed, **kwargs), ignore_index=True)
+
+
+def performance_sheet(trades: pd.DataFrame) -> pd.DataFrame:
+    '''Resume 'Performance' minimal, calcule depuis les lignes Exit'''
+    exits = trades[trades['Type'].str.startswith('Exit')]
+    pnl = exits['Net P&L JPY']
+    equity = exits['Cumulative P&L JPY']
+    return pd.DataFrame({
+        'Metric': ['Net Profit', 'Total Closed Trades', 'Percent Profitable', 'Max Drawdown'],
+        'All JPY': [pnl.sum(), len(exits), (pnl > 0).mean() * 100 if len(exits) else 0.0,
+                    (equity.cummax().clip(lower=0) - equity).max() if len(exits) else 0.0]
+    })
+
+
+def write_export(path: str, n_trades: int, seed: int = config.MONTE_CARLO_SEED,
+                 chunk_trades: int = config.SYNTHETIC_CHUNK_TRADES) -> str:
+    '''
+    Ecrit un export synthetique au format donne par l'extension (.xlsx, .csv, .parquet)
+
+    CSV et Parquet sont ecrits bloc par bloc (memoire bornee, jusqu'a des dizaines
+    de millions de trades). Le XLSX contient les feuilles Performance, List of
+    trades et Properties d'un vrai export ; il est limite a XLSX_MAX_TRADES trades.
+    '''
+    fmt = os.path.splitext(path)[1].lstrip('.').lower()
+    if fmt not in FORMATS:
+        raise ValueError(f'Format inconnu: {fmt} (disponibles: {FORMATS})')
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    chunks = trade_chunks(n_trades, seed, chunk_trades)
+
+    if fmt == 'xlsx':
+        if n_trades > XLSX_MAX_TRADES:
+            raise ValueError(f'{n_trades} trades depassent la limite d\'une feuille Excel ({XLSX_MAX_TRADES})')
+        trades = pd.concat(chunks, ignore_index=True)
+        properties = pd.DataFrame({'Property': ['Generator', 'Trades', 'Seed'],
+                                   'Value': ['synthetic_export', n_trades, seed]})
+        with pd.ExcelWriter(path, engine='openpyxl') as writer:
+            performance_sheet(trades).to_excel(writer, sheet_name='Performance', index=False)
+            trades.to_excel(writer, sheet_name='List of trades', index=False)
+            properties.to_excel(writer, sheet_name='Properties', index=False)
+    elif fmt == 'csv':
+        for i, chunk in enumerate(chunks):
+            chunk.to_csv(path, mode='w' if i == 0 else 'a', header=i == 0, index=False,
+                         date_format='%Y-%m-%d %H:%M')
+    else:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        writer = None
+        try:
+            for chunk in chunks:
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema)
+                writer.write_table(table)
+        finally:
+            if writer is not None:
+                writer.close()
+    return path
+
+
+def read_export(path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    '''Relit la liste des trades d'un export synthetique, quel que soit son format'''
+    fmt = os.path.splitext(path)[1].lstrip('.').lower()
+    if fmt == 'xlsx':
+        from data_extractor import TradingViewDataExtractor
+        with TradingViewDataExtractor(path, cache=None) as extractor:
+            return extractor.load_trades(usecols=columns)
+    if fmt == 'csv':
+        return pd.read_csv(path, usecols=columns, parse_dates=['Date and time'],
+                           dtype={'Type': 'category', 'Signal': 'category'})
+    if fmt == 'parquet':
+        return pd.read_parquet(path, columns=columns)
+    raise ValueError(f'Format inconnu: {fmt} (disponibles: {FORMATS})')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generation d\'exports TradingView synthetiques')
+    parser.add_argument('--trades', type=int, nargs='+', default=[1_000, 100_000])
+    parser.add_argument('--format', nargs='+', choices=FORMATS, default=list(FORMATS))
+    parser.add_argument('--seed', type=int, default=config.MONTE_CARLO_SEED)
+    parser.add_argument('--output', default=config.SYNTHETIC_DIR, help='Dossier de sortie')
+    args = parser.parse_args()
+
+    for n_trades in args.trades:
+        for fmt in args.format:
+            if fmt == 'xlsx' and n_trades > XLSX_MAX_TRADES:
+                print(f'{n_trades} trades: XLSX ignore (limite {XLSX_MAX_TRADES} trades)')
+                continue
+            path = os.path.join(args.output, f'{export_name(n_trades, args.seed)}.{fmt}')
+            start = time.perf_counter()
+            write_export(path, n_trades, args.seed)
+            print(f'{path} ({os.path.getsize(path) / 1024 ** 2:.1f} Mo) en {time.perf_counter() - start:.2f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+# Tests du noyau de drawdown (drawdown.py) contre une boucle Python de reference
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from drawdown import batch_drawdown_summary, drawdown_curve, drawdown_kernel, drawdown_statistics
+
+
+def naive_drawdown(pnl, times):
+    '''Reference : un trade a la fois (equity, plus haut courant, episodes sous l'eau)'''
+    equity, peak = 0.0, -np.inf
+    drawdowns, drawdowns_pct, peaks = [], [], []
+    for value in pnl:
+        equity += value
+        peak = max(peak, equity)
+        drawdowns.append(equity - peak)
+        drawdowns_pct.append((equity - peak) / peak * 100 if peak != 0 else np.nan)
+        peaks.append(peak)
+
+    episodes, start = [], None
+    for i, drawdown in enumerate(drawdowns):
+        if drawdown < 0 and start is None:
+            start = i
+        elif drawdown >= 0 and start is not None:
+            episodes.append((start, i))
+            start = None
+    if start is not None:
+        episodes.append((start, len(pnl)))
+
+    result = {
+        'max_drawdown': min(drawdowns),
+        'current_drawdown': drawdowns[-1],
+        'peak_equity': peaks[-1],
+        'total_pnl': equity,
+        'trough': int(np.argmin(drawdowns)),
+        'longest_underwater_trades': max((end - begin for begin, end in episodes), default=0),
+        'longest_underwater_duration': None,
+        'max_drawdown_recovery_trades': None,
+        'max_drawdown_recovery_time': None,
+        'drawdown_pct': np.array(drawdowns_pct)
+    }
+    if episodes:
+        durations = [(times[end] if end < len(pnl) else times[-1]) - times[begin - 1] for begin, end in episodes]
+        result['longest_underwater_duration'] = pd.Timedelta(max(durations))
+        trough = result['trough']
+        begin, end = next((b, e) for b, e in episodes if b <= trough < e)
+        if end < len(pnl):
+            result['max_drawdown_recovery_trades'] = end - trough
+            result['max_drawdown_recovery_time'] = pd.Timedelta(times[end] - times[trough])
+    return result
+
+
+def random_trades(rng, n):
+    pnl = np.round(rng.normal(0.2, 10, n), 2)
+    times = np.datetime64('2024-01-01T00:00') + np.cumsum(rng.integers(1, 3000, n)).astype('timedelta64[m]')
+    return pnl, times
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_kernel_matches_naive_loop(seed):
+    rng = np.random.default_rng(seed)
+    pnl, times = random_trades(rng, 400)
+    result = drawdown_kernel(pnl, times)
+    expected = naive_drawdown(pnl, times)
+
+    assert result['max_drawdown'] == pytest.approx(expected['max_drawdown'])
+    assert result['current_drawdown'] == pytest.approx(expected['current_drawdown'])
+    assert result['longest_underwater_trades'] == expected['longest_underwater_trades']
+    assert result['longest_underwater_duration'] == expected['longest_underwater_duration']
+    assert result['max_drawdown_recovery_trades'] == expected['max_drawdown_recovery_trades']
+    assert result['max_drawdown_recovery_time'] == expected['max_drawdown_recovery_time']
+    np.testing.assert_allclose(result['drawdown_pct'], expected['drawdown_pct'])
+    assert result['max_drawdown_pct'] == pytest.approx(np.nanmin(expected['drawdown_pct']))
+    # Pire episode en premier, creux a la position du drawdown max
+    assert result['episodes']['Trough_Index'].iloc[0] == expected['trough']
+    assert result['episodes']['Depth'].is_monotonic_increasing
+
+
+def test_recovered_drawdown():
+    pnl = np.array([10.0, -4.0, -3.0, 5.0, 4.0, -1.0])
+    times = np.datetime64('2024-01-01') + np.arange(6).astype('timedelta64[D]')
+    result = drawdown_kernel(pnl, times)
+    assert result['max_drawdown'] == -7.0
+    assert result['max_drawdown_recovery_trades'] == 2
+    assert result['max_drawdown_recovery_time'] == pd.Timedelta(days=2)
+    assert result['longest_underwater_trades'] == 3
+    assert result['current_drawdown'] == -1.0
+
+
+def test_empty_input():
+    result = drawdown_kernel(np.array([]), np.array([], dtype='datetime64[ns]'))
+    assert result['max_drawdown'] == 0.0
+    assert result['current_drawdown'] == 0.0
+    assert result['longest_underwater_trades'] == 0
+    assert result['max_drawdown_recovery_time'] is None
+    assert result['episodes'].empty
+
+
+def test_statistics_on_extended_curve():
+    # Courbe prolongee depuis le dernier equity / plus haut courant (mode incremental)
+    pnl, times = random_trades(np.random.default_rng(9), 300)
+    head = drawdown_curve(pnl[:200])
+    tail = drawdown_curve(pnl[200:], head[0][-1], head[1][-1])
+    curve = [np.concatenate(parts) for parts in zip(head, tail)]
+    extended = drawdown_statistics(*curve, times)
+    full = drawdown_kernel(pnl, times)
+    assert extended['max_drawdown'] == pytest.approx(full['max_drawdown'])
+    assert extended['current_drawdown'] == pytest.approx(full['current_drawdown'])
+    assert extended['longest_underwater_trades'] == full['longest_underwater_trades']
+    assert extended['max_drawdown_recovery_time'] == full['max_drawdown_recovery_time']
+
+
+def test_batch_summary_matches_kernel_in_several_blocks():
+    rng = np.random.default_rng(1)
+    lengths = [50, 0, 7, 120, 1, 33, 120, 80]
+    series = [random_trades(rng, n) for n in lengths]
+    summary = batch_drawdown_summary([pnl for pnl, _ in series], [f's{i}' for i in range(len(series))],
+                                     [times for _, times in series], max_cells=150)
+
+    for i, (pnl, times) in enumerate(series):
+        row = summary.loc[f's{i}']
+        assert row['Trades'] == len(pnl)
+        if len(pnl) == 0:
+            assert row['Total_PnL'] == 0 and pd.isna(row['Max_Drawdown_Time'])
+            continue
+        expected = naive_drawdown(pnl, times)
+        assert row['Total_PnL'] == pytest.approx(expected['total_pnl'])
+        assert row['Peak_Equity'] == pytest.approx(expected['peak_equity'])
+        assert row['Max_Drawdown'] == pytest.approx(expected['max_drawdown'])
+        assert row['Current_Drawdown'] == pytest.approx(expected['current_drawdown'])
+        assert row['Longest_Underwater_Trades'] == expected['longest_underwater_trades']
+        assert row['Max_Drawdown_Time'] == pd.Timestamp(times[expected['trough']])
+        if np.isnan(expected['drawdown_pct']).all():
+            assert np.isnan(row['Max_Drawdown_Pct'])
+        else:
+            assert row['Max_Drawdown_Pct'] == pytest.approx(np.nanmin(expected['drawdown_pct']))
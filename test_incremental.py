@@ -0,0 +1,99 @@
+# Tests du mode incremental (incremental.py) : prolongation d'un etat sauvegarde
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from aggregation import TradeCube
+from backtest_analysis import analyze_xlsx_file_complete, exit_rows
+from incremental import STATE_VERSION, StateStore, analyze_incremental
+from synthetic_export import export_name, make_trades
+
+FILE_PATH = f'{export_name(600, 11)}.xlsx'
+COMPARED = ('daily_analysis', 'monthly_analysis', 'weekly_analysis', 'optimal_daily_analysis', 'best_day_per_month')
+
+
+@pytest.fixture
+def store(tmp_path):
+    return StateStore(str(tmp_path / 'state'))
+
+
+@pytest.fixture
+def exports():
+    '''Export complet (600 trades) et export precedent de la meme strategie (ses 500 premiers trades)'''
+    trades = exit_rows(make_trades(600, seed=11), compact=False)
+    ordered = trades.sort_values('Trade #', kind='stable')
+    return ordered[ordered['Trade #'] <= 500], trades
+
+
+def test_append_matches_full_analysis(store, exports):
+    previous, current = exports
+    _, _, status = analyze_incremental(FILE_PATH, previous, store)
+    assert status['mode'] == 'full'
+
+    cube, drawdown_info, status = analyze_incremental(FILE_PATH, current, store)
+    assert status == {'mode': 'incremental', 'new_trades': 100, 'key': status['key']}
+
+    incremental = analyze_xlsx_file_complete(FILE_PATH, current, cube, drawdown_info)
+    full = analyze_xlsx_file_complete(FILE_PATH, current, TradeCube(current))
+    for name in COMPARED:
+        pd.testing.assert_frame_equal(incremental[name].reset_index(drop=True), full[name].reset_index(drop=True),
+                                      check_exact=False, rtol=1e-9)
+    for name in ('max_drawdown_absolute', 'max_drawdown_percentage', 'current_drawdown'):
+        assert incremental['drawdown_info'][name] == pytest.approx(full['drawdown_info'][name])
+    for name in ('longest_underwater_trades', 'max_drawdown_recovery_time'):
+        assert incremental['drawdown_info'][name] == full['drawdown_info'][name]
+    np.testing.assert_allclose(incremental['drawdown_info']['drawdown_data']['Cumulative_PnL'],
+                               full['drawdown_info']['drawdown_data']['Cumulative_PnL'])
+    assert incremental['total_pnl'] == pytest.approx(full['total_pnl'])
+
+
+def test_same_export_adds_nothing(store, exports):
+    _, current = exports
+    analyze_incremental(FILE_PATH, current, store)
+    _, _, status = analyze_incremental(FILE_PATH, current, store)
+    assert status['mode'] == 'incremental' and status['new_trades'] == 0
+
+
+def test_changed_prefix_forces_full(store, exports):
+    previous, current = exports
+    analyze_incremental(FILE_PATH, previous, store)
+    # Deux trades du milieu modifies en sens oppose : somme du P&L et extremites inchangees
+    changed = current.copy()
+    pnl = changed.columns.get_loc('Net P&L JPY')
+    trade = changed['Trade #'].to_numpy()
+    changed.iloc[np.flatnonzero(trade == 100)[0], pnl] += 500
+    changed.iloc[np.flatnonzero(trade == 200)[0], pnl] -= 500
+    _, _, status = analyze_incremental(FILE_PATH, changed, store)
+    assert status['mode'] == 'full'
+
+
+def test_changed_open_trade_forces_full(store, exports):
+    previous, current = exports
+    analyze_incremental(FILE_PATH, previous, store)
+    # Dernier trade de l'export precedent encore ouvert : son P&L a change depuis
+    changed = current.copy()
+    last = np.flatnonzero(changed['Trade #'].to_numpy() == 500)[0]
+    changed.iloc[last, changed.columns.get_loc('Net P&L JPY')] -= 42.0
+    _, _, status = analyze_incremental(FILE_PATH, changed, store)
+    assert status['mode'] == 'full'
+
+
+def test_changed_prefix_time_forces_full(store, exports):
+    previous, current = exports
+    analyze_incremental(FILE_PATH, previous, store)
+    changed = current.copy()
+    row = np.flatnonzero(changed['Trade #'].to_numpy() == 250)[0]
+    changed.iloc[row, changed.columns.get_loc('Date and time')] += pd.Timedelta(minutes=1)
+    _, _, status = analyze_incremental(FILE_PATH, changed, store)
+    assert status['mode'] == 'full'
+
+
+def test_bad_state_version_forces_full(store, exports):
+    previous, current = exports
+    _, _, status = analyze_incremental(FILE_PATH, previous, store)
+    state = store.load(status['key'])
+    state['version'] = STATE_VERSION - 1
+    store.save(status['key'], state)
+    _, _, status = analyze_incremental(FILE_PATH, current, store)
+    assert status['mode'] == 'full'
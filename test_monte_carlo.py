@@ -0,0 +1,63 @@
+# Tests de la simulation Monte Carlo (monte_carlo.py)
+
+import numpy as np
+import pytest
+
+import config
+from monte_carlo import path_statistics, run_monte_carlo
+
+
+@pytest.fixture
+def pnl():
+    return np.round(np.random.default_rng(0).normal(0.5, 10, 200), 2)
+
+
+def assert_same_paths(first, second):
+    assert first['paths'].keys() == second['paths'].keys()
+    for key in first['paths']:
+        np.testing.assert_array_equal(first['paths'][key], second['paths'][key])
+
+
+@pytest.mark.parametrize('method', ['bootstrap', 'shuffle'])
+def test_same_seed_independent_of_chunking(pnl, method):
+    whole = run_monte_carlo(pnl, 300, method, seed=1, max_workers=1)
+    # Blocs de 7 chemins au plus : 43 blocs, dont un dernier incomplet
+    chunked = run_monte_carlo(pnl, 300, method, seed=1, max_workers=1, max_bytes=len(pnl) * 7 * 25)
+    assert_same_paths(whole, chunked)
+    assert whole['summary'].equals(chunked['summary'])
+
+
+def test_same_seed_independent_of_workers(pnl):
+    single = run_monte_carlo(pnl, 200, 'bootstrap', seed=3, max_workers=1, max_bytes=len(pnl) * 50 * 25)
+    pooled = run_monte_carlo(pnl, 200, 'bootstrap', seed=3, max_workers=2, max_bytes=len(pnl) * 50 * 25)
+    assert_same_paths(single, pooled)
+
+
+def test_different_seeds_differ(pnl):
+    first = run_monte_carlo(pnl, 100, 'bootstrap', seed=1, max_workers=1)
+    second = run_monte_carlo(pnl, 100, 'bootstrap', seed=2, max_workers=1)
+    assert not np.array_equal(first['paths']['final_pnl'], second['paths']['final_pnl'])
+
+
+def test_shuffle_keeps_final_pnl(pnl):
+    result = run_monte_carlo(pnl, 100, 'shuffle', seed=1, max_workers=1)
+    np.testing.assert_allclose(result['paths']['final_pnl'], pnl.sum())
+    assert result['summary'].set_index('Metric').loc['Final_PnL', 'Observed'] == pytest.approx(pnl.sum())
+
+
+def test_path_statistics():
+    stats = path_statistics(np.array([[10.0, -4.0, -3.0, 5.0, -1.0, -1.0, -1.0]]))
+    assert stats['final_pnl'][0] == 5.0
+    assert stats['max_drawdown'][0] == -7.0
+    assert stats['longest_losing_streak'][0] == 3
+
+
+def test_too_few_trades_returns_none(capsys):
+    pnl = np.ones(config.MIN_TRADES_FOR_ANALYSIS - 1)
+    assert run_monte_carlo(pnl, 100, max_workers=1) is None
+    assert 'Pas assez de trades' in capsys.readouterr().out
+
+
+def test_unknown_method():
+    with pytest.raises(ValueError):
+        run_monte_carlo(np.ones(50), 100, 'jackknife', max_workers=1)
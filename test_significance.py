@@ -0,0 +1,74 @@
+# Tests du test de permutation par jour de la semaine (significance.py)
+
+import numpy as np
+import pandas as pd
+
+from significance import DAYS_ORDER, permutation_pvalues, weekday_pvalues
+
+
+def naive_pvalues(pnl, groups, n_groups, n_permutations, seed):
+    '''Reference : une permutation des etiquettes de groupe par iteration, en Python'''
+    rng = np.random.default_rng(seed)
+    observed = [pnl[groups == g].sum() for g in range(n_groups)]
+    upper = np.zeros(n_groups)
+    lower = np.zeros(n_groups)
+    for _ in range(n_permutations):
+        permuted = rng.permutation(groups)
+        for g in range(n_groups):
+            total = pnl[permuted == g].sum()
+            upper[g] += total >= observed[g] - 1e-9
+            lower[g] += total <= observed[g] + 1e-9
+    return np.minimum(1.0, 2 * (np.minimum(upper, lower) + 1) / (n_permutations + 1))
+
+
+def test_matches_naive_permutation():
+    rng = np.random.default_rng(0)
+    groups = rng.integers(0, 5, 300)
+    pnl = rng.normal(0, 10, 300) + np.where(groups == 2, 2.0, 0.0)
+    n_permutations = 2000
+
+    result = permutation_pvalues(pnl, groups, 5, n_permutations, seed=1)
+    expected = naive_pvalues(pnl, groups, 5, n_permutations, seed=2)
+    # Graines differentes : seule l'erreur de Monte Carlo separe les deux estimations
+    np.testing.assert_allclose(result['p_value_pnl'], expected, atol=0.08)
+
+
+def test_reproducible_with_seed():
+    rng = np.random.default_rng(3)
+    groups = rng.integers(0, 7, 200)
+    pnl = rng.normal(0, 5, 200)
+    first = permutation_pvalues(pnl, groups, 7, 500, seed=7)
+    second = permutation_pvalues(pnl, groups, 7, 500, seed=7)
+    np.testing.assert_array_equal(first['p_value_pnl'], second['p_value_pnl'])
+    # Blocs de permutations plus petits : meme ordre de grandeur des p-values
+    small_chunks = permutation_pvalues(pnl, groups, 7, 500, seed=7, max_bytes=200 * 9 * 10)
+    np.testing.assert_allclose(first['p_value_pnl'], small_chunks['p_value_pnl'], atol=0.15)
+
+
+def test_planted_weekday_effect():
+    rng = np.random.default_rng(4)
+    times = pd.Series(pd.date_range('2024-01-01', periods=700, freq='D'))
+    pnl = rng.normal(0, 10, 700)
+    pnl[times.dt.dayofweek.to_numpy() == 0] += 25.0
+    trades = pd.DataFrame({'Date and time': times, 'Net P&L JPY': pnl})
+
+    pvalues = weekday_pvalues(trades, n_permutations=1000, seed=5)
+    assert pvalues['Monday']['p_value_pnl'] < 0.01
+    assert pvalues['Monday']['p_value_wins'] < 0.01
+    assert set(pvalues) == set(DAYS_ORDER)
+
+
+def test_identical_pnl_is_not_significant():
+    groups = np.repeat(np.arange(7), 20)
+    pnl = np.full(len(groups), 12.5)
+    result = permutation_pvalues(pnl, groups, 7, 500, seed=0)
+    np.testing.assert_allclose(result['p_value_pnl'], 1.0)
+    np.testing.assert_allclose(result['p_value_wins'], 1.0)
+
+
+def test_empty_group_is_nan():
+    groups = np.array([0, 0, 1, 1, 3, 3])
+    pnl = np.array([1.0, -2.0, 3.0, 0.5, -1.0, 2.0])
+    result = permutation_pvalues(pnl, groups, 5, 200, seed=0)
+    assert np.isnan(result['p_value_pnl'][[2, 4]]).all()
+    assert not np.isnan(result['p_value_pnl'][[0, 1, 3]]).any()
@@ -0,0 +1,62 @@
+# Tests du classement des variantes (variant_index.py) et du profit factor de la base analytique
+
+import numpy as np
+import pandas as pd
+
+from analytics_store import AnalyticsStore, load_export
+from synthetic_export import export_name, make_trades, performance_sheet
+from variant_index import VariantIndex
+
+
+def records(profit_factors):
+    return pd.DataFrame({
+        'file_name': [f'export_{i}.xlsx' for i in range(len(profit_factors))],
+        'asset': ['USDJPY'] * len(profit_factors),
+        'trades': [50] * len(profit_factors),
+        'profit_factor': profit_factors
+    })
+
+
+def test_infinite_profit_factor_ranks_first_and_nan_is_excluded():
+    index = VariantIndex(records([1.5, np.inf, None, 3.0]))
+    best = index.top_k('profit_factor', k=4)
+    assert best['file_name'].tolist() == ['export_1.xlsx', 'export_3.xlsx', 'export_0.xlsx']
+    worst = index.top_k('profit_factor', k=4, largest=False)
+    assert worst['file_name'].tolist() == ['export_0.xlsx', 'export_3.xlsx', 'export_1.xlsx']
+    assert index.best_per('asset', 'profit_factor')['file_name'].tolist() == ['export_1.xlsx']
+
+
+def write_winning_export(path):
+    # Export synthetique dont toutes les sorties sont gagnantes
+    trades = make_trades(40, seed=3)
+    trades['Net P&L JPY'] = trades['Net P&L JPY'].abs() + 1.0
+    trades['Cumulative P&L JPY'] = trades['Net P&L JPY'].where(trades['Type'].str.startswith('Exit'), 0).cumsum()
+    with pd.ExcelWriter(path, engine='openpyxl') as writer:
+        performance_sheet(trades).to_excel(writer, sheet_name='Performance', index=False)
+        trades.to_excel(writer, sheet_name='List of trades', index=False)
+    return path
+
+
+def test_export_without_losses_is_stored_as_infinite(tmp_path):
+    path = write_winning_export(str(tmp_path / f'{export_name(40, 3)}.xlsx'))
+    record = load_export(path)
+    assert record['export']['profit_factor'] == np.inf
+
+    store = AnalyticsStore(str(tmp_path / 'analytics.db'))
+    store.write_export(record)
+    assert store.exports()['profit_factor'].iloc[0] == np.inf
+    best = VariantIndex.from_store(store).top_k('profit_factor', k=1)
+    assert best['file_name'].iloc[0] == record['export']['file_name']
+
+
+def test_migration_fills_null_profit_factor(tmp_path):
+    path = write_winning_export(str(tmp_path / f'{export_name(40, 3)}.xlsx'))
+    record = load_export(path)
+    record['export']['profit_factor'] = None  # ligne ecrite avant le correctif
+    db_path = str(tmp_path / 'analytics.db')
+    store = AnalyticsStore(db_path)
+    store.write_export(record)
+    with store.connect() as conn:
+        conn.execute('PRAGMA user_version = 0')
+
+    assert AnalyticsStore(db_path).exports()['profit_factor'].iloc[0] == np.inf
@@ -0,0 +1,62 @@
+# Representation compacte des trades (types categoriels, entiers reduits) et rapport memoire
+
+import pandas as pd
+from typing import Dict
+
+# Une colonne texte devient categorielle si elle a au plus ce ratio de valeurs distinctes
+CATEGORY_MAX_RATIO = 0.5
+
+
+def frame_memory(df: pd.DataFrame) -> int:
+    '''Memoire occupee par un DataFrame en octets (chaines comprises)'''
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+def compact_trades(df: pd.DataFrame) -> pd.DataFrame:
+    '''
+    Convertit les colonnes vers les types les plus compacts sans perte d'information
+
+    - texte a faible cardinalite (Type, Signal...) -> category
+    - entiers -> plus petit type entier suffisant
+    Les P&L restent en float64 (les sommes et moyennes doivent garder leur precision)
+    et les dates en datetime64 (une seule colonne, cles derivees a la demande).
+    '''
+    compact = {}
+    for column in df.columns:
+        series = df[column]
+        if pd.api.types.is_object_dtype(series.dtype) or pd.api.types.is_string_dtype(series.dtype):
+            if len(series) and series.nunique(dropna=False) <= len(series) * CATEGORY_MAX_RATIO:
+                compact[column] = series.astype('category')
+        elif pd.api.types.is_integer_dtype(series.dtype) and not isinstance(series.dtype, pd.CategoricalDtype):
+            compact[column] = pd.to_numeric(series, downcast='integer')
+    return df.assign(**compact) if compact else df
+
+
+def column_report(df: pd.DataFrame) -> pd.DataFrame:
+    '''Type et memoire de chaque colonne'''
+    usage = df.memory_usage(index=False, deep=True)
+    return pd.DataFrame({
+        'Colonne': usage.index,
+        'Type': [str(df[col].dtype) for col in usage.index],
+        'Octets': usage.values
+    })
+
+
+def memory_report(reports: Dict[str, Dict[str, int]]) -> pd.DataFrame:
+    '''
+    Tableau du rapport memoire par fichier
+
+    Args:
+        reports: {fichier: {'rows', 'raw_bytes', 'compact_bytes', 'result_bytes'}}
+    '''
+    rows = []
+    for file_name, report in reports.items():
+        rows.append({
+            'Fichier': file_name,
+            'Trades': report['rows'],
+            'Trades bruts (Mo)': report['raw_bytes'] / 1024 ** 2,
+            'Trades compacts (Mo)': report['compact_bytes'] / 1024 ** 2,
+            'Gain (%)': (1 - report['compact_bytes'] / report['raw_bytes']) * 100 if report['raw_bytes'] else 0.0,
+            'Résultats (Mo)': report['result_bytes'] / 1024 ** 2
+        })
+    return pd.DataFrame(rows)
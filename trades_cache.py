@@ -0,0 +1,174 @@
+# Cache disque (Parquet) de la feuille 'List of trades'
+
+import hashlib
+import os
+import pandas as pd
+from typing import Callable, List, Optional
+
+import config
+from instrumentation import traced
+
+try:
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+
+def file_digest(file_path: str, chunk_size: int = 1 << 20) -> str:
+    '''Calcule le hash SHA-1 du contenu d'un fichier'''
+    digest = hashlib.sha1()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class TradesCache:
+    '''
+    Cache Parquet des trades, indexe par hash du contenu + mtime du fichier source.
+
+    Chaque fichier source n'a qu'une seule entree valide : une nouvelle version
+    remplace l'ancienne. La taille totale du dossier est bornee par max_bytes
+    (eviction des entrees les moins recemment utilisees).
+    '''
+
+    SUFFIX = '.parquet'
+
+    def __init__(self, cache_dir: str = config.CACHE_DIR, max_bytes: int = config.CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.enabled = PARQUET_AVAILABLE
+
+    def _source_id(self, file_path: str) -> str:
+        return hashlib.sha1(os.path.abspath(file_path).encode('utf-8')).hexdigest()[:12]
+
+    def entry_path(self, file_path: str) -> str:
+        '''Chemin de l'entree de cache correspondant a l'etat actuel du fichier'''
+        mtime_ns = os.stat(file_path).st_mtime_ns
+        key = f'{self._source_id(file_path)}_{file_digest(file_path)}_{mtime_ns}'
+        return os.path.join(self.cache_dir, key + self.SUFFIX)
+
+    def get_or_load(self, file_path: str, loader: Callable[[], pd.DataFrame],
+                    columns: Optional[List[str]] = None) -> pd.DataFrame:
+        '''
+        Retourne les trades caches, ou les charge via loader() puis les met en cache
+
+        Args:
+            file_path: Fichier source
+            loader: Fonction de lecture de la feuille complete (appelee si absente du cache)
+            columns: Colonnes a relire (toutes par defaut)
+        '''
+        if not self.enabled:
+            df = loader()
+            return df[columns] if columns is not None else df
+
+        entry = self.entry_path(file_path)
+        cached = self._read(entry, columns)
+        if cached is not None:
+            return cached
+
+        df = loader()
+        self._write(file_path, entry, df)
+        return df[columns] if columns is not None else df
+
+    def invalidate(self, file_path: str) -> None:
+        '''Supprime toutes les entrees d'un fichier source'''
+        self._remove_entries(self._source_id(file_path))
+
+    def clear(self) -> None:
+        '''Vide entierement le cache'''
+        for path, _, _ in self._entries():
+            self._remove(path)
+
+    def total_size(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    @traced('read_parquet')
+    def _read(self, entry: str, columns: Optional[List[str]] = None) -> Optional[pd.DataFrame]:
+        '''
+        Relit une entree (None si absente ou illisible)
+
+        Une colonne demandee absente de l'entree leve KeyError sans supprimer
+        l'entree : c'est la demande, pas le cache, qui ne correspond pas a l'export.
+        '''
+        try:
+            names = pq.read_schema(entry).names
+        except FileNotFoundError:
+            return None  # absente, ou evincee entre-temps par un autre processus
+        except Exception as e:
+            return self._discard(entry, e)
+        if columns is not None:
+            missing = [column for column in columns if column not in names]
+            if missing:
+                raise KeyError(f'Colonnes absentes de la liste des trades: {missing}')
+        try:
+            df = pd.read_parquet(entry, columns=columns, memory_map=True)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            return self._discard(entry, e)
+        # Marquer l'entree comme recemment utilisee (politique LRU)
+        try:
+            os.utime(entry)
+        except OSError:
+            pass
+        return df
+
+    def _discard(self, entry: str, error: Exception) -> None:
+        print(f'Entree de cache illisible, supprimee: {error}')
+        self._remove(entry)
+
+    @traced('write_parquet')
+    def _write(self, file_path: str, entry: str, df: pd.DataFrame) -> None:
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # L'ancienne version du meme fichier source n'est plus valide
+        self._remove_entries(self._source_id(file_path))
+
+        # Nom propre au processus : dashboard, watcher et CLI peuvent cacher la meme source
+        tmp_path = entry + f'.{os.getpid()}.tmp'
+        try:
+            df.to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, entry)
+        except Exception as e:
+            # Colonnes non typables (types mixtes...) : on continue sans cache
+            print(f'Mise en cache impossible pour {file_path}: {e}')
+            self._remove(tmp_path)
+            return
+        self._evict()
+
+    def _entries(self):
+        '''Liste (chemin, taille, date de derniere utilisation) des entrees'''
+        if not os.path.isdir(self.cache_dir):
+            return []
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(self.SUFFIX):
+                path = os.path.join(self.cache_dir, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue  # supprimee par un autre processus entre listdir et stat
+                entries.append((path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def _evict(self) -> None:
+        entries = sorted(self._entries(), key=lambda e: e[2])
+        total = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    def _remove_entries(self, source_id: str) -> None:
+        for path, _, _ in self._entries():
+            if os.path.basename(path).startswith(source_id + '_'):
+                self._remove(path)
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
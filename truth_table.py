@@ -0,0 +1,112 @@
+# Tableau de verite (jour x actif) : statistiques empilees et classification vectorisee
+
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, List, Optional
+
+import config
+from significance import DAYS_ORDER
+
+# Libelles des classes, dans l'ordre des codes renvoyes par classify()
+LABELS = np.array(['✅ OUI', '⚠️ P&L+', '⚠️ WR+', '❌ NON', '➖ NS', '➖ N/A'], dtype=object)
+YES, PNL_ONLY, WIN_RATE_ONLY, NO, NOT_SIGNIFICANT, NOT_AVAILABLE = range(len(LABELS))
+
+# Colonne de weekday_analysis -> matrice (jour x actif) et valeur d'une cellule sans trade
+STATS = {
+    'Total_PnL_JPY': ('pnl', np.nan),
+    'Win_Rate': ('win_rate', np.nan),
+    'Nb_Trades': ('trades', 0),
+    'P_Value': ('p_value', np.nan)
+}
+
+
+def stack_weekday_stats(truth_analyses: List[Dict[str, Any]]) -> Dict[str, Any]:
+    '''
+    Empile les statistiques par jour de toutes les analyses en matrices (jour x actif)
+
+    Une seule concatenation des tableaux par jour, puis chaque colonne est
+    ecrite a sa position (code jour, code actif) par indexation NumPy : aucun
+    parcours des cellules. Le resultat ne depend pas des seuils et peut etre
+    reclasse a volonte par classify().
+
+    Returns:
+        Dict: 'assets', 'days' et une matrice (7 x actifs) par statistique
+        ('pnl', 'win_rate', 'trades', 'p_value')
+    '''
+    assets = [analysis['asset_name'] for analysis in truth_analyses]
+    shape = (len(DAYS_ORDER), len(assets))
+    stats = {
+        name: np.full(shape, fill, dtype=np.int64 if name == 'trades' else float)
+        for name, fill in STATS.values()
+    }
+    stats.update({'assets': assets, 'days': list(DAYS_ORDER)})
+
+    frames = [analysis['weekday_analysis'] for analysis in truth_analyses]
+    if not frames:
+        return stats
+    stacked = pd.concat(frames, ignore_index=True)
+    asset_codes = np.repeat(np.arange(len(frames)), [len(frame) for frame in frames])
+    day_codes = pd.Categorical(stacked['Jour_Semaine'], categories=DAYS_ORDER).codes
+    known = day_codes >= 0
+    cells = (day_codes[known], asset_codes[known])
+    for column, (name, _) in STATS.items():
+        if column in stacked.columns:
+            stats[name][cells] = stacked[column].to_numpy()[known]
+    return stats
+
+
+def classify(stats: Dict[str, Any],
+             win_rate_threshold: float = config.TRUTH_WIN_RATE_THRESHOLD,
+             pnl_threshold: float = config.TRUTH_PNL_THRESHOLD,
+             min_trades: int = config.TRUTH_MIN_TRADES,
+             significant_only: bool = False,
+             alpha: Optional[float] = None) -> np.ndarray:
+    '''
+    Code de classe (indice dans LABELS) de chaque cellule (jour x actif)
+
+    Args:
+        stats: Matrices de stack_weekday_stats()
+        win_rate_threshold: Win rate (%) au-dela duquel le signal est de bonne qualite
+        pnl_threshold: P&L total au-dela duquel le jour est rentable
+        min_trades: Nombre minimum de trades d'une cellule (N/A en dessous)
+        significant_only: Cellules non significatives classees NS
+        alpha: Seuil de la p-value (1 - config.CONFIDENCE_LEVEL par defaut)
+    '''
+    profitable = stats['pnl'] > pnl_threshold
+    good_quality = stats['win_rate'] > win_rate_threshold
+    codes = np.select(
+        [profitable & good_quality, profitable, good_quality],
+        [YES, PNL_ONLY, WIN_RATE_ONLY],
+        default=NO
+    ).astype(np.int8)
+    if significant_only:
+        alpha = 1 - config.CONFIDENCE_LEVEL if alpha is None else alpha
+        codes[~(stats['p_value'] < alpha)] = NOT_SIGNIFICANT
+    codes[stats['trades'] < max(1, min_trades)] = NOT_AVAILABLE
+    return codes
+
+
+def truth_matrix(stats: Dict[str, Any], codes: np.ndarray, assets_as_rows: bool = False) -> pd.DataFrame:
+    '''
+    Tableau de libelles (jours en lignes, actifs en colonnes, ou l'inverse)
+
+    Avec les actifs en lignes, la colonne 'Jours ✅' compte les jours valides de
+    chaque actif (tri direct dans la grille).
+    '''
+    if not assets_as_rows:
+        return pd.DataFrame(LABELS[codes], index=stats['days'], columns=stats['assets'])
+    labels = pd.DataFrame(LABELS[codes.T], index=stats['assets'], columns=stats['days'])
+    labels.insert(0, 'Jours ✅', (codes == YES).sum(axis=0))
+    return labels
+
+
+def with_pvalues(stats: Dict[str, Any], pvalues: List[Optional[Dict[str, Dict[str, float]]]]) -> Dict[str, Any]:
+    '''
+    Copie de stats dont la matrice 'p_value' est remplie a partir des p-values
+    de chaque actif (weekday_pvalues, dans l'ordre des actifs ; None = inconnues)
+    '''
+    p_value = stats['p_value'].copy()
+    for column, asset_pvalues in enumerate(pvalues):
+        if asset_pvalues is not None:
+            p_value[:, column] = [asset_pvalues[day]['p_value_pnl'] for day in stats['days']]
+    return {**stats, 'p_value': p_value}
@@ -0,0 +1,169 @@
+# Index en memoire des variantes de strategie (un enregistrement par export)
+#
+# Les metadonnees du nom de fichier (strategie, version, parametres, courtier,
+# actif) sont indexees par valeur ; les resumes deja calcules (P&L, drawdown,
+# win rate...) sont gardes en tableaux NumPy. Filtrer = intersecter des listes
+# de positions ; le classement top-k passe par un tas de taille k (O(n log k)),
+# sans tri complet.
+#
+#   python variant_index.py --metric total_pnl --by asset --k 1
+
+import argparse
+import heapq
+from typing import Dict, List, Union
+
+import numpy as np
+import pandas as pd
+
+import config
+
+FIELDS = ('strategy', 'version', 'params', 'broker', 'asset', 'export_date', 'variant')
+METRICS = ('total_pnl', 'avg_pnl', 'win_rate', 'profit_factor', 'max_drawdown', 'max_drawdown_pct', 'trades')
+
+
+class VariantIndex:
+    '''
+    Filtrage et classement rapides d'un grand nombre d'exports
+
+    Args:
+        records: Une ligne par export avec les colonnes de FIELDS et METRICS
+            (table exports de la base analytique, voir from_store)
+    '''
+
+    def __init__(self, records: pd.DataFrame):
+        self.records = records.reset_index(drop=True)
+        self.metrics = {
+            metric: pd.to_numeric(self.records[metric], errors='coerce').to_numpy(dtype=float)
+            for metric in METRICS if metric in self.records.columns
+        }
+        # Listes de positions par valeur de chaque champ (index inverse)
+        self.postings: Dict[str, Dict[str, np.ndarray]] = {
+            field: {value: np.asarray(positions) for value, positions in
+                    self.records.groupby(field, sort=False).indices.items()}
+            for field in FIELDS if field in self.records.columns
+        }
+        # Dernier export de chaque variante (les re-exports remplacent les precedents)
+        self.latest = np.zeros(len(self.records), dtype=bool)
+        if len(self.records) and 'variant' in self.records.columns:
+            dates = self.records['export_date'].fillna('') if 'export_date' in self.records.columns else None
+            order = dates.sort_values(kind='stable').index if dates is not None else self.records.index
+            self.latest[self.records.loc[order].drop_duplicates('variant', keep='last').index] = True
+
+    @classmethod
+    def from_store(cls, store) -> 'VariantIndex':
+        '''Index construit depuis la table exports de la base analytique (AnalyticsStore)'''
+        return cls(store.exports())
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def values(self, field: str) -> List[str]:
+        '''Valeurs distinctes d'un champ'''
+        return sorted(self.postings.get(field, {}))
+
+    def mask(self, latest_only: bool = False, min_trades: int = 0,
+             **criteria: Union[str, List[str], None]) -> np.ndarray:
+        '''
+        Masque des exports qui satisfont tous les criteres
+
+        Args:
+            latest_only: Ne garder que le dernier export de chaque variante
+            min_trades: Nombre minimum de trades
+            criteria: champ=valeur ou champ=[valeurs] (None ou liste vide = pas de filtre)
+        '''
+        selected = self.latest.copy() if latest_only else np.ones(len(self.records), dtype=bool)
+        for field, wanted in criteria.items():
+            if wanted is None or (isinstance(wanted, (list, tuple, set)) and not wanted):
+                continue
+            if field not in self.postings:
+                raise KeyError(f'Champ inconnu: {field} (disponibles: {FIELDS})')
+            wanted = [wanted] if isinstance(wanted, str) else wanted
+            field_mask = np.zeros(len(self.records), dtype=bool)
+            for value in wanted:
+                positions = self.postings[field].get(value)
+                if positions is not None:
+                    field_mask[positions] = True
+            selected &= field_mask
+        if min_trades and 'trades' in self.metrics:
+            selected &= self.metrics['trades'] >= min_trades
+        return selected
+
+    def _heap_top(self, positions: np.ndarray, metric: str, k: int, largest: bool) -> List[int]:
+        # NaN = metrique indefinie (ex. profit factor sans gain ni perte) : hors classement.
+        # Un profit factor infini (aucune perte) reste classe, en tete avec largest=True.
+        values = self.metrics[metric][positions]
+        valid = ~np.isnan(values)
+        keys = values[valid] if largest else -values[valid]
+        return [int(p) for _, p in heapq.nlargest(k, zip(keys.tolist(), positions[valid].tolist()))]
+
+    def top_k(self, metric: str = 'total_pnl', k: int = 10, largest: bool = True,
+              latest_only: bool = False, min_trades: int = 0, **criteria) -> pd.DataFrame:
+        '''
+        Les k meilleurs exports selon metric (largest=False : les k plus faibles)
+
+        Le drawdown est negatif : le meilleur drawdown est le plus grand (le plus proche de 0).
+        Profit factor : infini pour un export sans trade perdant (premier du classement),
+        indefini (NaN, exclu) pour un export sans gain ni perte.
+        '''
+        self._check_metric(metric)
+        positions = np.flatnonzero(self.mask(latest_only, min_trades, **criteria))
+        best = self._heap_top(positions, metric, k, largest)
+        result = self.records.iloc[best].copy()
+        result.insert(0, 'Rank', np.arange(1, len(best) + 1))
+        return result.reset_index(drop=True)
+
+    def best_per(self, group: str = 'asset', metric: str = 'total_pnl', k: int = 1, largest: bool = True,
+                 latest_only: bool = False, min_trades: int = 0, **criteria) -> pd.DataFrame:
+        '''
+        Les k meilleurs exports de chaque groupe (ex. meilleur jeu de parametres par actif)
+
+        Un tas de taille k par groupe : O(n log k) pour l'ensemble des groupes.
+        '''
+        self._check_metric(metric)
+        if group not in self.postings:
+            raise KeyError(f'Champ inconnu: {group} (disponibles: {FIELDS})')
+        selected = self.mask(latest_only, min_trades, **criteria)
+        rows, ranks = [], []
+        for value in sorted(self.postings[group]):
+            positions = self.postings[group][value]
+            best = self._heap_top(positions[selected[positions]], metric, k, largest)
+            rows.extend(best)
+            ranks.extend(range(1, len(best) + 1))
+        result = self.records.iloc[rows].copy()
+        result.insert(0, 'Rank', ranks)
+        return result.reset_index(drop=True)
+
+    def _check_metric(self, metric: str) -> None:
+        if metric not in self.metrics:
+            raise KeyError(f'Metrique inconnue: {metric} (disponibles: {tuple(self.metrics)})')
+
+
+def main():
+    from analytics_store import AnalyticsStore
+
+    parser = argparse.ArgumentParser(description='Classement des variantes de strategie indexees dans la base analytique')
+    parser.add_argument('--db', default=config.ANALYTICS_DB, help='Fichier SQLite')
+    parser.add_argument('--metric', choices=METRICS, default='total_pnl')
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--by', choices=FIELDS, help='Classement par groupe (ex. asset)')
+    parser.add_argument('--worst', action='store_true', help='Les plus faibles valeurs')
+    parser.add_argument('--latest', action='store_true', help='Dernier export de chaque variante uniquement')
+    parser.add_argument('--min-trades', type=int, default=config.MIN_TRADES_FOR_ANALYSIS)
+    for field in ('strategy', 'version', 'params', 'broker', 'asset'):
+        parser.add_argument(f'--{field}', action='append', help=f'Filtre sur {field} (repetable)')
+    args = parser.parse_args()
+
+    index = VariantIndex.from_store(AnalyticsStore(args.db))
+    criteria = {field: getattr(args, field) for field in ('strategy', 'version', 'params', 'broker', 'asset')}
+    if args.by:
+        result = index.best_per(args.by, args.metric, args.k, not args.worst, args.latest, args.min_trades, **criteria)
+    else:
+        result = index.top_k(args.metric, args.k, not args.worst, args.latest, args.min_trades, **criteria)
+    columns = ['Rank', 'file_name', 'strategy', 'version', 'params', 'asset', 'trades',
+               'total_pnl', 'win_rate', 'profit_factor', 'max_drawdown']
+    print(f'{len(index)} exports indexes')
+    print(result[[c for c in columns if c in result.columns]].round(2).to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,229 @@
+# Surveillance du dossier des exports : les nouveaux fichiers XLSX (ou modifies)
+# sont analyses des que leur ecriture est terminee et leurs rapports regeneres
+#
+#   python watcher.py [dossier] [--jobs N] [--format csv|excel|both] [--once]
+#
+# Le dossier est scrute periodiquement (pas de dependance a une API systeme de
+# notification). Un fichier n'est pris en compte qu'une fois sa taille et sa date
+# stables pendant config.WATCH_DEBOUNCE_SECONDS (copie ou export en cours).
+# La file d'attente est bornee : au-dela, les fichiers restent en retard dans le
+# dossier et sont admis au fur et a mesure que les processus se liberent.
+
+import argparse
+import multiprocessing
+import os
+import signal
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Any, Dict, Optional, Tuple
+
+import config
+from main import FORMATS, MANIFEST_NAME, TRACE_NAME, file_state, is_unchanged, load_manifest, process_file, save_manifest
+from trades_cache import file_digest
+
+
+def _ignore_interrupt() -> None:
+    # Ctrl+C est gere par le processus principal, qui laisse finir les analyses en cours
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+class DirectoryWatcher:
+    '''
+    Surveille un dossier et soumet les exports termines a un pool de processus borne
+
+    Etats d'un fichier : vu (en cours d'ecriture) -> stable -> admis dans la file
+    (au plus queue_size) -> en cours (au plus max_workers) -> enregistre dans le
+    manifeste. Un fichier stable qui ne trouve pas de place dans la file est en retard.
+    '''
+
+    def __init__(self, directory: str = config.BACKTEST_DIR, output_dir: str = config.REPORTS_DIR,
+                 report_format: str = 'csv', max_workers: Optional[int] = None,
+                 poll_seconds: float = config.WATCH_POLL_SECONDS,
+                 debounce_seconds: float = config.WATCH_DEBOUNCE_SECONDS,
+                 queue_size: int = config.WATCH_QUEUE_SIZE, trace_mode: Optional[str] = None):
+        self.directory = directory
+        self.output_dir = output_dir
+        self.report_format = report_format
+        self.max_workers = max(1, max_workers or config.MAX_WORKERS)
+        self.poll_seconds = poll_seconds
+        self.debounce_seconds = debounce_seconds
+        self.queue_size = max(1, queue_size)
+        self.trace_mode = trace_mode
+
+        os.makedirs(output_dir, exist_ok=True)
+        self.manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+        self.manifest = load_manifest(self.manifest_path)
+
+        # chemin -> (etat taille/mtime, instant ou cet etat a ete vu pour la premiere fois)
+        self.seen: Dict[str, Tuple[Dict[str, int], float]] = {}
+        # chemin -> instant de detection, dans l'ordre d'arrivee
+        self.queue: 'OrderedDict[str, float]' = OrderedDict()
+        self.backlog = 0
+        self.settling = 0
+        # future -> (chemin, instant de detection, entree du manifeste a enregistrer)
+        self.running: Dict[Any, Tuple[str, float, Dict[str, Any]]] = {}
+        # chemin -> etat taille/mtime d'un fichier en echec : retraite seulement s'il change
+        self.failed: Dict[str, Dict[str, int]] = {}
+        self.latencies = deque(maxlen=100)
+        self.processed = 0
+        self.failures = 0
+
+    def scan(self) -> None:
+        '''Repere les fichiers nouveaux ou modifies et admet ceux dont l'ecriture est terminee'''
+        now = time.monotonic()
+        current = {}
+        for name in os.listdir(self.directory):
+            if not name.endswith('.xlsx') or name.startswith('~$'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                current[path] = file_state(path)
+            except OSError:
+                continue  # supprime entre listdir et stat
+
+        for path in list(self.seen):
+            if path not in current:
+                del self.seen[path]
+                self.failed.pop(path, None)
+
+        busy = set(self.queue) | {path for path, _, _ in self.running.values()}
+        self.backlog = 0
+        self.settling = 0
+        for path, state in current.items():
+            previous = self.seen.get(path)
+            if previous is None or previous[0] != state:
+                # Nouveau fichier ou ecriture en cours : le delai repart de zero
+                self.seen[path] = (state, now)
+                self.settling += 1
+                continue
+            if path in busy or self.failed.get(path) == state:
+                continue
+            if now - previous[1] < self.debounce_seconds:
+                self.settling += 1
+                continue
+            if is_unchanged(path, self.manifest.get(os.path.basename(path)), self.report_format):
+                continue
+            if len(self.queue) >= self.queue_size:
+                self.backlog += 1
+                continue
+            self.queue[path] = previous[1]
+
+    def submit(self, pool: ProcessPoolExecutor) -> None:
+        '''Envoie les fichiers de la file aux processus libres (pas plus d'une tache par processus)'''
+        while self.queue and len(self.running) < self.max_workers:
+            path, detected = self.queue.popitem(last=False)
+            try:
+                # Etat capture a la soumission : une modification pendant l'analyse sera retraitee
+                entry = dict(file_state(path), digest=file_digest(path), format=self.report_format)
+            except OSError:
+                continue
+            future = pool.submit(process_file, (path, self.output_dir, self.report_format, self.trace_mode))
+            self.running[future] = (path, detected, entry)
+
+    def collect(self, timeout: float) -> None:
+        '''Attend la fin d'une analyse (au plus timeout secondes) et enregistre les resultats'''
+        if not self.running:
+            time.sleep(timeout)
+            return
+        done, _ = wait(list(self.running), timeout=timeout, return_when=FIRST_COMPLETED)
+        for future in done:
+            path, detected, entry = self.running.pop(future)
+            file_name = os.path.basename(path)
+            latency = time.monotonic() - detected
+            try:
+                result = future.result()
+            except Exception as e:
+                self.failures += 1
+                self.failed[path] = {key: entry[key] for key in ('size', 'mtime_ns')}
+                print(f'ERREUR {file_name}: {type(e).__name__}: {e} (ignore jusqu\'a sa prochaine modification)')
+                continue
+            self.failed.pop(path, None)
+            self.processed += 1
+            self.latencies.append(latency)
+            self.manifest[file_name] = entry
+            save_manifest(self.manifest_path, self.manifest)
+            print(f'{file_name}: {result["rows"]} trades, P&L {result["total_pnl"]:,.0f} '
+                  f'(latence {latency:.1f}s, analyse {sum(result["timings"].values()):.1f}s)')
+
+    def status(self) -> Dict[str, Any]:
+        '''Profondeur de la file et latence (detection -> rapports ecrits)'''
+        return {
+            'queued': len(self.queue),
+            'running': len(self.running),
+            'backlog': self.backlog,
+            'settling': self.settling,
+            'processed': self.processed,
+            'failures': self.failures,
+            'mean_latency': sum(self.latencies) / len(self.latencies) if self.latencies else 0.0,
+            'max_latency': max(self.latencies) if self.latencies else 0.0
+        }
+
+    def idle(self) -> bool:
+        return not self.queue and not self.running and self.backlog == 0 and self.settling == 0
+
+    def run(self, once: bool = False, status_seconds: float = 30.0) -> None:
+        '''
+        Boucle de surveillance (Ctrl+C pour arreter)
+
+        Args:
+            once: Traiter les fichiers presents puis s'arreter
+            status_seconds: Intervalle d'affichage de l'etat de la file
+        '''
+        context = multiprocessing.get_context('spawn')
+        print(f'Surveillance de {self.directory} ({self.max_workers} processus, file de {self.queue_size})')
+        last_status = time.monotonic()
+        with ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context,
+                                 initializer=_ignore_interrupt) as pool:
+            try:
+                while True:
+                    self.scan()
+                    self.submit(pool)
+                    self.collect(self.poll_seconds)
+                    if time.monotonic() - last_status >= status_seconds:
+                        self.print_status()
+                        last_status = time.monotonic()
+                    # En mode --once, on attend que les fichiers vus soient stables puis traites
+                    if once and self.idle():
+                        break
+            except KeyboardInterrupt:
+                print('\nArret demande, fin des analyses en cours...')
+                while self.running:
+                    self.collect(self.poll_seconds)
+        self.print_status()
+
+    def print_status(self) -> None:
+        status = self.status()
+        print(f'[file] en attente {status["queued"]}/{self.queue_size}, en cours {status["running"]}, '
+              f'en retard {status["backlog"]}, en ecriture {status["settling"]} | traites {status["processed"]}, erreurs {status["failures"]} | '
+              f'latence moy {status["mean_latency"]:.1f}s, max {status["max_latency"]:.1f}s')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Surveillance du dossier des exports TradingView')
+    parser.add_argument('directory', nargs='?', default=config.BACKTEST_DIR, help='Dossier surveille')
+    parser.add_argument('--jobs', type=int, default=config.MAX_WORKERS, help='Nombre de processus')
+    parser.add_argument('--format', choices=FORMATS, default='csv', help='Format des rapports')
+    parser.add_argument('--output', default=config.REPORTS_DIR, help='Dossier des rapports')
+    parser.add_argument('--interval', type=float, default=config.WATCH_POLL_SECONDS, help='Secondes entre deux scans')
+    parser.add_argument('--debounce', type=float, default=config.WATCH_DEBOUNCE_SECONDS,
+                        help='Secondes de stabilite avant de traiter un fichier')
+    parser.add_argument('--queue-size', type=int, default=config.WATCH_QUEUE_SIZE, help='Taille maximale de la file')
+    parser.add_argument('--status', type=float, default=30.0, help="Secondes entre deux affichages de l'etat")
+    parser.add_argument('--once', action='store_true', help='Traiter les fichiers presents puis quitter')
+    parser.add_argument('--trace', action='store_true', help=f'Ecrire le detail des etapes de chaque fichier ({TRACE_NAME})')
+    parser.add_argument('--trace-memory', action='store_true',
+                        help='--trace avec le pic memoire de chaque etape (tracemalloc, plus lent)')
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.directory):
+        print(f'Erreur: Dossier non trouve - {args.directory}')
+        return
+    watcher = DirectoryWatcher(args.directory, args.output, args.format, args.jobs,
+                               args.interval, args.debounce, args.queue_size,
+                               'memory' if args.trace_memory else 'time' if args.trace else None)
+    watcher.run(once=args.once, status_seconds=args.status)
+
+
+if __name__ == '__main__':
+    main()